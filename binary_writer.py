@@ -0,0 +1,159 @@
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from categorical import CategoryEncoder, build_vocabularies
+from constants import CSV_FIELD_NAMES
+from epoch_time import to_epoch
+from event_record import Event
+from resource_pool import ResourcePool
+from vocabulary import USER_ID_COUNT
+
+BINARY_MAGIC = b"PMGBIN01"
+BINARY_VERSION = 1
+# Код для пустых категориальных значений (anomaly_type=None)
+NULL_CODE = 0xFFFF
+FLAG_ANOMALY = 1
+FLAG_REWORK = 2
+# Заголовок дополняется до кратного размера, чтобы записи начинались с ровного offset
+_HEADER_ALIGN = 64
+
+# Категориальные колонки в порядке записи (uint16 коды)
+BINARY_CODE_FIELDS = [
+    "process", "activity", "role", "resource", "resource_id",
+    "anomaly_type", "user_id", "department", "priority", "comment",
+]
+
+# Описание записи: (имя, numpy-совместимый тип)
+BINARY_DTYPE = [
+    ("case_id", "<i8"),
+    ("timestamp_start", "<i8"),
+    ("timestamp_end", "<i8"),
+    ("cost", "<f8"),
+    ("duration_minutes", "<i4"),
+] + [(field, "<u2") for field in BINARY_CODE_FIELDS] + [
+    ("flags", "u1"),
+]
+
+_RECORD = struct.Struct("<qqqdi" + "H" * len(BINARY_CODE_FIELDS) + "B")
+RECORD_SIZE = _RECORD.size
+
+_FIELD_INDEX = {field: i for i, field in enumerate(CSV_FIELD_NAMES)}
+_CODE_INDEXES = [_FIELD_INDEX[field] for field in BINARY_CODE_FIELDS]
+_START, _END = _FIELD_INDEX["timestamp_start"], _FIELD_INDEX["timestamp_end"]
+_DURATION, _COST = _FIELD_INDEX["duration_minutes"], _FIELD_INDEX["cost"]
+_ANOMALY, _REWORK = _FIELD_INDEX["anomaly"], _FIELD_INDEX["rework"]
+
+
+def build_binary_encoder(resource_pool: ResourcePool) -> CategoryEncoder:
+    """Словари для бинарного формата: как в CSV плюс user_id"""
+    vocabularies = build_vocabularies(resource_pool)
+    vocabularies["user_id"] = [f"user_{i}" for i in range(1, USER_ID_COUNT + 1)]
+    # Коды — uint16, а 0xFFFF занят под NULL_CODE
+    return CategoryEncoder(vocabularies, max_codes=NULL_CODE)
+
+
+def _to_epoch(value) -> int:
+    return to_epoch(value) if isinstance(value, datetime) else int(value)
+
+
+def build_header() -> bytes:
+    """Заголовок: magic + uint32 длина JSON + JSON с описанием dtype"""
+    meta = {
+        "version": BINARY_VERSION,
+        "byteorder": "little",
+        "record_size": RECORD_SIZE,
+        "dtype": BINARY_DTYPE,
+        "timestamps": "epoch seconds",
+        "null_code": NULL_CODE,
+        "flags": {"anomaly": FLAG_ANOMALY, "rework": FLAG_REWORK},
+    }
+    payload = json.dumps(meta).encode("utf-8")
+    size = len(BINARY_MAGIC) + 4 + len(payload)
+    padding = (-size) % _HEADER_ALIGN
+    return BINARY_MAGIC + struct.pack("<I", len(payload) + padding) + payload + b" " * padding
+
+
+def read_binary_header(filepath: str) -> Dict:
+    """Читает заголовок; в "offset" — смещение первой записи"""
+    with open(filepath, "rb") as f:
+        magic = f.read(len(BINARY_MAGIC))
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"Not a process log binary file: {filepath}")
+        (length,) = struct.unpack("<I", f.read(4))
+        meta = json.loads(f.read(length).decode("utf-8"))
+    meta["offset"] = len(BINARY_MAGIC) + 4 + length
+    return meta
+
+
+def load_binary(filepath: str, mode: str = "r"):
+    """Открывает файл как numpy.memmap структурированных записей (без копирования)"""
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("numpy is required for load_binary: pip install numpy") from e
+
+    meta = read_binary_header(filepath)
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+    return np.memmap(filepath, dtype=dtype, mode=mode, offset=meta["offset"])
+
+
+def iter_binary_records(filepath: str) -> Iterator[Dict]:
+    """Читает записи без numpy (для отладки и тестов)"""
+    meta = read_binary_header(filepath)
+    names = [field for field, _ in meta["dtype"]]
+    with open(filepath, "rb") as f:
+        f.seek(meta["offset"])
+        while True:
+            chunk = f.read(RECORD_SIZE)
+            if len(chunk) < RECORD_SIZE:
+                return
+            yield dict(zip(names, _RECORD.unpack(chunk)))
+
+
+class BinaryWriter:
+    """Запись событий в бинарный формат фиксированной ширины (little-endian)"""
+
+    def __init__(self, logger, encoder: CategoryEncoder):
+        self.logger = logger
+        self.encoder = encoder
+
+    def write_events_to_binary(self, events: List, filepath: str, mode: str = "w"):
+        """Записывает события; заголовок пишется при mode="w" или в новый файл"""
+        is_append = mode == "a" and os.path.exists(filepath)
+
+        self.logger.info("Запись %d событий в binary (mode: %s)...", len(events), mode)
+
+        pack = _RECORD.pack
+        encode = self.encoder.encode
+        chunks = []
+        for event in events:
+            values = self._event_values(event)
+            codes = [encode(field, values[i]) for field, i in
+                     zip(BINARY_CODE_FIELDS, _CODE_INDEXES)]
+            flags = (
+                (FLAG_ANOMALY if values[_ANOMALY] else 0)
+                | (FLAG_REWORK if values[_REWORK] else 0)
+            )
+            chunks.append(pack(
+                values[0],
+                _to_epoch(values[_START]),
+                _to_epoch(values[_END]),
+                float(values[_COST] or 0.0),
+                int(values[_DURATION] or 0),
+                *[NULL_CODE if code == "" else code for code in codes],
+                flags,
+            ))
+
+        with open(filepath, mode + "b") as f:
+            if not is_append:
+                f.write(build_header())
+            f.write(b"".join(chunks))
+
+    def _event_values(self, event) -> tuple:
+        """Сырые значения в порядке CSV_FIELD_NAMES"""
+        if isinstance(event, Event):
+            return event.to_epoch_values()
+        return tuple(event.get(field) for field in CSV_FIELD_NAMES)
@@ -1,5 +1,10 @@
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from epoch_time import (
+    SECONDS_PER_DAY, SECONDS_PER_HOUR, day_start, from_epoch, hour_of_day,
+    to_epoch, weekday,
+)
 
 # Рабочие часы по типу процесса (start_hour, end_hour)
 BUSINESS_HOURS = {
@@ -24,30 +29,39 @@ def adjust_to_business_hours(
     """Сдвигает время в рабочие часы, если активность не автоматическая.
 
     Автоматические активности (Payment Processing, Ticket Created и т.д.)
-    могут происходить в любое время.
+    могут происходить в любое время. Адаптер над epoch-версией.
     """
+    return from_epoch(
+        adjust_to_business_hours_epoch(to_epoch(dt), process_name, activity)
+    )
+
+
+def adjust_to_business_hours_epoch(
+    ts: int, process_name: str, activity: str = ""
+) -> int:
+    """adjust_to_business_hours для времени в epoch-секундах"""
     if activity in AUTOMATED_ACTIVITIES:
-        return dt
+        return ts
 
     start_hour, end_hour = BUSINESS_HOURS.get(process_name, (9, 18))
+    day_open = start_hour * SECONDS_PER_HOUR
 
     # Если выходной — сдвигаем на ближайший рабочий день
-    while dt.weekday() >= 5:
-        dt += timedelta(days=1)
-        dt = dt.replace(hour=start_hour, minute=random.randint(0, 30), second=0)
+    while weekday(ts) >= 5:
+        ts = day_start(ts) + SECONDS_PER_DAY + day_open + random.randint(0, 30) * 60
 
     # Если раньше начала рабочего дня
-    if dt.hour < start_hour:
-        dt = dt.replace(hour=start_hour, minute=random.randint(0, 59), second=0)
+    if hour_of_day(ts) < start_hour:
+        ts = day_start(ts) + day_open + random.randint(0, 59) * 60
 
     # Если позже конца рабочего дня — переносим на следующий рабочий день
-    if dt.hour >= end_hour:
-        dt += timedelta(days=1)
-        while dt.weekday() >= 5:
-            dt += timedelta(days=1)
-        dt = dt.replace(hour=start_hour, minute=random.randint(0, 59), second=0)
+    if hour_of_day(ts) >= end_hour:
+        ts += SECONDS_PER_DAY
+        while weekday(ts) >= 5:
+            ts += SECONDS_PER_DAY
+        ts = day_start(ts) + day_open + random.randint(0, 59) * 60
 
-    return dt
+    return ts
 
 
 def add_working_minutes(
@@ -56,51 +70,56 @@ def add_working_minutes(
     """Добавляет рабочие минуты, пропуская нерабочее время.
 
     Для автоматических активностей добавляет календарные минуты.
-    Для ручных — считает только рабочие часы.
+    Для ручных — считает только рабочие часы. Адаптер над epoch-версией.
     """
+    return from_epoch(
+        add_working_minutes_epoch(to_epoch(dt), minutes, process_name, activity)
+    )
+
+
+def add_working_minutes_epoch(
+    ts: int, minutes: int, process_name: str, activity: str = ""
+) -> int:
+    """add_working_minutes для времени в epoch-секундах"""
     if activity in AUTOMATED_ACTIVITIES:
-        return dt + timedelta(minutes=minutes)
+        return ts + minutes * 60
 
     start_hour, end_hour = BUSINESS_HOURS.get(process_name, (9, 18))
-    working_day_minutes = (end_hour - start_hour) * 60
+    day_open = start_hour * SECONDS_PER_HOUR
+    day_close = end_hour * SECONDS_PER_HOUR
 
-    # Если кусок меньше оставшегося рабочего дня, просто добавляем
     remaining = minutes
-    current = dt
+    current = ts
 
     safety = 0  # защита от бесконечного цикла
     while remaining > 0 and safety < 400:
         safety += 1
+        midnight = day_start(current)
 
         # Пропускаем выходные
-        if current.weekday() >= 5:
-            current += timedelta(days=1)
-            current = current.replace(hour=start_hour, minute=0, second=0)
+        if weekday(current) >= 5:
+            current = midnight + SECONDS_PER_DAY + day_open
             continue
 
         # Пропускаем нерабочие часы
-        if current.hour < start_hour:
-            current = current.replace(hour=start_hour, minute=0, second=0)
-        if current.hour >= end_hour:
-            current += timedelta(days=1)
-            current = current.replace(hour=start_hour, minute=0, second=0)
+        if current - midnight < day_open:
+            current = midnight + day_open
+        if current - midnight >= day_close:
+            current = midnight + SECONDS_PER_DAY + day_open
             continue
 
         # Сколько минут осталось до конца рабочего дня
-        day_end = current.replace(hour=end_hour, minute=0, second=0)
-        available = int((day_end - current).total_seconds() / 60)
+        available = (midnight + day_close - current) // 60
 
         if available <= 0:
-            current += timedelta(days=1)
-            current = current.replace(hour=start_hour, minute=0, second=0)
+            current = midnight + SECONDS_PER_DAY + day_open
             continue
 
         if remaining <= available:
-            current += timedelta(minutes=remaining)
+            current += remaining * 60
             remaining = 0
         else:
             remaining -= available
-            current += timedelta(days=1)
-            current = current.replace(hour=start_hour, minute=0, second=0)
+            current = midnight + SECONDS_PER_DAY + day_open
 
     return current
@@ -1,6 +1,6 @@
 import random
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Optional, Union
 from config import PROCESS_MODELS, SCENARIO_WEIGHTS
 from utils import (
     get_activity_duration,
@@ -14,75 +14,23 @@ from utils import (
 )
 from constants import (
     DEPARTMENTS, PROCESS_COST_RANGES, PROCESS_DEPARTMENTS,
-    PROCESS_COMMENTS,
+    PROCESS_COMMENTS, ROLE_MAPPING, FALLBACK_ROLES,
 )
 from resource_pool import ResourcePool
-from business_calendar import adjust_to_business_hours, add_working_minutes
-
-# Маппинг ролей — на уровне модуля, чтобы не пересоздавать при каждом вызове
-ROLE_MAPPING = {
-    "OrderFulfillment": {
-        "Order Created": "Clerk",
-        "Payment Processing": "System",
-        "Payment Received": "System",
-        "Payment Failed": "System",
-        "Payment Retry": "System",
-        "Pick Items": "Clerk",
-        "Pack Items": "Clerk",
-        "Quality Check": "Specialist",
-        "Ship Order": "Coordinator",
-        "Order Completed": "System",
-        "Cancelled": "Manager",
-    },
-    "CustomerSupport": {
-        "Ticket Created": "System",
-        "Initial Response": "Support Agent",
-        "Issue Investigation": "Support Agent",
-        "Solution Provided": "Support Agent",
-        "Ticket Closed": "System",
-        "Escalated": "Manager",
-        "Expert Review": "Specialist",
-        "Customer Feedback": "Support Agent",
-        "Additional Support": "Support Agent",
-    },
-    "LoanApplication": {
-        "Application Submitted": "Clerk",
-        "Document Review": "Analyst",
-        "Credit Check": "System",
-        "Loan Approval": "Manager",
-        "Funds Disbursed": "System",
-        "Additional Info Requested": "Analyst",
-        "Loan Rejected": "Manager",
-    },
-    "InvoiceProcessing": {
-        "Invoice Received": "Clerk",
-        "Data Entry": "Clerk",
-        "Invoice Approval": "Manager",
-        "Payment Processed": "System",
-        "Archived": "System",
-        "Validation Failed": "Analyst",
-        "Correction": "Clerk",
-        "Invoice Rejected": "Manager",
-    },
-    "HRRecruitment": {
-        "Position Opened": "HR Manager",
-        "Application Review": "HR Manager",
-        "Interview": "HR Manager",
-        "Offer Extended": "Manager",
-        "Hired": "System",
-        "Additional Interview": "HR Manager",
-        "Candidate Rejected": "HR Manager",
-    },
-}
-
-_FALLBACK_ROLES = ["Clerk", "Manager", "System", "Analyst", "Specialist"]
+from vocabulary import VocabularyRegistry, USER_ID_COUNT
+from event_record import CaseAttributes, Event
+from business_calendar import adjust_to_business_hours_epoch, add_working_minutes_epoch
+from epoch_time import to_epoch
 
 
 class CaseGenerator:
-    def __init__(self, start_case_id: int = 1, logger=None, resource_pool=None):
+    def __init__(self, start_case_id: int = 1, logger=None, resource_pool=None,
+                 vocabulary=None):
         self.current_case_id = start_case_id - 1
         self.logger = logger
         self.resource_pool = resource_pool or ResourcePool()
+        # Интернированные метки активностей и user_id — без сборки строк на событие
+        self.vocabulary = vocabulary or VocabularyRegistry(self.resource_pool)
 
     def _log(self, message: str, *args):
         """Логирование информации"""
@@ -95,10 +43,28 @@ class CaseGenerator:
         start_time: Optional[datetime] = None,
         anomaly_rate: float = 0.03,
         rework_rate: float = 0.08,
-    ) -> List[Dict]:
+    ) -> List[Event]:
         """
         Генерирует один кейс с событиями для указанного процесса
         """
+        return list(
+            self.iter_case(process_name, start_time, anomaly_rate, rework_rate)
+        )
+
+    def iter_case(
+        self,
+        process_name: str,
+        start_time: Optional[Union[datetime, int]] = None,
+        anomaly_rate: float = 0.03,
+        rework_rate: float = 0.08,
+    ) -> Iterator[Event]:
+        """
+        Лениво генерирует события кейса по одному.
+
+        Следующее событие вычисляется только при запросе — это позволяет
+        продвигать много открытых кейсов параллельно (simulation.py).
+        start_time — datetime или epoch-секунды.
+        """
         if process_name not in PROCESS_MODELS:
             if self.logger:
                 self.logger.error("Unknown process: %s", process_name)
@@ -112,17 +78,20 @@ class CaseGenerator:
         self.current_case_id += 1
         case_id = self.current_case_id
 
-        events = []
-        current_time = start_time or (
-            datetime.now() - timedelta(days=random.randint(0, 730))
-        )
+        # Внутри кейса время — int epoch-секунд; datetime только на выходе
+        if isinstance(start_time, int):
+            current_time = start_time
+        else:
+            current_time = to_epoch(start_time or (
+                datetime.now() - timedelta(days=random.randint(0, 730))
+            ))
 
         has_anomaly = should_add_anomaly(anomaly_rate)
         has_rework = should_add_rework(rework_rate)
         anomaly_added = False
         rework_added = False
 
-        # Case-level attributes: одинаковые для всех событий кейса
+        # Case-level attributes: один объект на кейс, общий для всех событий
         case_attrs = self._generate_case_attributes(
             process_name, has_anomaly, has_rework
         )
@@ -130,10 +99,10 @@ class CaseGenerator:
         for i, activity in enumerate(scenario):
             if i > 0:
                 waiting_time = get_waiting_time(process_name, current_time)
-                current_time += timedelta(minutes=waiting_time)
+                current_time += waiting_time * 60
 
             # Сдвигаем в рабочие часы (автоматические активности не сдвигаются)
-            current_time = adjust_to_business_hours(
+            current_time = adjust_to_business_hours_epoch(
                 current_time, process_name, activity
             )
 
@@ -143,25 +112,25 @@ class CaseGenerator:
             base_duration = get_activity_duration(activity, process_name, current_time)
             duration = max(1, int(base_duration * employee["efficiency"]))
 
-            end_time = add_working_minutes(
+            end_time = add_working_minutes_epoch(
                 current_time, duration, process_name, activity
             )
-            normal_event = {
-                "case_id": case_id,
-                "timestamp_start": current_time,
-                "timestamp_end": end_time,
-                "process": process_name,
-                "activity": activity,
-                "duration_minutes": duration,
-                "role": role,
-                "resource": employee["resource_name"],
-                "resource_id": employee["resource_id"],
-                "anomaly": False,
-                "anomaly_type": None,
-                "rework": False,
-                **case_attrs,
-            }
-            events.append(normal_event)
+            normal_event = Event(
+                case_id=case_id,
+                timestamp_start=current_time,
+                timestamp_end=end_time,
+                process=process_name,
+                activity=activity,
+                duration_minutes=duration,
+                role=role,
+                resource=employee["resource_name"],
+                resource_id=employee["resource_id"],
+                anomaly=False,
+                anomaly_type=None,
+                rework=False,
+                case=case_attrs,
+            )
+            yield normal_event
             current_time = end_time
 
             # Аномалия
@@ -170,25 +139,25 @@ class CaseGenerator:
                 if anomaly_type:
                     anomaly_duration = get_anomaly_duration(anomaly_type)
                     anomaly_employee = self.resource_pool.get_employee("Specialist")
-                    anomaly_end = add_working_minutes(
+                    anomaly_end = add_working_minutes_epoch(
                         current_time, anomaly_duration, process_name, activity
                     )
-                    anomaly_event = {
-                        "case_id": case_id,
-                        "timestamp_start": current_time,
-                        "timestamp_end": anomaly_end,
-                        "process": process_name,
-                        "activity": f"{activity} - {anomaly_type}",
-                        "duration_minutes": anomaly_duration,
-                        "role": "Specialist",
-                        "resource": anomaly_employee["resource_name"],
-                        "resource_id": anomaly_employee["resource_id"],
-                        "anomaly": True,
-                        "anomaly_type": anomaly_type,
-                        "rework": False,
-                        **case_attrs,
-                    }
-                    events.append(anomaly_event)
+                    anomaly_event = Event(
+                        case_id=case_id,
+                        timestamp_start=current_time,
+                        timestamp_end=anomaly_end,
+                        process=process_name,
+                        activity=self.vocabulary.activity_label(activity, anomaly_type),
+                        duration_minutes=anomaly_duration,
+                        role="Specialist",
+                        resource=anomaly_employee["resource_name"],
+                        resource_id=anomaly_employee["resource_id"],
+                        anomaly=True,
+                        anomaly_type=anomaly_type,
+                        rework=False,
+                        case=case_attrs,
+                    )
+                    yield anomaly_event
                     current_time = anomaly_end
                     anomaly_added = True
 
@@ -199,33 +168,31 @@ class CaseGenerator:
                     rework_duration = get_rework_duration()
                     rework_role = role
                     rework_employee = self.resource_pool.get_employee(rework_role)
-                    rework_end = add_working_minutes(
+                    rework_end = add_working_minutes_epoch(
                         current_time, rework_duration, process_name, activity
                     )
-                    rework_event = {
-                        "case_id": case_id,
-                        "timestamp_start": current_time,
-                        "timestamp_end": rework_end,
-                        "process": process_name,
-                        "activity": f"{activity} - {rework_type}",
-                        "duration_minutes": rework_duration,
-                        "role": rework_role,
-                        "resource": rework_employee["resource_name"],
-                        "resource_id": rework_employee["resource_id"],
-                        "anomaly": False,
-                        "anomaly_type": None,
-                        "rework": True,
-                        **case_attrs,
-                    }
-                    events.append(rework_event)
+                    rework_event = Event(
+                        case_id=case_id,
+                        timestamp_start=current_time,
+                        timestamp_end=rework_end,
+                        process=process_name,
+                        activity=self.vocabulary.activity_label(activity, rework_type),
+                        duration_minutes=rework_duration,
+                        role=rework_role,
+                        resource=rework_employee["resource_name"],
+                        resource_id=rework_employee["resource_id"],
+                        anomaly=False,
+                        anomaly_type=None,
+                        rework=True,
+                        case=case_attrs,
+                    )
+                    yield rework_event
                     current_time = rework_end
                     rework_added = True
 
-        return events
-
     def _generate_case_attributes(
         self, process_name: str, has_anomaly: bool, has_rework: bool
-    ) -> Dict:
+    ) -> CaseAttributes:
         """Генерирует атрибуты уровня кейса (одинаковые для всех событий)"""
         # Стоимость зависит от процесса
         cost_min, cost_max = PROCESS_COST_RANGES.get(process_name, (10, 5000))
@@ -242,13 +209,13 @@ class CaseGenerator:
         comments = PROCESS_COMMENTS.get(process_name, [""])
         comment = random.choice(comments)
 
-        return {
-            "user_id": f"user_{random.randint(1, 5000)}",
-            "department": department,
-            "priority": priority,
-            "cost": cost,
-            "comment": comment,
-        }
+        return CaseAttributes(
+            user_id=self.vocabulary.user_id(random.randint(1, USER_ID_COUNT)),
+            department=department,
+            priority=priority,
+            cost=cost,
+            comment=comment,
+        )
 
     def _get_priority_for_case(
         self, has_anomaly: bool, has_rework: bool
@@ -272,7 +239,7 @@ class CaseGenerator:
     def _get_role_for_activity(self, activity: str, process_name: str) -> str:
         """Возвращает роль для активности в рамках процесса"""
         return ROLE_MAPPING.get(process_name, {}).get(
-            activity, random.choice(_FALLBACK_ROLES)
+            activity, random.choice(FALLBACK_ROLES)
         )
 
     def generate_multiple_cases(
@@ -282,7 +249,7 @@ class CaseGenerator:
         start_time: Optional[datetime] = None,
         anomaly_rate: float = 0.03,
         rework_rate: float = 0.08,
-    ) -> List[Dict]:
+    ) -> List[Event]:
         """
         Генерирует multiple кейсов для указанного процесса
 
@@ -297,16 +264,16 @@ class CaseGenerator:
             Список всех событий всех кейсов
         """
         all_events = []
-        base_time = start_time or (
+        base_time = to_epoch(start_time or (
             datetime.now() - timedelta(days=random.randint(0, 730))
-        )
+        ))
 
         for i in range(num_cases):
             # Добавляем случайное смещение времени для разнообразия временных меток
-            time_offset = timedelta(
-                hours=random.randint(0, 24 * 7),  # До 7 дней
-                minutes=random.randint(0, 60),
-                seconds=random.randint(0, 60),
+            time_offset = (
+                random.randint(0, 24 * 7) * 3600  # До 7 дней
+                + random.randint(0, 60) * 60
+                + random.randint(0, 60)
             )
             case_start = base_time + time_offset
 
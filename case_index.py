@@ -0,0 +1,201 @@
+import csv
+import io
+import mmap
+import os
+import struct
+from typing import List, Optional, Tuple
+
+from dataset_cache import unlink_for_rewrite
+
+CASE_INDEX_MAGIC = b"PMGIDX01"
+CASE_INDEX_SUFFIX = ".idx"
+# Запись индекса: case_id, смещение первой строки кейса в CSV, число событий
+_ENTRY = struct.Struct("<QQI")
+ENTRY_SIZE = _ENTRY.size
+
+
+def case_index_path(csv_path: str) -> str:
+    """Sidecar лежит рядом с CSV: process_log_1_0GB.csv.idx"""
+    return csv_path + CASE_INDEX_SUFFIX
+
+
+class CaseIndexBuilder:
+    """Строит индекс case_id -> (смещение, число событий) во время записи CSV.
+
+    Writer передает строки батча вместе с событиями; смещения считаются
+    по длинам строк, без повторного чтения файла. События кейса идут
+    подряд и case_id возрастают (батчевый движок), поэтому записи
+    сразу дописываются в sidecar уже отсортированными — в памяти
+    держится только последний, возможно незавершенный кейс.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.cases = 0
+        self._file = None
+        self._case_id = None
+        self._case_offset = 0
+        self._case_events = 0
+
+    def start(self, offset: int):
+        """Новый файл: первая строка данных начинается с offset (после заголовка)"""
+        self.close()
+        unlink_for_rewrite(self.path)
+        self._file = open(self.path, "wb")
+        self._file.write(CASE_INDEX_MAGIC)
+        self.offset = offset
+        self.cases = 0
+
+    def add_rows(self, events: List, rows: List[bytes]):
+        """Учитывает записанные строки; rows[i] — CSV-байты events[i]"""
+        pack = _ENTRY.pack
+        entries = []
+        offset = self.offset
+        case_id = self._case_id
+        for event, row in zip(events, rows):
+            if event.case_id != case_id:
+                if case_id is not None:
+                    if event.case_id < case_id:
+                        raise ValueError(
+                            "Case index requires cases written in ascending case_id order"
+                        )
+                    entries.append(pack(case_id, self._case_offset, self._case_events))
+                case_id = event.case_id
+                self._case_offset = offset
+                self._case_events = 0
+            self._case_events += 1
+            offset += len(row)
+        self._case_id = case_id
+        self.offset = offset
+        self.cases += len(entries)
+        self._file.write(b"".join(entries))
+
+    def close(self):
+        """Дописывает последний кейс и закрывает sidecar"""
+        if self._file is None:
+            return
+        if self._case_id is not None:
+            self._file.write(_ENTRY.pack(self._case_id, self._case_offset, self._case_events))
+            self.cases += 1
+        self._file.close()
+        self._file = None
+        self._case_id = None
+
+
+class CaseIndex:
+    """Чтение CSV по индексу: поиск кейса или диапазона кейсов за O(log n).
+
+    Sidecar отображается в память (mmap), бинарный поиск читает только
+    O(log n) записей; данные кейса читаются одним seek + read.
+    """
+
+    def __init__(self, csv_path: str, index_path: Optional[str] = None):
+        self.csv_path = csv_path
+        self.index_path = index_path or case_index_path(csv_path)
+        self.data_size = os.path.getsize(csv_path)
+        with open(self.index_path, "rb") as f:
+            if f.read(len(CASE_INDEX_MAGIC)) != CASE_INDEX_MAGIC:
+                raise ValueError(f"Not a case index file: {self.index_path}")
+            size = os.fstat(f.fileno()).st_size
+            self._count = (size - len(CASE_INDEX_MAGIC)) // ENTRY_SIZE
+            self._map = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._count else b""
+            )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+    def entry(self, i: int) -> Tuple[int, int, int]:
+        """(case_id, смещение, число событий) i-й записи"""
+        return _ENTRY.unpack_from(self._map, len(CASE_INDEX_MAGIC) + i * ENTRY_SIZE)
+
+    def _end_offset(self, i: int) -> int:
+        """Конец данных i-го кейса — начало следующего или конец файла"""
+        return self.entry(i + 1)[1] if i + 1 < self._count else self.data_size
+
+    def _lower_bound(self, case_id: int) -> int:
+        """Первая запись с case_id >= заданного"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entry(mid)[0] < case_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, case_id: int) -> Optional[Tuple[int, int]]:
+        """(смещение, число событий) кейса или None"""
+        i = self._lower_bound(case_id)
+        if i < self._count:
+            found_id, offset, events = self.entry(i)
+            if found_id == case_id:
+                return offset, events
+        return None
+
+    def range(self, first: int, last: int) -> Tuple[int, int, int]:
+        """Байтовый диапазон [start, end) и число событий кейсов first..last включительно"""
+        lo = self._lower_bound(first)
+        hi = self._lower_bound(last + 1)
+        if lo >= hi:
+            return 0, 0, 0
+        start = self.entry(lo)[1]
+        end = self._end_offset(hi - 1)
+        events = sum(self.entry(i)[2] for i in range(lo, hi))
+        return start, end, events
+
+    def read_bytes(self, start: int, end: int) -> bytes:
+        with open(self.csv_path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def read_case(self, case_id: int) -> List[List[str]]:
+        """Строки CSV одного кейса (пустой список, если кейса нет)"""
+        return self.read_range(case_id, case_id)
+
+    def read_range(self, first: int, last: int) -> List[List[str]]:
+        """Строки CSV кейсов first..last включительно"""
+        start, end, _ = self.range(first, last)
+        if start == end:
+            return []
+        text = self.read_bytes(start, end).decode("utf-8")
+        return list(csv.reader(io.StringIO(text, newline="")))
+
+    def split(self, parts: int) -> List[Tuple[int, int]]:
+        """Делит файл на parts байтовых диапазонов по границам кейсов.
+
+        Каждый диапазон можно читать независимо (параллельная обработка);
+        первый начинается с данных, без заголовка.
+        """
+        if not self._count:
+            return []
+        first_offset = self.entry(0)[1]
+        step = (self.data_size - first_offset) / max(1, parts)
+        bounds = [first_offset]
+        for k in range(1, parts):
+            target = first_offset + int(step * k)
+            # Первый кейс, начинающийся не раньше target
+            lo, hi = 0, self._count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.entry(mid)[1] < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            offset = self.entry(lo)[1] if lo < self._count else self.data_size
+            if offset > bounds[-1]:
+                bounds.append(offset)
+        bounds.append(self.data_size)
+        return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)
+                if bounds[i] < bounds[i + 1]]
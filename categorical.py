@@ -0,0 +1,175 @@
+import argparse
+import csv
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from config import PROCESS_MODELS
+from constants import (
+    ANOMALY_ACTIVITIES,
+    CSV_FIELD_NAMES,
+    DEPARTMENTS,
+    FALLBACK_ROLES,
+    PRIORITIES,
+    PROCESS_COMMENTS,
+    REWORK_ACTIVITIES,
+    ROLE_MAPPING,
+)
+from resource_pool import ResourcePool
+
+# Колонки с закрытыми словарями, которые кодируются целыми числами
+CATEGORICAL_FIELDS = [
+    "process", "activity", "role", "resource", "resource_id",
+    "department", "priority", "anomaly_type", "comment",
+]
+
+CATEGORIES_FILENAME = "categories.json"
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    """Уникальные значения с сохранением порядка"""
+    return list(dict.fromkeys(values))
+
+
+def build_vocabularies(resource_pool: ResourcePool) -> Dict[str, List[str]]:
+    """Перечисляет все возможные значения категориальных колонок"""
+    activities = [a for scenarios in PROCESS_MODELS.values() for s in scenarios for a in s]
+    anomaly_activities = [
+        f"{activity} - {anomaly}"
+        for anomaly, acts in ANOMALY_ACTIVITIES.items()
+        for activity in acts
+    ]
+    rework_activities = [
+        f"{activity} - {rework}"
+        for rework, acts in REWORK_ACTIVITIES.items()
+        for activity in acts
+    ]
+    roles = [r for mapping in ROLE_MAPPING.values() for r in mapping.values()]
+
+    return {
+        "process": _unique(PROCESS_MODELS),
+        "activity": _unique(activities + anomaly_activities + rework_activities),
+        "role": _unique(roles + FALLBACK_ROLES + ["Specialist"]),
+        "resource": _unique(
+            ["System"] + [e["name"] for e in resource_pool.employees.values()] + ["Unknown"]
+        ),
+        "resource_id": _unique(["SYSTEM"] + list(resource_pool.employees) + ["UNKNOWN"]),
+        "department": _unique(DEPARTMENTS),
+        "priority": _unique(PRIORITIES),
+        "anomaly_type": _unique(ANOMALY_ACTIVITIES),
+        "comment": _unique(c for comments in PROCESS_COMMENTS.values() for c in comments),
+    }
+
+
+class CategoryEncoder:
+    """Кодирует категориальные колонки строки CSV в небольшие целые коды.
+
+    Пустые значения (None, "") пишутся пустым полем без кода.
+    Значения вне словаря (например, заданные вручную) добавляются в конец,
+    поэтому словари сохраняются после окончания генерации. max_codes
+    ограничивает размер словаря колонки (ширину кода в бинарном формате).
+    """
+
+    def __init__(self, vocabularies: Dict[str, List[str]],
+                 fieldnames: List[str] = CSV_FIELD_NAMES,
+                 max_codes: Optional[int] = None):
+        self.max_codes = max_codes
+        self.vocabularies = {field: list(values) for field, values in vocabularies.items()}
+        self._codes = {
+            field: {value: code for code, value in enumerate(values)}
+            for field, values in self.vocabularies.items()
+        }
+        self._positions = [
+            (i, field) for i, field in enumerate(fieldnames) if field in self._codes
+        ]
+
+    @classmethod
+    def from_resource_pool(cls, resource_pool: ResourcePool,
+                           fieldnames: List[str] = CSV_FIELD_NAMES) -> "CategoryEncoder":
+        return cls(build_vocabularies(resource_pool), fieldnames)
+
+    def encode(self, field: str, value):
+        if value is None or value == "":
+            return ""
+        codes = self._codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            if self.max_codes is not None and code >= self.max_codes:
+                raise ValueError(
+                    f"Словарь колонки {field} переполнен: больше {self.max_codes} значений"
+                )
+            codes[value] = code
+            self.vocabularies[field].append(value)
+        return code
+
+    def encode_row(self, row: tuple) -> tuple:
+        """Заменяет категориальные значения строки на коды"""
+        encoded = list(row)
+        for i, field in self._positions:
+            encoded[i] = self.encode(field, encoded[i])
+        return tuple(encoded)
+
+    def save(self, filepath: str):
+        """Сохраняет словари (code -> value) в JSON"""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.vocabularies, f, ensure_ascii=False, indent=2)
+
+
+def load_vocabularies(filepath: str) -> Dict[str, List[str]]:
+    with open(filepath, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def decode_csv(encoded_filepath: str, categories_filepath: str,
+               output_filepath: str, vocabularies: Optional[Dict] = None) -> int:
+    """Восстанавливает исходный CSV из закодированного и словарей.
+
+    Returns:
+        Количество декодированных строк
+    """
+    vocabularies = vocabularies or load_vocabularies(categories_filepath)
+    rows = 0
+
+    with open(encoded_filepath, newline="", encoding="utf-8") as src, \
+            open(output_filepath, "w", newline="", encoding="utf-8") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst, lineterminator="\n")
+
+        header = next(reader)
+        writer.writerow(header)
+        positions = [
+            (i, vocabularies[field]) for i, field in enumerate(header)
+            if field in vocabularies
+        ]
+
+        for row in reader:
+            for i, values in positions:
+                if row[i] != "":
+                    row[i] = values[int(row[i])]
+            writer.writerow(row)
+            rows += 1
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Декодирование CSV с категориальными кодами"
+    )
+    parser.add_argument("input", help="Закодированный CSV")
+    parser.add_argument("output", help="Путь для декодированного CSV")
+    parser.add_argument(
+        "--categories",
+        default=None,
+        help="Файл словарей (по умолчанию categories.json рядом с input)",
+    )
+    args = parser.parse_args()
+    categories = args.categories or os.path.join(
+        os.path.dirname(args.input), CATEGORIES_FILENAME
+    )
+    decode_csv(args.input, categories, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+# Размер независимо сжимаемого блока (один gzip member)
+GZIP_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class ParallelGzipCompressor:
+    """Сжимает данные независимыми блоками в пуле потоков.
+
+    Каждый блок — отдельный gzip member; их конкатенация — валидный
+    multi-member gzip, который читают gzip/zcat/pandas. zlib отпускает GIL,
+    поэтому потоки сжимают блоки параллельно. Пул живет между батчами и
+    останавливается в close() — и на прерванном прогоне (выход из with).
+    """
+
+    def __init__(self, workers: Optional[int] = None, level: int = 6,
+                 block_size: int = GZIP_BLOCK_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.level = level
+        self.block_size = block_size
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        # Несжатые байты по каждому файлу — для таргетинга по исходному размеру
+        self.raw_bytes: Dict[str, int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, filepath: str, data: bytes, mode: str = "a"):
+        """Сжимает data и дописывает в файл (mode="w" — перезаписывает)"""
+        if mode == "w":
+            self.raw_bytes[filepath] = 0
+
+        blocks = [
+            data[start:start + self.block_size]
+            for start in range(0, len(data), self.block_size)
+        ]
+        # map сохраняет порядок блоков
+        compressed = self._pool.map(self._compress_block, blocks)
+
+        try:
+            with open(filepath, mode + "b") as f:
+                for member in compressed:
+                    f.write(member)
+        finally:
+            # При ошибке записи еще не начатые блоки отменяются
+            compressed.close()
+
+        self.raw_bytes[filepath] = self.raw_bytes.get(filepath, 0) + len(data)
+
+    def _compress_block(self, block: bytes) -> bytes:
+        return gzip.compress(block, compresslevel=self.level, mtime=0)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
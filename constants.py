@@ -1,3 +1,6 @@
+# Версия генератора (синхронно с pyproject.toml) — часть ключа кэша датасетов
+GENERATOR_VERSION = "1.0.0"
+
 # Константы для CSVWriter
 DEPARTMENTS = ["IT", "HR", "Finance", "Operations", "Sales", "Marketing", "Support"]
 PRIORITIES = ["low", "medium", "high", "critical", "urgent"]
@@ -17,6 +20,10 @@ EXTENDED_CSV_FIELDS = [
 # Полный список fieldnames
 CSV_FIELD_NAMES = BASE_CSV_FIELDS + EXTENDED_CSV_FIELDS
 
+# Нормализованный вывод: events.csv без case-level полей + cases.csv (одна строка на кейс)
+EVENT_CSV_FIELD_NAMES = BASE_CSV_FIELDS
+CASE_CSV_FIELD_NAMES = ["case_id"] + EXTENDED_CSV_FIELDS
+
 # Длительности активностей для реальных процессов (минуты: min, max)
 ACTIVITY_DURATIONS = {
     # OrderFulfillment
@@ -177,3 +184,60 @@ PROCESS_COMMENTS = {
     ],
 }
 
+# Маппинг ролей — на уровне модуля, чтобы не пересоздавать при каждом вызове
+ROLE_MAPPING = {
+    "OrderFulfillment": {
+        "Order Created": "Clerk",
+        "Payment Processing": "System",
+        "Payment Received": "System",
+        "Payment Failed": "System",
+        "Payment Retry": "System",
+        "Pick Items": "Clerk",
+        "Pack Items": "Clerk",
+        "Quality Check": "Specialist",
+        "Ship Order": "Coordinator",
+        "Order Completed": "System",
+        "Cancelled": "Manager",
+    },
+    "CustomerSupport": {
+        "Ticket Created": "System",
+        "Initial Response": "Support Agent",
+        "Issue Investigation": "Support Agent",
+        "Solution Provided": "Support Agent",
+        "Ticket Closed": "System",
+        "Escalated": "Manager",
+        "Expert Review": "Specialist",
+        "Customer Feedback": "Support Agent",
+        "Additional Support": "Support Agent",
+    },
+    "LoanApplication": {
+        "Application Submitted": "Clerk",
+        "Document Review": "Analyst",
+        "Credit Check": "System",
+        "Loan Approval": "Manager",
+        "Funds Disbursed": "System",
+        "Additional Info Requested": "Analyst",
+        "Loan Rejected": "Manager",
+    },
+    "InvoiceProcessing": {
+        "Invoice Received": "Clerk",
+        "Data Entry": "Clerk",
+        "Invoice Approval": "Manager",
+        "Payment Processed": "System",
+        "Archived": "System",
+        "Validation Failed": "Analyst",
+        "Correction": "Clerk",
+        "Invoice Rejected": "Manager",
+    },
+    "HRRecruitment": {
+        "Position Opened": "HR Manager",
+        "Application Review": "HR Manager",
+        "Interview": "HR Manager",
+        "Offer Extended": "Manager",
+        "Hired": "System",
+        "Additional Interview": "HR Manager",
+        "Candidate Rejected": "HR Manager",
+    },
+}
+
+FALLBACK_ROLES = ["Clerk", "Manager", "System", "Analyst", "Specialist"]
@@ -1,35 +1,287 @@
 import csv
-from typing import List, Dict
+import io
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterable, List, Dict
 from datetime import datetime
 import os
-from constants import CSV_FIELD_NAMES
+from constants import CSV_FIELD_NAMES, EVENT_CSV_FIELD_NAMES, CASE_CSV_FIELD_NAMES
+from event_record import Event
+from epoch_time import format_timestamp
+from output_file import OutputFile
+from vocabulary import csv_escape
+
+_CSV_HEADER = (",".join(CSV_FIELD_NAMES) + "\n").encode("utf-8")
+_BOOL_BYTES = {True: b"True", False: b"False", None: b""}
+_LOG_EVERY = 50000
+# Комбинаций process/activity/role/resource — единицы тысяч (5 процессов, 76 сотрудников)
+ROW_FRAGMENT_CACHE_SIZE = 8192
+# Открытых кейсов, чьи хвосты держатся в кэше (перемежение в --engine simulation)
+CASE_FRAGMENT_CACHE_SIZE = 65536
+# Запись lru_cache в памяти: узел списка, ключ-кортеж и готовые байты фрагмента
+FRAGMENT_CACHE_ENTRY_BYTES = 256
 
 
 class CSVWriter:
-    def __init__(self, logger):
+    def __init__(self, logger, encoder=None, compressor=None, vocabulary=None,
+                 buffer_size=None):
         self.logger = logger
+        # CategoryEncoder: если задан, категориальные колонки пишутся кодами
+        self.encoder = encoder
+        # ParallelGzipCompressor: если задан, батч сжимается перед записью
+        self.compressor = compressor
+        # VocabularyRegistry: готовые CSV-байты категориальных значений
+        self.vocabulary = vocabulary
+        # Наблюдатели байтового пути (CaseIndexBuilder, ZoneMapBuilder, ...):
+        # получают start(offset) на новый файл и add_rows(events, rows) на батч
+        self.row_observers = []
+        # Если задан (и нет сжатия), файлы держатся открытыми между батчами
+        # (OutputFile с таким буфером) вместо переоткрытия в режиме "a"
+        self.buffer_size = buffer_size
+        # Путь -> ожидаемый размер для posix_fallocate (--preallocate)
+        self.preallocate: Dict[str, int] = {}
+        self._files: Dict[str, OutputFile] = {}
+        # LRU готовых фрагментов строки: повторяющиеся комбинации колонок
+        # и хвост кейса экранируются и склеиваются один раз
+        self._row_fragments = lru_cache(maxsize=ROW_FRAGMENT_CACHE_SIZE)(
+            self._build_row_fragments
+        )
+        self._case_fragment = lru_cache(maxsize=CASE_FRAGMENT_CACHE_SIZE)(
+            self._build_case_fragment
+        )
+
+    @property
+    def keeps_files_open(self) -> bool:
+        return self.buffer_size is not None and self.compressor is None
+
+    def fixed_footprint(self) -> int:
+        """Память writer, не зависящая от батча: заполненные кэши фрагментов и буферы файлов.
+
+        Кэши наполняются за прогон, поэтому лимит памяти резервирует их сразу.
+        """
+        caches = (ROW_FRAGMENT_CACHE_SIZE + CASE_FRAGMENT_CACHE_SIZE) * FRAGMENT_CACHE_ENTRY_BYTES
+        buffers = self.buffer_size if self.keeps_files_open else 0
+        return caches + buffers
+
+    def _output_file(self, filepath: str, mode: str) -> OutputFile:
+        """Открытый файл прогона; mode "w" начинает файл заново"""
+        output = self._files.get(filepath)
+        if output is not None and mode == "w":
+            output.close()
+            output = None
+        if output is None or output.closed:
+            output = self._files[filepath] = OutputFile(
+                filepath,
+                self.buffer_size,
+                preallocate=self.preallocate.get(filepath, 0),
+                logger=self.logger,
+                mode=mode,
+            )
+        return output
+
+    def output_size(self, filepath: str) -> int:
+        """Записано байт в файл (у открытого — без резерва fallocate)"""
+        output = self._files.get(filepath)
+        if output is not None and not output.closed:
+            return output.size
+        return os.path.getsize(filepath) if os.path.exists(filepath) else 0
+
+    def close(self):
+        """Дописывает буферы и обрезает резерв открытых файлов"""
+        for output in self._files.values():
+            output.close()
+        self._files.clear()
+
+    @contextmanager
+    def _open_output(self, filepath: str, mode: str):
+        """Текстовый поток для батча: сам файл или буфер под сжатие/открытый файл"""
+        if self.compressor is None and not self.keeps_files_open:
+            with open(filepath, mode, newline="", encoding="utf-8") as f:
+                yield f
+            return
+
+        buffer = io.StringIO(newline="")
+        yield buffer
+        data = buffer.getvalue().encode("utf-8")
+        if self.compressor is not None:
+            self.compressor.write(filepath, data, mode)
+        else:
+            self._output_file(filepath, mode).write(data)
 
-    def write_events_to_csv(self, events: List[Dict], filepath: str, mode: str = "w"):
+    @contextmanager
+    def _open_binary_output(self, filepath: str, mode: str):
+        """Байтовый поток для батча: сам файл, открытый файл или буфер под сжатие"""
+        if self.keeps_files_open:
+            yield self._output_file(filepath, mode)
+            return
+        if self.compressor is None:
+            with open(filepath, mode + "b") as f:
+                yield f
+            return
+
+        buffer = io.BytesIO()
+        yield buffer
+        self.compressor.write(filepath, buffer.getvalue(), mode)
+
+    def write_events_to_csv(self, events: List, filepath: str, mode: str = "w"):
         """Записывает события в CSV"""
         is_append = mode == "a" and os.path.exists(filepath)
 
         self.logger.info("Запись %d событий в CSV (mode: %s)...", len(events), mode)
 
-        with open(filepath, mode, newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(
-                csvfile, fieldnames=CSV_FIELD_NAMES, lineterminator="\n"
-            )
+        if self.vocabulary is not None and self.encoder is None:
+            self._write_bytes(events, filepath, mode, is_append)
+            return
+
+        with self._open_output(filepath, mode) as csvfile:
+            writer = csv.writer(csvfile, lineterminator="\n")
 
             if not is_append:
-                writer.writeheader()
+                writer.writerow(CSV_FIELD_NAMES)
 
             for i, event in enumerate(events):
-                formatted_event = self._format_event(event)
-                writer.writerow(formatted_event)
+                writer.writerow(self._event_to_row(event))
 
                 if (i + 1) % 50000 == 0:
                     self.logger.info("Записано %d событий...", i + 1)
 
+    def _write_bytes(self, events: List, filepath: str, mode: str, is_append: bool):
+        """Строки собираются из готовых байтов словаря вместо csv.writer"""
+        observers = self.row_observers
+        with self._open_binary_output(filepath, mode) as f:
+            if not is_append:
+                f.write(_CSV_HEADER)
+                for observer in observers:
+                    observer.start(len(_CSV_HEADER))
+            for start in range(0, len(events), _LOG_EVERY):
+                chunk = events[start:start + _LOG_EVERY]
+                if observers:
+                    rows = list(map(self._event_to_bytes, chunk))
+                    for observer in observers:
+                        observer.add_rows(chunk, rows)
+                    f.write(b"".join(rows))
+                else:
+                    f.write(b"".join(map(self._event_to_bytes, chunk)))
+                if len(chunk) == _LOG_EVERY:
+                    self.logger.info("Записано %d событий...", start + _LOG_EVERY)
+
+    def write_serialized(self, chunks: Iterable, filepath: str, mode: str = "w"):
+        """Готовые байты строк (батч, собранный в другом процессе) без повторной сериализации"""
+        is_append = mode == "a" and os.path.exists(filepath)
+        with self._open_binary_output(filepath, mode) as f:
+            if not is_append:
+                f.write(_CSV_HEADER)
+            for chunk in chunks:
+                f.write(chunk)
+
+    def write_normalized_to_csv(
+        self, events: List, events_filepath: str, cases_filepath: str, mode: str = "w"
+    ):
+        """Записывает события в две таблицы: события без case-level полей и кейсы.
+
+        События одного кейса идут подряд, поэтому строка кейса пишется
+        при смене case_id.
+        """
+        is_append = (
+            mode == "a"
+            and os.path.exists(events_filepath)
+            and os.path.exists(cases_filepath)
+        )
+        n_event_fields = len(EVENT_CSV_FIELD_NAMES)
+
+        self.logger.info(
+            "Запись %d событий в CSV (normalized, mode: %s)...", len(events), mode
+        )
+
+        with self._open_output(events_filepath, mode) as events_file, \
+                self._open_output(cases_filepath, mode) as cases_file:
+            events_writer = csv.writer(events_file, lineterminator="\n")
+            cases_writer = csv.writer(cases_file, lineterminator="\n")
+
+            if not is_append:
+                events_writer.writerow(EVENT_CSV_FIELD_NAMES)
+                cases_writer.writerow(CASE_CSV_FIELD_NAMES)
+
+            last_case_id = None
+            for i, event in enumerate(events):
+                row = self._event_to_row(event)
+                events_writer.writerow(row[:n_event_fields])
+                if row[0] != last_case_id:
+                    cases_writer.writerow(row[:1] + row[n_event_fields:])
+                    last_case_id = row[0]
+
+                if (i + 1) % 50000 == 0:
+                    self.logger.info("Записано %d событий...", i + 1)
+
+    def _event_to_row(self, event) -> tuple:
+        """Преобразует событие в строку в порядке CSV_FIELD_NAMES"""
+        if isinstance(event, Event):
+            row = event.to_row()
+        else:
+            formatted_event = self._format_event(event)
+            row = tuple(formatted_event[field] for field in CSV_FIELD_NAMES)
+        if self.encoder is not None:
+            row = self.encoder.encode_row(row)
+        return row
+
+    def _event_to_bytes(self, event) -> bytes:
+        """Строка CSV в байтах, побайтово совпадает с csv.writer"""
+        if not isinstance(event, Event):
+            return (
+                ",".join(
+                    "" if value is None else csv_escape(str(value))
+                    for value in self._event_to_row(event)
+                )
+                + "\n"
+            ).encode("utf-8")
+
+        head, middle = self._row_fragments(
+            event.process, event.activity, event.role, event.resource,
+            event.resource_id, event.anomaly, event.anomaly_type, event.rework,
+        )
+        return b"".join((
+            b"%d," % event.case_id,
+            format_timestamp(event.start_ts).encode(),
+            b",",
+            format_timestamp(event.end_ts).encode(),
+            head,
+            b"%d" % event.duration_minutes,
+            middle,
+            self._case_fragment(*event.case.to_row()),
+        ))
+
+    def _build_row_fragments(self, process, activity, role, resource, resource_id,
+                             anomaly, anomaly_type, rework):
+        """(",process,activity,", ",role,...,rework,") — куски строки вокруг duration"""
+        encode = self.vocabulary.encode
+        head = b",".join((b"", encode("process", process), encode("activity", activity), b""))
+        middle = b",".join((
+            b"",
+            encode("role", role),
+            encode("resource", resource),
+            encode("resource_id", resource_id),
+            _BOOL_BYTES[anomaly],
+            encode("anomaly_type", anomaly_type),
+            _BOOL_BYTES[rework],
+            b"",
+        ))
+        return head, middle
+
+    def _build_case_fragment(self, user_id, department, priority, cost, comment) -> bytes:
+        """Хвост строки из атрибутов кейса, один раз на кейс.
+
+        Кэш держится по значениям, а не по объекту кейса: записанные кейсы
+        не удерживаются в памяти, а измененный атрибут дает новый хвост.
+        """
+        encode = self.vocabulary.encode
+        return b",".join((
+            encode("user_id", user_id),
+            encode("department", department),
+            encode("priority", priority),
+            repr(cost).encode(),
+            encode("comment", comment),
+        )) + b"\n"
+
     def _format_event(self, event: Dict) -> Dict:
         """Форматирует событие для записи в CSV"""
         formatted_event = event.copy()
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+from constants import GENERATOR_VERSION
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MANIFEST_FILENAME = "manifest.json"
+# Ключи конфига, не влияющие на содержимое датасета
+_NON_CONTENT_KEYS = {
+    "output_dir", "workers", "cache_dir", "cache_max_bytes",
+    "write_buffer_bytes", "preallocate", "region_write",
+}
+_HASH_CHUNK = 8 * 1024 * 1024
+# ioctl FICLONE (Linux): reflink-копия на btrfs/xfs
+_FICLONE = 0x40049409
+
+
+def cache_key(config: Dict) -> Optional[str]:
+    """sha256 от разрешенного конфига, seed и версии генератора.
+
+    Без seed результат недетерминирован — такой датасет не кэшируется;
+    вложенные пресеты пишутся в несколько каталогов и тоже не кэшируются.
+    С --max-memory размер батчей зависит от измеренного RSS, а с ним и
+    точка остановки по размеру: байты не определяются конфигом.
+    """
+    if (
+        config.get("seed") is None
+        or config.get("stream_output")
+        or config.get("nested_presets")
+        or config.get("max_memory_bytes")
+    ):
+        return None
+    content = {k: v for k, v in config.items() if k not in _NON_CONTENT_KEYS}
+    if content.get("processes") is not None:
+        # Число процессов не меняет байты, но параллельный режим — другие батчи
+        content["processes"] = "parallel"
+    payload = json.dumps(
+        {"config": content, "version": GENERATOR_VERSION},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def unlink_for_rewrite(path: str):
+    """Удаляет файл перед записью заново: новый inode вместо перезаписи,
+    ведь старый файл может быть жесткой ссылкой на запись кэша"""
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """Жесткая ссылка, иначе reflink, иначе копия; возвращает способ"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return "reflink"
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+class DatasetCache:
+    """Локальный кэш датасетов, адресуемый по содержимому конфига.
+
+    Запись — каталог <cache_dir>/<key>/ с файлами датасета и manifest.json
+    (размеры и sha256). При попадании файлы связываются в --output жесткими
+    ссылками (или reflink/копией), целостность проверяется по sha256: файл
+    в --output — тот же inode, правка на месте портит запись. Размер
+    сверяется первым и отсекает усеченные файлы без чтения.
+    Вытеснение — LRU по времени последнего использования под лимитом размера.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int], logger):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logger
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def restore(self, key: str, output_dir: str) -> Optional[List[str]]:
+        """Связывает файлы записи в output_dir; None — промах или запись повреждена"""
+        entry = os.path.join(self.cache_dir, key)
+        manifest = self._read_manifest(entry)
+        if manifest is None:
+            return None
+
+        for name, meta in manifest["files"].items():
+            if not self._intact(os.path.join(entry, name), meta):
+                self.logger.warning("Запись кэша %s повреждена (%s), удаляется", key[:12], name)
+                self._remove(entry)
+                return None
+
+        os.makedirs(output_dir, exist_ok=True)
+        restored = []
+        for name in manifest["files"]:
+            dst = os.path.join(output_dir, name)
+            method = link_or_copy(os.path.join(entry, name), dst)
+            restored.append(dst)
+            self.logger.info("Из кэша (%s): %s", method, dst)
+
+        manifest["last_used"] = time.time()
+        self._write_manifest(entry, manifest)
+        return restored
+
+    @staticmethod
+    def _intact(path: str, meta: Dict) -> bool:
+        """Размер (без чтения файла), затем sha256 совпадают с манифестом"""
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return False
+        return size == meta["size"] and file_sha256(path) == meta["sha256"]
+
+    def store(self, key: str, files: List[str], config: Dict):
+        """Кладет готовые файлы датасета в кэш и вытесняет старые записи"""
+        entry = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry):
+            return
+        staging = os.path.join(self.cache_dir, f".tmp-{key}-{os.getpid()}")
+        self._remove(staging)
+        os.makedirs(staging)
+
+        manifest_files = {}
+        try:
+            for path in files:
+                name = os.path.basename(path)
+                link_or_copy(path, os.path.join(staging, name))
+                manifest_files[name] = {
+                    "size": os.path.getsize(path),
+                    "sha256": file_sha256(path),
+                }
+            now = time.time()
+            self._write_manifest(staging, {
+                "key": key,
+                "version": GENERATOR_VERSION,
+                "config": config,
+                "files": manifest_files,
+                "created": now,
+                "last_used": now,
+            })
+            # Запись появляется атомарно — параллельный читатель не увидит половину
+            os.rename(staging, entry)
+        except OSError:
+            self._remove(staging)
+            raise
+
+        self.logger.info("Датасет сохранен в кэш: %s", entry)
+        self.evict()
+
+    def entries(self) -> List[Dict]:
+        """Манифесты всех записей (с путем в "path")"""
+        result = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            manifest = self._read_manifest(entry)
+            if manifest is not None:
+                manifest["path"] = entry
+                result.append(manifest)
+        return result
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока кэш больше лимита"""
+        if not self.max_bytes:
+            return
+        entries = sorted(self.entries(), key=lambda m: m["last_used"])
+        total = sum(_entry_size(m) for m in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop(0)
+            total -= _entry_size(oldest)
+            self.logger.info("Вытеснение из кэша: %s", oldest["key"][:12])
+            self._remove(oldest["path"])
+
+    @staticmethod
+    def _read_manifest(entry: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(entry, MANIFEST_FILENAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_manifest(entry: str, manifest: Dict):
+        path = os.path.join(entry, MANIFEST_FILENAME)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _remove(path: str):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _entry_size(manifest: Dict) -> int:
+    return sum(meta["size"] for meta in manifest["files"].values())
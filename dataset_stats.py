@@ -0,0 +1,338 @@
+import heapq
+import json
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from dataset_cache import unlink_for_rewrite
+from epoch_time import format_timestamp
+
+STATS_FILENAME = "dataset_stats.json"
+# Вариантов (последовательностей активностей) в скетче тяжелых элементов
+VARIANT_SKETCH_SIZE = 1024
+# Относительная точность квантилей длительности кейса
+QUANTILE_ACCURACY = 0.01
+REPORTED_QUANTILES = (0.5, 0.9, 0.99)
+# Начало и конец кейса в графе следования (обозначения как в PM4Py)
+DFG_START, DFG_END = "▶", "■"
+
+
+class QuantileSketch:
+    """Квантили в фиксированной памяти: логарифмические корзины (как DDSketch).
+
+    Значение x попадает в корзину ceil(log_gamma(x)); оценка квантиля
+    отличается от точной не больше чем на accuracy (относительно).
+    Число корзин ограничено диапазоном значений, а не их количеством.
+    """
+
+    def __init__(self, accuracy: float = QUANTILE_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Counter = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+
+    def merge(self, other: "QuantileSketch"):
+        """Добавляет значения другого скетча той же точности"""
+        if not other.count:
+            return
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> Dict:
+        """min/mean/max и квантили, деленные на scale (секунды -> часы)"""
+        if not self.count:
+            return {"count": 0}
+        result = {
+            "count": self.count,
+            "min": round(self.min / scale, 3),
+            "mean": round(self.total / self.count / scale, 3),
+            "max": round(self.max / scale, 3),
+        }
+        for q in REPORTED_QUANTILES:
+            result[f"p{round(q * 100)}"] = round(self.quantile(q) / scale, 3)
+        return result
+
+
+class HeavyHitters:
+    """Частые элементы в фиксированной памяти (алгоритм Space-Saving).
+
+    Пока различных элементов не больше capacity, счетчики точные; дальше
+    новый элемент вытесняет самый редкий и наследует его счетчик —
+    частота завышается не больше чем на error элемента.
+
+    Элементы разложены по корзинам с одинаковым счетчиком (stream-summary),
+    а непустые значения счетчиков лежат в min-куче с ленивым удалением:
+    самый редкий элемент находится за O(log k), а не перебором всех k.
+    """
+
+    def __init__(self, capacity: int = VARIANT_SKETCH_SIZE):
+        self.capacity = capacity
+        self.counts: Dict = {}
+        self.errors: Dict = {}
+        self.exact = True
+        # Счетчик -> элементы с ним в порядке попадания в корзину
+        self._buckets: Dict[int, Dict] = {}
+        # Значения счетчиков; опустевшие корзины удаляются при извлечении
+        self._heap: List[int] = []
+
+    def _place(self, item, count: int):
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = {}
+            heapq.heappush(self._heap, count)
+            if len(self._heap) > 2 * len(self._buckets) + 16:
+                # Устаревших значений больше живых — куча пересобирается
+                self._heap = list(self._buckets)
+                heapq.heapify(self._heap)
+        bucket[item] = None
+        self.counts[item] = count
+
+    def _unplace(self, item) -> int:
+        count = self.counts.pop(item)
+        bucket = self._buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[count]
+        return count
+
+    def _min_item(self):
+        """Самый редкий элемент; при равенстве — дольше всех с этим счетчиком"""
+        heap = self._heap
+        while heap[0] not in self._buckets:
+            heapq.heappop(heap)
+        return next(iter(self._buckets[heap[0]]))
+
+    def add(self, item, count: int = 1, error: int = 0):
+        if item in self.counts:
+            self._place(item, self._unplace(item) + count)
+            self.errors[item] += error
+            return
+        if len(self.counts) < self.capacity:
+            self._place(item, count)
+            self.errors[item] = error
+            return
+        self.exact = False
+        victim = self._min_item()
+        floor = self._unplace(victim)
+        del self.errors[victim]
+        self._place(item, floor + count)
+        self.errors[item] = floor + error
+
+    def merge(self, other: "HeavyHitters"):
+        """Добавляет счетчики другого скетча (взвешенный Space-Saving)"""
+        self.exact = self.exact and other.exact
+        for item, count in other.counts.items():
+            self.add(item, count, other.errors[item])
+
+    def most_common(self, n: Optional[int] = None) -> List:
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+
+class _OpenCase:
+    __slots__ = ("process", "first_start", "last_end", "activities", "anomalies", "reworks")
+
+    def __init__(self, event):
+        self.process = event.process
+        self.first_start = event.start_ts
+        self.last_end = event.end_ts
+        self.activities = []
+        self.anomalies = 0
+        self.reworks = 0
+
+
+class DatasetStats:
+    """Агрегаты датасета, обновляемые по мере генерации (без второго прохода).
+
+    Открытый кейс копит последовательность активностей; при завершении
+    кейса обновляются число событий по активностям и процессам, граф
+    непосредственного следования (directly-follows) с началом и концом
+    кейса, доли аномалий и rework, частоты вариантов (Space-Saving) и
+    квантили длительности кейса (лог-корзины). В памяти — только
+    открытые кейсы и ограниченные скетчи; агрегаты всегда относятся к
+    целым кейсам.
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.cases = 0
+        self.activity_counts: Counter = Counter()
+        self.process_events: Counter = Counter()
+        self.process_cases: Counter = Counter()
+        self.dfg: Counter = Counter()
+        self.anomaly_events = 0
+        self.rework_events = 0
+        self.anomaly_cases = 0
+        self.rework_cases = 0
+        self.variants = HeavyHitters()
+        self.throughput = QuantileSketch()
+        self.process_throughput: Dict[str, QuantileSketch] = {}
+        self.first_start = None
+        self.last_end = None
+        # Снимки агрегатов после N-го завершенного кейса (срезы вложенных пресетов)
+        self.checkpoints = set()
+        self.snapshots: Dict[int, Dict] = {}
+        self._open: Dict[int, _OpenCase] = {}
+
+    def add_events(self, events: Iterable):
+        """Учитывает события батча; события кейса приходят в порядке времени"""
+        open_cases = self._open
+        for event in events:
+            case = open_cases.get(event.case_id)
+            if case is None:
+                case = open_cases[event.case_id] = _OpenCase(event)
+            elif event.end_ts > case.last_end:
+                case.last_end = event.end_ts
+            case.activities.append(event.activity)
+            if event.anomaly:
+                case.anomalies += 1
+            if event.rework:
+                case.reworks += 1
+
+    def finish_cases(self, case_ids: Optional[Iterable[int]] = None):
+        """Закрывает кейсы (по умолчанию — все открытые) в порядке поступления"""
+        if case_ids is None:
+            case_ids = list(self._open)
+        for case_id in case_ids:
+            case = self._open.pop(case_id, None)
+            if case is not None:
+                self._finish(case)
+
+    def _finish(self, case: _OpenCase):
+        activities = tuple(case.activities)
+        self.cases += 1
+        self.events += len(activities)
+        self.process_cases[case.process] += 1
+        self.process_events[case.process] += len(activities)
+        self.activity_counts.update(activities)
+        self.dfg.update(zip((DFG_START,) + activities, activities + (DFG_END,)))
+        self.variants.add((case.process,) + activities)
+        duration = case.last_end - case.first_start
+        self.throughput.add(duration)
+        sketch = self.process_throughput.get(case.process)
+        if sketch is None:
+            sketch = self.process_throughput[case.process] = QuantileSketch()
+        sketch.add(duration)
+        self.anomaly_events += case.anomalies
+        self.rework_events += case.reworks
+        self.anomaly_cases += case.anomalies > 0
+        self.rework_cases += case.reworks > 0
+        if self.first_start is None or case.first_start < self.first_start:
+            self.first_start = case.first_start
+        if self.last_end is None or case.last_end > self.last_end:
+            self.last_end = case.last_end
+        if self.cases in self.checkpoints:
+            self.snapshots[self.cases] = self.to_dict()
+
+    def merge(self, other: "DatasetStats"):
+        """Добавляет агрегаты завершенных кейсов другого экземпляра.
+
+        Параллельная генерация: батч считается в воркере, агрегаты
+        сливаются в порядке батчей. Открытые кейсы не переносятся.
+        """
+        self.events += other.events
+        self.cases += other.cases
+        self.activity_counts.update(other.activity_counts)
+        self.process_events.update(other.process_events)
+        self.process_cases.update(other.process_cases)
+        self.dfg.update(other.dfg)
+        self.anomaly_events += other.anomaly_events
+        self.rework_events += other.rework_events
+        self.anomaly_cases += other.anomaly_cases
+        self.rework_cases += other.rework_cases
+        self.variants.merge(other.variants)
+        self.throughput.merge(other.throughput)
+        for process, sketch in other.process_throughput.items():
+            self.process_throughput.setdefault(process, QuantileSketch()).merge(sketch)
+        if other.cases:
+            if self.first_start is None or other.first_start < self.first_start:
+                self.first_start = other.first_start
+            if self.last_end is None or other.last_end > self.last_end:
+                self.last_end = other.last_end
+
+    def to_dict(self) -> Dict:
+        """Содержимое dataset_stats.json (только завершенные кейсы)"""
+        cases = max(1, self.cases)
+        return {
+            "cases": self.cases,
+            "events": self.events,
+            "events_per_case": round(self.events / cases, 3),
+            "time_range": {
+                "first_start": format_timestamp(self.first_start) if self.cases else None,
+                "last_end": format_timestamp(self.last_end) if self.cases else None,
+            },
+            "processes": {
+                process: {
+                    "cases": count,
+                    "share": round(count / cases, 4),
+                    "events": self.process_events[process],
+                    "throughput_hours": self.process_throughput[process].summary(3600),
+                }
+                for process, count in sorted(self.process_cases.items())
+            },
+            "anomaly": {
+                "cases": self.anomaly_cases,
+                "case_rate": round(self.anomaly_cases / cases, 4),
+                "events": self.anomaly_events,
+            },
+            "rework": {
+                "cases": self.rework_cases,
+                "case_rate": round(self.rework_cases / cases, 4),
+                "events": self.rework_events,
+            },
+            "activities": dict(sorted(self.activity_counts.items())),
+            "throughput_hours": self.throughput.summary(3600),
+            "variants": {
+                "exact": self.variants.exact,
+                "tracked": len(self.variants.counts),
+                "top": [
+                    {
+                        "process": variant[0],
+                        "activities": list(variant[1:]),
+                        "cases": count,
+                        "share": round(count / cases, 4),
+                    }
+                    for variant, count in self.variants.most_common(50)
+                ],
+            },
+            "directly_follows": [
+                {"from": a, "to": b, "count": count}
+                for (a, b), count in sorted(self.dfg.items(), key=lambda kv: (-kv[1], kv[0]))
+            ],
+        }
+
+    def save(self, path: str, data: Optional[Dict] = None):
+        unlink_for_rewrite(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict() if data is None else data, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Tuple
+
+# Внутреннее представление времени — int секунд от 1970-01-01 (наивное, без TZ).
+# День недели, час и квартал считаются арифметикой; datetime и строки
+# появляются только на выходе (writer или адаптеры публичного API).
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+# 1970-01-01 — четверг (weekday() == 3)
+_EPOCH_WEEKDAY = 3
+_SECOND = timedelta(seconds=1)
+
+# " HH:MM:" по минуте суток и "SS" по секунде — склейка вместо strftime
+_MINUTE_OF_DAY = tuple(f" {m // 60:02d}:{m % 60:02d}:" for m in range(24 * 60))
+_SECOND_OF_MINUTE = tuple(f"{s:02d}" for s in range(60))
+
+
+def to_epoch(dt: datetime) -> int:
+    """datetime -> секунды от EPOCH (микросекунды отбрасываются)"""
+    return (dt - EPOCH) // _SECOND
+
+
+def from_epoch(ts: int) -> datetime:
+    return EPOCH + timedelta(seconds=ts)
+
+
+def day_start(ts: int) -> int:
+    """Полночь того же дня"""
+    return ts - ts % SECONDS_PER_DAY
+
+
+def weekday(ts: int) -> int:
+    """0 — понедельник ... 6 — воскресенье, как datetime.weekday()"""
+    return (ts // SECONDS_PER_DAY + _EPOCH_WEEKDAY) % 7
+
+
+def hour_of_day(ts: int) -> int:
+    return ts % SECONDS_PER_DAY // SECONDS_PER_HOUR
+
+
+def civil_from_days(days: int) -> Tuple[int, int, int]:
+    """(год, месяц, день) по номеру дня от EPOCH — алгоритм Хиннанта без datetime"""
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    return yoe + era * 400 + (month <= 2), month, day
+
+
+def month_of(ts: int) -> int:
+    return civil_from_days(ts // SECONDS_PER_DAY)[1]
+
+
+def quarter_of(ts: int) -> int:
+    """1..4"""
+    return (month_of(ts) - 1) // 3 + 1
+
+
+@lru_cache(maxsize=16384)
+def _date_prefix(days: int) -> str:
+    year, month, day = civil_from_days(days)
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def format_timestamp(ts: int) -> str:
+    """"YYYY-MM-DD HH:MM:SS" — то же, что strftime("%Y-%m-%d %H:%M:%S")"""
+    return (
+        _date_prefix(ts // SECONDS_PER_DAY)
+        + _MINUTE_OF_DAY[ts % SECONDS_PER_DAY // SECONDS_PER_MINUTE]
+        + _SECOND_OF_MINUTE[ts % SECONDS_PER_MINUTE]
+    )
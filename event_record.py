@@ -0,0 +1,145 @@
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Tuple, Union
+
+from constants import BASE_CSV_FIELDS, EXTENDED_CSV_FIELDS, CSV_FIELD_NAMES
+from epoch_time import format_timestamp, from_epoch, to_epoch
+
+_EVENT_FIELDS = frozenset(BASE_CSV_FIELDS)
+_CASE_FIELDS = frozenset(EXTENDED_CSV_FIELDS)
+
+
+def _epoch(value: Union[datetime, int]) -> int:
+    return value if isinstance(value, int) else to_epoch(value)
+
+
+class CaseAttributes:
+    """Атрибуты уровня кейса — один объект на кейс, общий для всех событий"""
+
+    __slots__ = ("user_id", "department", "priority", "cost", "comment")
+
+    def __init__(self, user_id: str, department: str, priority: str,
+                 cost: float, comment: str):
+        self.user_id = user_id
+        self.department = department
+        self.priority = priority
+        self.cost = cost
+        self.comment = comment
+
+    def to_row(self) -> Tuple:
+        """Значения в порядке EXTENDED_CSV_FIELDS"""
+        return (self.user_id, self.department, self.priority, self.cost, self.comment)
+
+    def to_dict(self) -> dict:
+        return dict(zip(EXTENDED_CSV_FIELDS, self.to_row()))
+
+
+class Event(Mapping):
+    """Компактная запись события.
+
+    Хранит только поля уровня события и ссылку на общий CaseAttributes.
+    Поддерживает доступ как к словарю (event["activity"]) для совместимости.
+    Время хранится в epoch-секундах (start_ts/end_ts); timestamp_start и
+    timestamp_end — адаптеры, отдающие datetime.
+    """
+
+    __slots__ = (
+        "case_id", "start_ts", "end_ts", "process",
+        "activity", "duration_minutes", "role", "resource", "resource_id",
+        "anomaly", "anomaly_type", "rework", "case",
+    )
+
+    def __init__(self, case_id: int, timestamp_start: Union[datetime, int],
+                 timestamp_end: Union[datetime, int], process: str, activity: str,
+                 duration_minutes: int, role: str, resource: str,
+                 resource_id: str, anomaly: bool, anomaly_type,
+                 rework: bool, case: CaseAttributes):
+        self.case_id = case_id
+        self.start_ts = _epoch(timestamp_start)
+        self.end_ts = _epoch(timestamp_end)
+        self.process = process
+        self.activity = activity
+        self.duration_minutes = duration_minutes
+        self.role = role
+        self.resource = resource
+        self.resource_id = resource_id
+        self.anomaly = anomaly
+        self.anomaly_type = anomaly_type
+        self.rework = rework
+        self.case = case
+
+    @property
+    def timestamp_start(self) -> datetime:
+        return from_epoch(self.start_ts)
+
+    @timestamp_start.setter
+    def timestamp_start(self, value: Union[datetime, int]):
+        self.start_ts = _epoch(value)
+
+    @property
+    def timestamp_end(self) -> datetime:
+        return from_epoch(self.end_ts)
+
+    @timestamp_end.setter
+    def timestamp_end(self, value: Union[datetime, int]):
+        self.end_ts = _epoch(value)
+
+    def __getitem__(self, key: str):
+        if key in _EVENT_FIELDS:
+            return getattr(self, key)
+        if key in _CASE_FIELDS:
+            return getattr(self.case, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        # Поля уровня кейса меняются в общем объекте — для всех событий кейса
+        if key in _EVENT_FIELDS:
+            setattr(self, key, value)
+        elif key in _CASE_FIELDS:
+            setattr(self.case, key, value)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return key in _EVENT_FIELDS or key in _CASE_FIELDS
+
+    def __iter__(self):
+        return iter(CSV_FIELD_NAMES)
+
+    def __len__(self) -> int:
+        return len(CSV_FIELD_NAMES)
+
+    def __repr__(self) -> str:
+        return f"Event({self.to_dict()!r})"
+
+    def to_dict(self) -> dict:
+        return dict(zip(CSV_FIELD_NAMES, self.to_values()))
+
+    def to_values(self) -> Tuple:
+        """Сырые значения в порядке CSV_FIELD_NAMES"""
+        return (
+            self.case_id, self.timestamp_start, self.timestamp_end,
+            self.process, self.activity, self.duration_minutes, self.role,
+            self.resource, self.resource_id, self.anomaly, self.anomaly_type,
+            self.rework,
+        ) + self.case.to_row()
+
+    def to_epoch_values(self) -> Tuple:
+        """Как to_values, но время — epoch-секунды (без построения datetime)"""
+        return (
+            self.case_id, self.start_ts, self.end_ts,
+            self.process, self.activity, self.duration_minutes, self.role,
+            self.resource, self.resource_id, self.anomaly, self.anomaly_type,
+            self.rework,
+        ) + self.case.to_row()
+
+    def to_row(self) -> Tuple:
+        """Строка для csv.writer: значения в порядке CSV_FIELD_NAMES, даты — строками"""
+        return (
+            self.case_id,
+            format_timestamp(self.start_ts),
+            format_timestamp(self.end_ts),
+            self.process, self.activity, self.duration_minutes, self.role,
+            self.resource, self.resource_id, self.anomaly, self.anomaly_type,
+            self.rework,
+        ) + self.case.to_row()
@@ -0,0 +1,158 @@
+import csv
+import heapq
+import os
+import struct
+import tempfile
+from typing import Callable, Iterator, List, Optional
+
+# Размер одного отсортированного прогона в памяти (байт CSV)
+SORT_RUN_SIZE = 128 * 1024 * 1024
+# Максимум прогонов, сливаемых за один проход
+SORT_FAN_IN = 128
+# Буферы чтения/записи — крупные последовательные операции
+SORT_READ_BUFFER = 1024 * 1024
+SORT_WRITE_BUFFER = 8 * 1024 * 1024
+
+_LENGTH = struct.Struct("<I")
+
+
+class _RowCollector(list):
+    """Файлоподобный приемник для csv.writer: writerow делает ровно один write"""
+
+    write = list.append
+
+
+def _record_key(record: bytes):
+    """(timestamp_start, case_id) из строки CSV.
+
+    Первые две колонки — case_id и timestamp_start, они никогда не
+    экранируются, а строка "YYYY-MM-DD HH:MM:SS" сортируется как время.
+    """
+    case_id, timestamp_start, _ = record.split(b",", 2)
+    return timestamp_start, int(case_id)
+
+
+def _read_run(path: str) -> Iterator[bytes]:
+    """Записи прогона: uint32 длина + строка CSV (строка может содержать переводы строк)"""
+    with open(path, "rb", buffering=SORT_READ_BUFFER) as f:
+        read = f.read
+        while True:
+            prefix = read(_LENGTH.size)
+            if not prefix:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            yield read(length)
+
+
+class ExternalSorter:
+    """Внешняя сортировка событий по timestamp_start.
+
+    Батчи копятся в памяти до SORT_RUN_SIZE, сортируются и сбрасываются
+    во временные прогоны; merge_into сливает их k-way через heapq.merge.
+    Если прогонов больше SORT_FAN_IN — промежуточные проходы слияния.
+    Прогоны лежат в tempfile.TemporaryDirectory: каталог удаляется после
+    слияния, при cleanup() на прерванном прогоне (или выходе из with),
+    а в крайнем случае — финализатором при завершении интерпретатора.
+    """
+
+    def __init__(self, logger, temp_dir: str, row_builder: Callable,
+                 run_size: int = SORT_RUN_SIZE, fan_in: int = SORT_FAN_IN):
+        self.logger = logger
+        self.row_builder = row_builder
+        self.run_size = run_size
+        self.fan_in = max(2, fan_in)
+        self.bytes_written = 0
+        self._temp_root = temp_dir
+        self._temp_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._runs: List[str] = []
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._run_counter = 0
+
+    def add_events(self, events: List):
+        """Добавляет батч; при накоплении run_size байт сбрасывает прогон"""
+        rows = _RowCollector()
+        writer = csv.writer(rows, lineterminator="\n")
+        for event in events:
+            writer.writerow(self.row_builder(event))
+
+        batch_bytes = 0
+        for row in rows:
+            record = row.encode("utf-8")
+            self._pending.append(record)
+            batch_bytes += len(record)
+        self._pending_bytes += batch_bytes
+        self.bytes_written += batch_bytes
+
+        if self._pending_bytes >= self.run_size:
+            self._flush_run()
+
+    def merge_into(self, filepath: str, header: bytes):
+        """Сливает все прогоны в итоговый файл и удаляет временные"""
+        try:
+            self._flush_run()
+            runs = self._runs
+            merge_pass = 0
+            while len(runs) > self.fan_in:
+                merge_pass += 1
+                self.logger.info(
+                    "Промежуточное слияние %d прогонов (проход %d)...", len(runs), merge_pass
+                )
+                runs = [
+                    self._merge_to_run(runs[i:i + self.fan_in])
+                    for i in range(0, len(runs), self.fan_in)
+                ]
+
+            self.logger.info("Слияние %d отсортированных прогонов...", len(runs))
+            with open(filepath, "wb", buffering=SORT_WRITE_BUFFER) as out:
+                out.write(header)
+                for record in heapq.merge(*map(_read_run, runs), key=_record_key):
+                    out.write(record)
+        finally:
+            self.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+    def cleanup(self):
+        """Удаляет каталог прогонов и несброшенные записи"""
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+        self._runs = []
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _new_run_path(self) -> str:
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix=".sort-", dir=self._temp_root)
+        self._run_counter += 1
+        return os.path.join(self._temp_dir.name, f"run-{self._run_counter:06d}.bin")
+
+    def _flush_run(self):
+        if not self._pending:
+            return
+        self._pending.sort(key=_record_key)
+        path = self._new_run_path()
+        with open(path, "wb", buffering=SORT_WRITE_BUFFER) as f:
+            pack = _LENGTH.pack
+            for record in self._pending:
+                f.write(pack(len(record)))
+                f.write(record)
+        self._runs.append(path)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _merge_to_run(self, runs: List[str]) -> str:
+        path = self._new_run_path()
+        with open(path, "wb", buffering=SORT_WRITE_BUFFER) as f:
+            pack = _LENGTH.pack
+            for record in heapq.merge(*map(_read_run, runs), key=_record_key):
+                f.write(pack(len(record)))
+                f.write(record)
+        for run in runs:
+            os.remove(run)
+        return path
@@ -7,14 +7,16 @@ from typing import Optional
 class ProgressLogger:
     """Гибридный логгер с прогресс-баром"""
 
-    def __init__(self, name="ProcessMiningGenerator"):
+    def __init__(self, name="ProcessMiningGenerator", stream=None):
         self.logger = logging.getLogger(name)
         self.pbar: Optional[tqdm] = None
+        # stderr, когда stdout занят данными (--output -)
+        self.stream = stream or sys.stdout
         self.setup_logging()
 
     def setup_logging(self):
         """Настройка логирования"""
-        handler = logging.StreamHandler(sys.stdout)
+        handler = logging.StreamHandler(self.stream)
         formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
         handler.setFormatter(formatter)
 
@@ -52,6 +54,6 @@ class ProgressLogger:
         self.logger.error(message, *args)
 
 
-def get_logger(name="ProcessMiningGenerator") -> ProgressLogger:
+def get_logger(name="ProcessMiningGenerator", stream=None) -> ProgressLogger:
     """Фабрика для создания логгера"""
-    return ProgressLogger(name=name)
+    return ProgressLogger(name=name, stream=stream)
@@ -4,9 +4,32 @@ import json
 import time
 import random
 import shutil
+import sys
 from datetime import datetime, timedelta
 from case_generator import CaseGenerator
 from csv_writer import CSVWriter
+from categorical import CategoryEncoder, CATEGORIES_FILENAME
+from binary_writer import BinaryWriter, build_binary_encoder
+from parquet_writer import ParquetWriter
+from compression import ParallelGzipCompressor
+from xes_writer import XESWriter
+from sqlite_writer import SQLiteWriter
+from stream_writer import StreamWriter, STREAM_FORMATS, is_stream_target
+from external_sort import ExternalSorter
+from dataset_cache import DatasetCache, cache_key, unlink_for_rewrite
+from case_index import CaseIndexBuilder, CASE_INDEX_MAGIC, ENTRY_SIZE, case_index_path
+from output_file import DEFAULT_WRITE_BUFFER
+from parallel_generation import BatchFactory, ParallelBatchPipeline, RegionWritePipeline
+from zone_map import ZoneMapBuilder, DEFAULT_ZONE_BYTES, zone_map_path
+from dataset_stats import DatasetStats, STATS_FILENAME
+from nested_presets import (
+    PrefixCutter, NESTED_BATCH_SHARE, NESTED_SHARED_KEYS, check_nested_presets, copy_prefix,
+)
+from simulation import SimulationEngine, SIMULATION_BATCH_EVENTS
+from memory_budget import (
+    MemoryBudget, parse_memory_size, peak_rss,
+)
+from constants import CSV_FIELD_NAMES
 from resource_pool import ResourcePool
 from utils import distribute_processes
 from config import (
@@ -15,6 +38,18 @@ from config import (
 )
 from logger import get_logger
 
+CONFIG_MAP = {
+    "50MB": CONFIG_50MB,
+    "500MB": CONFIG_500MB,
+    "750MB": CONFIG_750MB,
+    "1GB": CONFIG_1GB,
+    "5GB": CONFIG_5GB,
+    "10GB": CONFIG_10GB,
+    "20GB": CONFIG_20GB,
+    "30GB": CONFIG_30GB,
+    "50GB": CONFIG_50GB,
+}
+
 
 class ProcessMiningGenerator:
     def __init__(self, config, logger):
@@ -25,7 +60,155 @@ class ProcessMiningGenerator:
         self.generator = CaseGenerator(
             start_case_id=1, logger=logger, resource_pool=self.resource_pool
         )
-        self.csv_writer = CSVWriter(logger)
+        self.output_format = config.get("format", "csv")
+        if self.output_format == "binary":
+            self.encoder = build_binary_encoder(self.resource_pool)
+        elif config.get("encode_categories"):
+            self.encoder = CategoryEncoder.from_resource_pool(self.resource_pool)
+        else:
+            self.encoder = None
+        self.compressor = None
+        if config.get("compress") == "gzip":
+            if self.output_format != "csv":
+                raise ValueError("gzip compression is supported only for csv format")
+            self.compressor = ParallelGzipCompressor(workers=config.get("workers"))
+        self.csv_writer = CSVWriter(
+            logger,
+            encoder=self.encoder if self.output_format == "csv" else None,
+            compressor=self.compressor,
+            vocabulary=self.generator.vocabulary,
+            buffer_size=(
+                config.get("write_buffer_bytes", DEFAULT_WRITE_BUFFER)
+                if self.output_format == "csv"
+                else None
+            ),
+        )
+        self.binary_writer = (
+            BinaryWriter(logger, self.encoder) if self.output_format == "binary" else None
+        )
+        self.parquet_writer = (
+            ParquetWriter(logger) if self.output_format == "parquet" else None
+        )
+        self.xes_writer = XESWriter(logger) if self.output_format == "xes" else None
+        self.stream_writer = (
+            StreamWriter(
+                logger,
+                config["stream_output"],
+                config.get("stream_format", "csv"),
+                row_builder=self.csv_writer._event_to_row,
+            )
+            if config.get("stream_output")
+            else None
+        )
+        if self.stream_writer is not None and (
+            self.output_format != "csv"
+            or self.compressor is not None
+            or config.get("layout", "flat") != "flat"
+            or self.encoder is not None
+        ):
+            raise ValueError("Stream output supports only flat uncompressed plain csv")
+        self.sorter = None
+        if config.get("sort_by_time"):
+            if (
+                self.output_format != "csv"
+                or self.compressor is not None
+                or self.stream_writer is not None
+                or config.get("layout", "flat") != "flat"
+            ):
+                raise ValueError("--sort-by-time supports only flat csv files")
+            self.sorter = ExternalSorter(
+                logger, config["output_dir"], row_builder=self.csv_writer._event_to_row
+            )
+        if config.get("engine", "batch") == "simulation" and (
+            self.output_format == "xes" or config.get("layout", "flat") != "flat"
+        ):
+            # События разных кейсов перемежаются, а эти форматы группируют по кейсу
+            raise ValueError("Simulation engine supports only flat layout and non-xes formats")
+        if config.get("case_index") and (
+            self.output_format != "csv"
+            or self.compressor is not None
+            or self.encoder is not None
+            or self.stream_writer is not None
+            or self.sorter is not None
+            or config.get("layout", "flat") != "flat"
+            or config.get("engine", "batch") != "batch"
+        ):
+            # Индекс адресует непрерывные кейсы байтовыми смещениями в несжатом файле
+            raise ValueError("--case-index supports only flat uncompressed csv from the batch engine")
+        if config.get("zone_map_bytes") and (
+            self.output_format != "csv"
+            or self.compressor is not None
+            or self.encoder is not None
+            or self.stream_writer is not None
+            or self.sorter is not None
+            or config.get("layout", "flat") != "flat"
+        ):
+            raise ValueError("--zone-maps supports only flat uncompressed plain csv")
+        if config.get("nested_presets") and (
+            self.output_format != "csv"
+            or self.compressor is not None
+            or self.encoder is not None
+            or self.stream_writer is not None
+            or self.sorter is not None
+            or config.get("layout", "flat") != "flat"
+            or config.get("engine", "batch") != "batch"
+            or config.get("zone_map_bytes")
+        ):
+            # Меньший датасет — префикс файла до границы кейса
+            raise ValueError(
+                "Nested presets support only flat uncompressed plain csv from the batch engine"
+            )
+        if config.get("preallocate") and (
+            self.output_format != "csv"
+            or self.compressor is not None
+            or self.stream_writer is not None
+            or self.sorter is not None
+            or config.get("layout", "flat") != "flat"
+        ):
+            # Резерв под целевой размер имеет смысл для одного несжатого файла
+            raise ValueError("--preallocate supports only flat uncompressed csv files")
+        if config.get("processes") is not None and (
+            config["processes"] < 1
+            or self.output_format != "csv"
+            or self.encoder is not None
+            or self.stream_writer is not None
+            or self.sorter is not None
+            or config.get("layout", "flat") != "flat"
+            or config.get("engine", "batch") != "batch"
+            or config.get("case_index")
+            or config.get("zone_map_bytes")
+            or config.get("nested_presets")
+            or config.get("max_memory_bytes")
+            or (self.compressor is not None and config.get("size_target") == "compressed")
+        ):
+            # Воркеры присылают готовые байты строк, событий в родителе нет
+            raise ValueError(
+                "--processes supports only flat plain csv from the batch engine "
+                "without index, zone maps, nested presets or memory limit"
+            )
+        if config.get("region_write") and (
+            config.get("processes") is None or self.compressor is not None
+        ):
+            # Воркеры пишут по смещениям в несжатый файл
+            raise ValueError("--region-write requires --processes and uncompressed csv")
+        self.sqlite_writer = (
+            SQLiteWriter(logger, normalized=config.get("layout") == "normalized")
+            if self.output_format == "sqlite"
+            else None
+        )
+        self.memory_budget = (
+            MemoryBudget(config["max_memory_bytes"], logger)
+            if config.get("max_memory_bytes")
+            else None
+        )
+        if self.memory_budget is not None:
+            # Кэши фрагментов и буфер записи растут за прогон вне батча
+            self.memory_budget.reserve(self.csv_writer.fixed_footprint())
+        self.case_index = None
+        self.zone_map = None
+        self.nested = None
+        self.stats = DatasetStats() if config.get("dataset_stats", True) else None
+        self.output_paths = {}
 
     def check_disk_space(self, required_gb: float):
         """Проверка свободного места на диске"""
@@ -41,43 +224,157 @@ class ProcessMiningGenerator:
         """Создает выходную директорию если не существует"""
         os.makedirs(self.config["output_dir"], exist_ok=True)
 
-    def generate_data(self):
-        """Адаптивная генерация: батчами до достижения целевого размера файла"""
-        self.logger.info(
-            "Запуск генерации %.1fGB данных...", self.config["target_size_gb"]
-        )
-        self.logger.info("Выходная директория: %s", self.config["output_dir"])
+    def get_output_paths(self, size_str: str) -> dict:
+        """Пути выходных файлов в зависимости от layout"""
+        if self.stream_writer is not None:
+            return {"events": self.config["stream_output"]}
+        output_dir = self.config["output_dir"]
+        layout = self.config.get("layout", "flat")
+        if self.output_format == "sqlite":
+            # normalized — таблицы events и cases в одной базе
+            return {"events": os.path.join(output_dir, f"process_log_{size_str}GB.sqlite")}
+        if self.output_format in ("binary", "parquet", "xes"):
+            if layout != "flat":
+                raise ValueError(f"{self.output_format} format supports only flat layout")
+            extension = "bin" if self.output_format == "binary" else self.output_format
+            return {
+                "events": os.path.join(output_dir, f"process_log_{size_str}GB.{extension}")
+            }
+        suffix = ".gz" if self.compressor is not None else ""
+        if layout == "normalized":
+            return {
+                "events": os.path.join(output_dir, "events.csv" + suffix),
+                "cases": os.path.join(output_dir, "cases.csv" + suffix),
+            }
+        return {
+            "events": os.path.join(output_dir, f"process_log_{size_str}GB.csv{suffix}")
+        }
+
+    def write_batch(self, events, mode: str):
+        """Записывает батч событий во все выходные файлы"""
+        if self.stream_writer is not None:
+            self.stream_writer.write_events_to_stream(events, mode=mode)
+        elif self.sorter is not None:
+            # Отсортированные прогоны во временных файлах, итоговый файл — в close_outputs
+            self.sorter.add_events(events)
+        elif self.binary_writer is not None:
+            self.binary_writer.write_events_to_binary(
+                events, self.output_paths["events"], mode=mode
+            )
+        elif self.parquet_writer is not None:
+            self.parquet_writer.write_events_to_parquet(
+                events, self.output_paths["events"], mode=mode
+            )
+        elif self.xes_writer is not None:
+            self.xes_writer.write_events_to_xes(
+                events, self.output_paths["events"], mode=mode
+            )
+        elif self.sqlite_writer is not None:
+            self.sqlite_writer.write_events_to_sqlite(
+                events, self.output_paths["events"], mode=mode
+            )
+        elif "cases" in self.output_paths:
+            self.csv_writer.write_normalized_to_csv(
+                events,
+                self.output_paths["events"],
+                self.output_paths["cases"],
+                mode=mode,
+            )
+        else:
+            self.csv_writer.write_events_to_csv(
+                events, self.output_paths["events"], mode=mode
+            )
 
-        self.create_output_directory()
-        self.check_disk_space(self.config["target_size_gb"])
+    def get_output_size(self) -> int:
+        """Суммарный размер всех выходных файлов в байтах"""
+        if self.stream_writer is not None:
+            # pipe не имеет размера — считаем отправленные байты
+            return self.stream_writer.bytes_written
+        if self.sorter is not None:
+            # Итоговый файл после слияния будет ровно такого размера
+            return len(self._csv_header()) + self.sorter.bytes_written
+        if self.parquet_writer is not None:
+            # Parquet пишется в открытый файл — считаем по позиции в потоке
+            return self.parquet_writer.bytes_written
+        if self.xes_writer is not None:
+            return self.xes_writer.bytes_written
+        if self.sqlite_writer is not None:
+            # База после checkpoint плюс оценка индексов, строящихся в close()
+            return self.sqlite_writer.bytes_written
+        if self.compressor is not None and self.config.get("size_target") != "compressed":
+            # Таргетинг по несжатому объему CSV
+            return sum(
+                self.compressor.raw_bytes.get(path, 0)
+                for path in self.output_paths.values()
+            )
+        return sum(self.csv_writer.output_size(path) for path in self.output_paths.values())
 
-        target_bytes = int(self.config["target_size_gb"] * 1024 * 1024 * 1024)
-        size_str = str(self.config["target_size_gb"]).replace(".", "_")
-        final_filename = os.path.join(
-            self.config["output_dir"], f"process_log_{size_str}GB.csv"
-        )
+    def _write_observed(self, events, mode: str, finished_cases=None):
+        """write_batch + замер байт на событие для лимита памяти и статистика.
 
-        start_date = datetime.strptime(self.config["start_date"], "%Y-%m-%d")
-        time_range_days = self.config.get("time_range_days", 365 * 2)
+        finished_cases — кейсы, завершенные этим батчем; None — все
+        (в батчевом движке батч состоит из целых кейсов).
+        """
+        if self.memory_budget is None:
+            self.write_batch(events, mode)
+        else:
+            size_before = 0 if mode == "w" else self.get_output_size()
+            self.write_batch(events, mode)
+            self.memory_budget.observe(events, self.get_output_size() - size_before)
+
+        if self.stats is not None:
+            if self.nested is not None:
+                # Снимки статистики на срезах вложенных пресетов, найденных этим батчем
+                self.stats.checkpoints = {cut["cases"] for cut in self.nested.cuts.values()}
+            self.stats.add_events(events)
+            self.stats.finish_cases(finished_cases)
+
+    def _abort_outputs(self):
+        """Прерванный прогон: открытые файлы дописываются и теряют хвост резерва
+        fallocate, временные прогоны сортировки удаляются, пул сжатия останавливается"""
+        try:
+            self.csv_writer.close()
+            if self.sorter is not None:
+                self.sorter.cleanup()
+        finally:
+            if self.compressor is not None:
+                self.compressor.close()
+
+    def _csv_header(self) -> bytes:
+        return (",".join(CSV_FIELD_NAMES) + "\n").encode("utf-8")
 
+    def close_outputs(self):
+        """Финализирует выходные файлы, которые держатся открытыми между батчами"""
+        if self.sorter is not None:
+            self.sorter.merge_into(self.output_paths["events"], self._csv_header())
+        if self.stream_writer is not None:
+            self.stream_writer.close()
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        if self.xes_writer is not None:
+            self.xes_writer.close()
+        if self.sqlite_writer is not None:
+            self.sqlite_writer.close()
+        if self.compressor is not None:
+            self.compressor.close()
+        self.csv_writer.close()
+        for observer in self.csv_writer.row_observers:
+            observer.close()
+
+    def _generate_batches(self, target_bytes: int, start_date: datetime,
+                          time_range_days: int, estimated_total_cases: int,
+                          start_time: float):
+        """Батчи кейсов со случайным днем старта; возвращает (кейсов, событий)"""
         total_events = 0
         total_cases = 0
         first_chunk = True
-        start_time = time.time()
 
-        # Начальная оценка: ~200 байт на строку, ~6 событий на кейс
-        avg_row_size = 200
-        estimated_total_cases = max(100, int(target_bytes / avg_row_size / 6))
         batch_cases = max(100, min(10000, estimated_total_cases // 4))
 
-        # Прогресс-бар на целевое количество событий
-        estimated_total_events = int(target_bytes / avg_row_size)
-        self.logger.start_progress(estimated_total_events, "Генерация событий")
-
         while True:
             # Проверяем текущий размер файла
             if not first_chunk:
-                current_size = os.path.getsize(final_filename)
+                current_size = self.get_output_size()
                 if current_size >= target_bytes:
                     break
 
@@ -99,28 +396,56 @@ class ProcessMiningGenerator:
                 if batch_cases <= 0:
                     break
 
+            events_per_case = total_events / total_cases if total_cases else 6.0
+            if self.memory_budget is not None:
+                batch_cases = self.memory_budget.cap_cases(batch_cases, events_per_case)
+
+            if self.nested is not None and self.nested.next_threshold is not None:
+                # Пока не пройдены цели меньших пресетов — мелкие батчи: срез
+                # по границе кейса отрезает лишь малую часть смеси процессов
+                bytes_per_case = (
+                    self.get_output_size() / total_cases if total_cases else 1200
+                )
+                batch_cases = min(batch_cases, max(
+                    100, int(self.nested.next_threshold * NESTED_BATCH_SHARE / bytes_per_case)
+                ))
+
             # Распределяем кейсы по процессам пропорционально весам
             process_counts = distribute_processes(
                 self.config["process_distribution"], batch_cases
             )
+            # С лимитом памяти кейсы генерируются порциями с проверкой RSS;
+            # порция — по оценке байт на событие под оставшийся запас
             process_events = []
             for proc_name, proc_cases in process_counts.items():
                 if proc_cases <= 0:
                     continue
-                events = self.generator.generate_multiple_cases(
-                    process_name=proc_name,
-                    num_cases=proc_cases,
-                    start_time=start_date
-                    + timedelta(days=random.randint(0, time_range_days)),
-                    anomaly_rate=self.config["anomaly_rate"],
-                    rework_rate=self.config["rework_rate"],
-                )
-                process_events.extend(events)
+                proc_start = start_date + timedelta(days=random.randint(0, time_range_days))
+                offset = 0
+                while offset < proc_cases:
+                    chunk = proc_cases - offset
+                    if self.memory_budget is not None:
+                        chunk = min(chunk, self.memory_budget.check_cases(events_per_case))
+                    events = self.generator.generate_multiple_cases(
+                        process_name=proc_name,
+                        num_cases=chunk,
+                        start_time=proc_start,
+                        anomaly_rate=self.config["anomaly_rate"],
+                        rework_rate=self.config["rework_rate"],
+                    )
+                    offset += chunk
+                    process_events.extend(events)
+
+                    if self.memory_budget is not None and self.memory_budget.should_spill():
+                        # Досрочный сброс: батч записывается частями
+                        self._write_observed(process_events, "w" if first_chunk else "a")
+                        first_chunk = False
+                        total_events += len(process_events)
+                        self.logger.update_progress(len(process_events))
+                        process_events = []
 
             mode = "w" if first_chunk else "a"
-            self.csv_writer.write_events_to_csv(
-                process_events, final_filename, mode=mode
-            )
+            self._write_observed(process_events, mode)
             first_chunk = False
 
             total_events += len(process_events)
@@ -130,7 +455,7 @@ class ProcessMiningGenerator:
 
             if total_cases % 50000 < batch_cases:
                 elapsed = time.time() - start_time
-                current_size = os.path.getsize(final_filename)
+                current_size = self.get_output_size()
                 self.logger.info(
                     "Прогресс: %.2f/%.2f GB | %d кейсов | %.0f сек",
                     current_size / (1024**3),
@@ -141,31 +466,396 @@ class ProcessMiningGenerator:
 
             del process_events
 
-        self.logger.close_progress()
+        return total_cases, total_events
+
+    def _generate_parallel(self, target_bytes: int, start_time: float):
+        """Батчи собираются в пуле процессов и пишутся в один файл по порядку номеров.
+
+        Батч k зависит только от seed и k, поэтому файл побайтово одинаков
+        при любом --processes. Последний батч обрезается по первой границе
+        кейса, на которой набирается целевой размер. С --region-write строки
+        пишут сами воркеры (pwrite в выданные по порядку диапазоны).
+        """
+        path = self.output_paths["events"]
+        seed = self.config.get("seed")
+        if seed is None:
+            seed = random.getrandbits(64)
+        data_target = target_bytes - len(self._csv_header())
+        written = 0
+        total_cases = 0
+        total_events = 0
+        last_report = 0
+
+        region_write = self.config.get("region_write")
+        if region_write:
+            pipeline = RegionWritePipeline(
+                path,
+                self._csv_header(),
+                target_bytes,
+                self.config,
+                self.resource_pool,
+                self.config["processes"],
+                seed,
+                with_stats=self.stats is not None,
+                logger=self.logger,
+            )
+        else:
+            pipeline = ParallelBatchPipeline(
+                self.config,
+                self.resource_pool,
+                self.config["processes"],
+                seed,
+                with_stats=self.stats is not None,
+            )
+        with pipeline:
+            while written < data_target or total_cases == 0:
+                batch = pipeline.next_batch()
+                cases = batch.cases_within(data_target - written)
+                limit = batch.case_ends[cases - 1]
+                if region_write:
+                    # Строки пишет сам воркер в выданный диапазон файла
+                    pipeline.place(batch, limit)
+                else:
+                    self.csv_writer.write_serialized(
+                        batch.rows(limit), path, "w" if total_cases == 0 else "a"
+                    )
+                written += limit
+                total_cases += cases
+                events = batch.case_events[cases - 1]
+                total_events += events
+                self.logger.update_progress(events)
+
+                if self.stats is not None:
+                    if cases == batch.cases:
+                        self.stats.merge(batch.stats)
+                    else:
+                        self._replay_stats(seed, batch.number, events)
+
+                if total_cases - last_report >= 50000:
+                    last_report = total_cases
+                    self.logger.info(
+                        "Прогресс: %.2f/%.2f GB | %d кейсов | %.0f сек",
+                        (written + len(self._csv_header())) / (1024**3),
+                        self.config["target_size_gb"],
+                        total_cases,
+                        time.time() - start_time,
+                    )
+        return total_cases, total_events
+
+    def _replay_stats(self, seed, number: int, events: int):
+        """Агрегаты только по записанным кейсам батча: батч воспроизводится
+        локально на копии пула, состояние random затем возвращается"""
+        state = random.getstate()
+        try:
+            factory = BatchFactory(self.config, self.resource_pool.fork(), seed)
+            self.stats.add_events(factory.events(number)[:events])
+        finally:
+            random.setstate(state)
+        self.stats.finish_cases()
+
+    def _generate_simulated(self, target_bytes: int, start_date: datetime,
+                            time_range_days: int, estimated_total_cases: int,
+                            start_time: float):
+        """Дискретно-событийная симуляция: события в порядке времени начала.
+
+        Интенсивность поступления подстраивается после каждого батча так,
+        чтобы оставшийся объем равномерно лег на оставшийся интервал. По
+        достижении цели поступление прекращается, открытые кейсы дописываются.
+        """
+        engine = SimulationEngine(
+            self.generator,
+            self.config["process_distribution"],
+            start_date,
+            time_range_days,
+            cases_per_day=0,
+            anomaly_rate=self.config["anomaly_rate"],
+            rework_rate=self.config["rework_rate"],
+        )
+        # Базовая интенсивность с поправкой на сезонность: в среднем цель ложится в интервал
+        engine.set_arrival_rate(
+            estimated_total_cases / max(1, time_range_days)
+            / engine.seasonal_factor(engine.start_ts)
+        )
+
+        # Мелкие батчи для маленьких датасетов — иначе интенсивность не успеет подстроиться
+        batch_events = max(1000, min(SIMULATION_BATCH_EVENTS, estimated_total_cases * 6 // 20))
+        total_events = 0
+        first_chunk = True
+        last_report = 0
 
-        # Сохраняем конфигурацию
+        while True:
+            if self.memory_budget is not None:
+                batch_events = self.memory_budget.cap_events(batch_events)
+            events = engine.next_batch(batch_events)
+            if not events:
+                break
+
+            mode = "w" if first_chunk else "a"
+            self._write_observed(events, mode, engine.finished_case_ids)
+            first_chunk = False
+            total_events += len(events)
+            self.logger.update_progress(len(events))
+
+            current_size = self.get_output_size()
+            if current_size >= target_bytes:
+                engine.stop_arrivals()
+            elif engine.cases_started:
+                # Байт на кейс по факту -> сколько кейсов нужно на остаток интервала
+                bytes_per_case = current_size / engine.cases_started
+                remaining_cases = (target_bytes - current_size) / bytes_per_case
+                simulated_until = events[-1].start_ts
+                remaining_days = max(1.0, (engine.end_ts - simulated_until) / 86400)
+                engine.set_arrival_rate(
+                    remaining_cases / remaining_days / engine.seasonal_factor(simulated_until)
+                )
+
+            if engine.cases_started - last_report >= 50000:
+                last_report = engine.cases_started
+                self.logger.info(
+                    "Прогресс: %.2f/%.2f GB | %d кейсов (%d открыто) | %.0f сек",
+                    current_size / (1024**3),
+                    self.config["target_size_gb"],
+                    engine.cases_started,
+                    engine.open_cases,
+                    time.time() - start_time,
+                )
+
+            del events
+
+        if self.get_output_size() < target_bytes:
+            # Интервал time_range_days исчерпан раньше цели (шум пуассоновского потока)
+            self.logger.warning(
+                "Интервал симуляции закончился до достижения целевого размера"
+            )
+        return engine.cases_started, total_events
+
+    def _categories_path(self) -> str:
+        return os.path.join(self.config["output_dir"], CATEGORIES_FILENAME)
+
+    def _stats_path(self) -> str:
+        return os.path.join(self.config["output_dir"], STATS_FILENAME)
+
+    def save_config(self):
         config_filename = os.path.join(
             self.config["output_dir"], "generation_config.json"
         )
         with open(config_filename, "w") as f:
             json.dump(self.config, f, indent=2, default=str)
 
+    def output_files(self) -> list:
+        """Файлы датасета (без generation_config.json) — то, что кладется в кэш"""
+        files = list(self.output_paths.values())
+        if self.case_index is not None:
+            files.append(self.case_index.path)
+        if self.zone_map is not None:
+            files.append(self.zone_map.path)
+        if self.encoder is not None:
+            files.append(self._categories_path())
+        if self.stats is not None:
+            files.append(self._stats_path())
+        return [path for path in files if os.path.isfile(path)]
+
+    def generate_or_restore(self, cache: DatasetCache):
+        """Берет датасет из кэша по ключу конфига, иначе генерирует и сохраняет"""
+        key = cache_key(self.config)
+        if key is None:
+            self.logger.info("Кэш не используется: нужен --seed и вывод в файлы")
+            self.generate_data()
+            return
+
+        restored = cache.restore(key, self.config["output_dir"])
+        if restored is not None:
+            self.save_config()
+            self.logger.info("Датасет взят из кэша (ключ %s)", key[:12])
+            return
+
+        self.generate_data()
+        cache.store(key, self.output_files(), self.config)
+
+    def generate_data(self):
+        """Адаптивная генерация: батчами до достижения целевого размера файла"""
+        self.logger.info(
+            "Запуск генерации %.1fGB данных...", self.config["target_size_gb"]
+        )
+        self.logger.info("Выходная директория: %s", self.config["output_dir"])
+
+        if self.stream_writer is None:
+            self.create_output_directory()
+            self.check_disk_space(self.config["target_size_gb"])
+
+        target_bytes = int(self.config["target_size_gb"] * 1024 * 1024 * 1024)
+        size_str = str(self.config["target_size_gb"]).replace(".", "_")
+        self.output_paths = self.get_output_paths(size_str)
+        if self.config.get("case_index"):
+            self.case_index = CaseIndexBuilder(case_index_path(self.output_paths["events"]))
+        if self.config.get("zone_map_bytes"):
+            self.zone_map = ZoneMapBuilder(
+                zone_map_path(self.output_paths["events"]), self.config["zone_map_bytes"]
+            )
+        if self.config.get("nested_presets"):
+            self.nested = PrefixCutter([
+                int(preset["target_size_gb"] * 1024 ** 3)
+                for preset in self.config["nested_presets"]
+            ])
+        if self.config.get("preallocate"):
+            self.csv_writer.preallocate = {self.output_paths["events"]: target_bytes}
+        self.csv_writer.row_observers = [
+            observer
+            for observer in (self.case_index, self.zone_map, self.nested)
+            if observer is not None
+        ]
+        if self.stream_writer is None:
+            for path in self.output_paths.values():
+                unlink_for_rewrite(path)
+
+        start_date = datetime.strptime(self.config["start_date"], "%Y-%m-%d")
+        time_range_days = self.config.get("time_range_days", 365 * 2)
+
+        start_time = time.time()
+
+        # Начальная оценка: ~200 байт на строку, ~6 событий на кейс
+        avg_row_size = 200
+        estimated_total_cases = max(100, int(target_bytes / avg_row_size / 6))
+
+        # Прогресс-бар на целевое количество событий
+        estimated_total_events = int(target_bytes / avg_row_size)
+        self.logger.start_progress(estimated_total_events, "Генерация событий")
+
+        try:
+            if self.config.get("processes") is not None:
+                total_cases, total_events = self._generate_parallel(target_bytes, start_time)
+            elif self.config.get("engine", "batch") == "simulation":
+                total_cases, total_events = self._generate_simulated(
+                    target_bytes, start_date, time_range_days, estimated_total_cases, start_time
+                )
+            else:
+                total_cases, total_events = self._generate_batches(
+                    target_bytes, start_date, time_range_days, estimated_total_cases, start_time
+                )
+        except BaseException:
+            self._abort_outputs()
+            raise
+
+        self.close_outputs()
+        self.logger.close_progress()
+
+        if self.stats is not None:
+            self.stats.finish_cases()
+            if self.stream_writer is None:
+                self.stats.save(self._stats_path())
+
+        # Словари категорий — один раз на датасет, после всех батчей
+        if self.encoder is not None:
+            categories_filename = self._categories_path()
+            if os.path.isfile(categories_filename):
+                os.remove(categories_filename)
+            self.encoder.save(categories_filename)
+            self.logger.info("Словари категорий: %s", categories_filename)
+
+        # Сохраняем конфигурацию (при выводе в поток выходной директории нет)
+        if self.stream_writer is None:
+            self.save_config()
+
         # Статистика
-        actual_size = os.path.getsize(final_filename)
+        actual_size = self.get_output_size()
         actual_size_gb = actual_size / (1024**3)
         total_time = time.time() - start_time
 
         self.logger.info("Генерация завершена!")
         self.logger.info("Статистика:")
-        self.logger.info("Файл: %s", final_filename)
+        for path in self.output_paths.values():
+            self.logger.info("Файл: %s", path)
+        if self.case_index is not None:
+            self.logger.info(
+                "Индекс кейсов: %s (%d кейсов)", self.case_index.path, self.case_index.cases
+            )
+        if self.zone_map is not None:
+            self.logger.info(
+                "Zone maps: %s (%d зон)", self.zone_map.path, len(self.zone_map.zones)
+            )
         self.logger.info("Целевой размер: %.1f GB", self.config["target_size_gb"])
         self.logger.info("Фактический размер: %.3f GB", actual_size_gb)
+        if self.compressor is not None:
+            disk_size = sum(os.path.getsize(p) for p in self.output_paths.values())
+            self.logger.info(
+                "Размер на диске (gzip): %.3f GB, сжатие x%.1f",
+                disk_size / (1024**3),
+                sum(self.compressor.raw_bytes.values()) / max(1, disk_size),
+            )
         self.logger.info(
             "Точность: %.1f%%", (actual_size_gb / self.config["target_size_gb"]) * 100
         )
         self.logger.info("Кейсов: %d", total_cases)
         self.logger.info("Событий: %d", total_events)
+        if self.stats is not None:
+            self.logger.info(
+                "Статистика датасета: %s (%d вариантов, доля аномалий %.3f, rework %.3f)",
+                self._stats_path() if self.stream_writer is None else "-",
+                len(self.stats.variants.counts),
+                self.stats.anomaly_cases / max(1, self.stats.cases),
+                self.stats.rework_cases / max(1, self.stats.cases),
+            )
         self.logger.info("Время выполнения: %.2f сек", total_time)
+        if self.memory_budget is not None:
+            self.memory_budget.report()
+        else:
+            self.logger.info("Пиковая память (RSS): %.1f MB", peak_rss() / 1024 ** 2)
+
+        if self.nested is not None:
+            self.materialize_nested()
+
+    def materialize_nested(self):
+        """Меньшие пресеты — префиксы большого CSV до найденных срезов"""
+        source = self.output_paths["events"]
+        for preset in self.config["nested_presets"]:
+            cut = self.nested.cuts.get(int(preset["target_size_gb"] * 1024 ** 3))
+            if cut is None:
+                self.logger.warning("Срез для %s не найден", preset["name"])
+                continue
+            output_dir = preset["output_dir"]
+            os.makedirs(output_dir, exist_ok=True)
+            size_str = str(preset["target_size_gb"]).replace(".", "_")
+            path = os.path.join(output_dir, f"process_log_{size_str}GB.csv")
+            method = copy_prefix(source, path, cut["offset"])
+            if self.case_index is not None:
+                # Записи индекса отсортированы по смещению — префикс индекса
+                copy_prefix(
+                    self.case_index.path,
+                    case_index_path(path),
+                    len(CASE_INDEX_MAGIC) + cut["cases"] * ENTRY_SIZE,
+                )
+
+            # Время и сезонность — как у большого датасета, из которого взят префикс
+            config = {
+                key: value for key, value in self.config.items() if key != "nested_presets"
+            }
+            config["target_size_gb"] = preset["target_size_gb"]
+            config["output_dir"] = output_dir
+            config["nested_source"] = {
+                "file": source,
+                "bytes": cut["offset"],
+                "cases": cut["cases"],
+                "events": cut["events"],
+            }
+            with open(os.path.join(output_dir, "generation_config.json"), "w") as f:
+                json.dump(config, f, indent=2, default=str)
+            if self.stats is not None:
+                snapshot = self.stats.snapshots.get(cut["cases"])
+                if snapshot is None and cut["cases"] == self.stats.cases:
+                    # Срез в конце файла — статистика всего датасета
+                    snapshot = self.stats.to_dict()
+                if snapshot is not None:
+                    self.stats.save(os.path.join(output_dir, STATS_FILENAME), snapshot)
+
+            self.logger.info(
+                "Вложенный пресет %s: %s (%.3f GB, %d кейсов, %d событий, %s)",
+                preset["name"],
+                path,
+                cut["offset"] / 1024 ** 3,
+                cut["cases"],
+                cut["events"],
+                method,
+            )
 
 
 def parse_arguments():
@@ -176,49 +866,234 @@ def parse_arguments():
         "--config",
         type=str,
         default="1GB",
-        choices=["50MB", "500MB", "750MB", "1GB", "5GB", "10GB", "20GB", "30GB", "50GB", "custom"],
-        help="Конфигурация для генерации",
+        help="Конфигурация: 50MB, 500MB, 750MB, 1GB, 5GB, 10GB, 20GB, 30GB, 50GB, custom; "
+        "список через запятую (50MB,1GB,10GB) — вложенные пресеты за один проход",
+    )
+    parser.add_argument(
+        "--nested",
+        action="store_true",
+        help="Вместе с --config получить все меньшие пресеты с той же смесью процессов",
     )
     parser.add_argument(
         "--size", type=float, help="Кастомный размер в GB (только для --config custom)"
     )
-    parser.add_argument("--output", type=str, help="Кастомная выходная директория")
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Кастомная выходная директория, '-' (stdout) или fifo:<path> (именованный канал)",
+    )
     parser.add_argument("--seed", type=int, default=None, help="Seed для воспроизводимости результатов")
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=["csv", "binary", "parquet", "xes", "sqlite"],
+        help="Формат вывода: csv, binary (фиксированная ширина, numpy.memmap), parquet, xes или sqlite",
+    )
+    parser.add_argument(
+        "--compress",
+        type=str,
+        default=None,
+        choices=["gzip"],
+        help="Сжатие CSV: gzip (параллельно, блоками, multi-member gzip)",
+    )
+    parser.add_argument(
+        "--size-target",
+        type=str,
+        default="uncompressed",
+        choices=["uncompressed", "compressed"],
+        help="К какому размеру относится target_size_gb при --compress",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Число потоков сжатия (по умолчанию — число CPU)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Генерация батчей в N процессах; один файл, побайтово одинаковый при любом N",
+    )
+    parser.add_argument(
+        "--region-write",
+        action="store_true",
+        help="С --processes: воркеры пишут батчи сами (pwrite в размеченный файл)",
+    )
+    parser.add_argument(
+        "--stream-format",
+        type=str,
+        default="csv",
+        choices=STREAM_FORMATS,
+        help="Формат при --output -/fifo: csv, postgres (COPY text), clickhouse (TabSeparated)",
+    )
+    parser.add_argument(
+        "--sort-by-time",
+        action="store_true",
+        help="Глобальная сортировка событий по timestamp_start (внешняя сортировка слиянием)",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="batch",
+        choices=["batch", "simulation"],
+        help="batch — батчи кейсов; simulation — пуассоновский поток кейсов, события по времени",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_memory_size,
+        default=None,
+        help="Лимит памяти: 512M, 2G (число без суффикса — MB); батчи подбираются под лимит",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Кэш датасетов: при совпадении конфига, seed и версии файлы берутся из кэша",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=parse_memory_size,
+        default=None,
+        help="Лимит размера кэша (50G, 500M); старые записи вытесняются (LRU)",
+    )
+    parser.add_argument(
+        "--case-index",
+        action="store_true",
+        help="Sidecar <csv>.idx: case_id -> байтовое смещение и число событий (case_index.CaseIndex)",
+    )
+    parser.add_argument(
+        "--zone-maps",
+        type=parse_memory_size,
+        nargs="?",
+        const=DEFAULT_ZONE_BYTES,
+        default=None,
+        help="Sidecar <csv>.zones.json: min/max времени, case_id, процессы по зонам (по умолчанию 8M)",
+    )
+    parser.add_argument(
+        "--no-stats",
+        action="store_true",
+        help=f"Не считать агрегаты во время генерации и не писать {STATS_FILENAME}",
+    )
+    parser.add_argument(
+        "--write-buffer",
+        type=parse_memory_size,
+        default=None,
+        help="Буфер записи CSV, файл открыт на весь прогон (8M по умолчанию)",
+    )
+    parser.add_argument(
+        "--preallocate",
+        action="store_true",
+        help="posix_fallocate под целевой размер, обрезка до записанного в конце",
+    )
+    parser.add_argument(
+        "--layout",
+        type=str,
+        default="flat",
+        choices=["flat", "normalized"],
+        help="flat — один CSV; normalized — events.csv + cases.csv",
+    )
+    parser.add_argument(
+        "--encode-categories",
+        action="store_true",
+        help="Писать категориальные колонки целыми кодами (словари в categories.json)",
+    )
+
+    args = parser.parse_args()
+    names = args.config.split(",")
+    for name in names:
+        if name not in CONFIG_MAP and not (name == "custom" and len(names) == 1):
+            parser.error(f"invalid --config: {args.config}")
+    if args.nested and (len(names) > 1 or args.config == "custom"):
+        parser.error("--nested takes a single preset --config")
+    return args
+
 
-    return parser.parse_args()
+def nested_preset_names(args) -> list:
+    """Пресеты для вложенной генерации по возрастанию размера (пусто — обычный режим)"""
+    names = args.config.split(",")
+    if args.nested:
+        largest = CONFIG_MAP[args.config]
+        names = [
+            name for name, preset in CONFIG_MAP.items()
+            if preset["target_size_gb"] <= largest["target_size_gb"]
+            and all(preset[key] == largest[key] for key in NESTED_SHARED_KEYS)
+        ]
+    if len(names) < 2:
+        return []
+    return sorted(set(names), key=lambda name: CONFIG_MAP[name]["target_size_gb"])
 
 
 def main():
     args = parse_arguments()
 
-    # Инициализация логгера
-    logger = get_logger()
+    # Инициализация логгера: при выводе данных в stdout логи идут в stderr
+    stream_output = is_stream_target(args.output)
+    logger = get_logger(stream=sys.stderr if stream_output else None)
 
     # Выбор конфигурации
-    CONFIG_MAP = {
-        "50MB": CONFIG_50MB,
-        "500MB": CONFIG_500MB,
-        "750MB": CONFIG_750MB,
-        "1GB": CONFIG_1GB,
-        "5GB": CONFIG_5GB,
-        "10GB": CONFIG_10GB,
-        "20GB": CONFIG_20GB,
-        "30GB": CONFIG_30GB,
-        "50GB": CONFIG_50GB,
-    }
-
-    if args.config in CONFIG_MAP:
+    nested = nested_preset_names(args)
+    if nested:
+        # Генерируется самый большой, меньшие — его префиксы
+        check_nested_presets({name: CONFIG_MAP[name] for name in reversed(nested)})
+        config = CONFIG_MAP[nested[-1]].copy()
+        config["nested_presets"] = [
+            {
+                "name": name,
+                "target_size_gb": CONFIG_MAP[name]["target_size_gb"],
+                "output_dir": (
+                    os.path.join(args.output, f"dataset_{name.lower()}")
+                    if args.output
+                    else CONFIG_MAP[name]["output_dir"]
+                ),
+            }
+            for name in nested[:-1]
+        ]
+    elif args.config in CONFIG_MAP:
         config = CONFIG_MAP[args.config].copy()
     else:
         config = CONFIG_1GB.copy()
         if args.size:
             config["target_size_gb"] = args.size
 
-    if args.output:
+    if stream_output:
+        config["output_dir"] = None
+        config["stream_output"] = args.output
+        config["stream_format"] = args.stream_format
+    elif nested:
+        config["output_dir"] = (
+            os.path.join(args.output, f"dataset_{nested[-1].lower()}")
+            if args.output
+            else config["output_dir"]
+        )
+    elif args.output:
         config["output_dir"] = args.output
     else:
         config["output_dir"] = "./dataset/"
 
+    config["format"] = args.format
+    config["layout"] = args.layout
+    config["compress"] = args.compress
+    config["size_target"] = args.size_target
+    if args.workers is not None:
+        config["workers"] = args.workers
+    if args.processes is not None:
+        config["processes"] = args.processes
+    config["region_write"] = args.region_write
+    config["encode_categories"] = args.encode_categories
+    config["sort_by_time"] = args.sort_by_time
+    config["engine"] = args.engine
+    config["case_index"] = args.case_index
+    config["dataset_stats"] = not args.no_stats
+    if args.zone_maps is not None:
+        config["zone_map_bytes"] = args.zone_maps
+    config["preallocate"] = args.preallocate
+    if args.write_buffer is not None:
+        config["write_buffer_bytes"] = args.write_buffer
+    if args.max_memory is not None:
+        config["max_memory_bytes"] = args.max_memory
+
     if args.seed is not None:
         random.seed(args.seed)
         config["seed"] = args.seed
@@ -227,7 +1102,16 @@ def main():
     start_time = time.time()
     try:
         generator = ProcessMiningGenerator(config, logger)
-        generator.generate_data()
+        if args.cache_dir and not stream_output:
+            cache = DatasetCache(args.cache_dir, args.cache_max_size, logger)
+            generator.generate_or_restore(cache)
+        else:
+            generator.generate_data()
+    except BrokenPipeError:
+        # Читатель закрыл поток (например, `| head`) — штатное завершение
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        logger.warning("Получатель закрыл поток, генерация остановлена")
     except Exception as e:
         logger.error("Ошибка: %s", e)
         import traceback
@@ -0,0 +1,213 @@
+import os
+import sys
+from typing import List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Сброс батча в writer, когда RSS доходит до этой доли лимита
+MEMORY_SPILL_THRESHOLD = 0.85
+# После сброса следующий — только если RSS вырос еще на эту долю лимита:
+# CPython редко возвращает освобожденную память ОС, и RSS остается у порога
+SPILL_REARM_SHARE = 0.05
+# Доля свободного бюджета (лимит минус RSS на старте) под буферизованный батч
+BATCH_MEMORY_SHARE = 0.5
+# Кейсов между проверками RSS внутри батча (не больше)
+SPILL_CHECK_CASES = 500
+# Доля запаса до лимита, которую может занять порция кейсов между проверками
+CHECK_HEADROOM_SHARE = 0.25
+# Оценка до первого замера: объект события + строка в буфере writer
+DEFAULT_EVENT_BYTES = 1024
+_EVENT_SAMPLE = 200
+
+_SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_memory_size(value: str) -> int:
+    """'512M', '2G', '1.5G' -> байты; число без суффикса — мегабайты"""
+    text = str(value).strip().upper().rstrip("B")
+    multiplier = _SIZE_SUFFIXES["M"]
+    if text and text[-1] in _SIZE_SUFFIXES:
+        multiplier = _SIZE_SUFFIXES[text[-1]]
+        text = text[:-1]
+    try:
+        size = float(text)
+    except ValueError:
+        raise ValueError(f"Invalid memory size: {value}")
+    if size <= 0:
+        raise ValueError(f"Invalid memory size: {value}")
+    return int(size * multiplier)
+
+
+def current_rss() -> int:
+    """Текущий RSS процесса в байтах (/proc на Linux, иначе пиковый)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """Пиковый RSS процесса в байтах (0, если платформа не сообщает)"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает в килобайтах, macOS — в байтах
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def event_footprint(events: List) -> int:
+    """Средний размер события в памяти по выборке: запись, даты и доля атрибутов кейса"""
+    sample = events[:_EVENT_SAMPLE]
+    if not sample:
+        return 0
+    total = 0
+    cases = {}
+    for event in sample:
+        # + указатель в списке батча
+        total += (
+            sys.getsizeof(event)
+            + sys.getsizeof(event.start_ts)
+            + sys.getsizeof(event.end_ts)
+            + 8
+        )
+        case = getattr(event, "case", None)
+        if case is not None and id(case) not in cases:
+            cases[id(case)] = sys.getsizeof(case) + sys.getsizeof(case.cost)
+    total += sum(cases.values())
+    return total // len(sample)
+
+
+class MemoryBudget:
+    """Жесткий лимит памяти для генерации (--max-memory).
+
+    Размер батча выбирается из измеренных байт на буферизованное событие
+    (объект в памяти + его строка в буфере writer), а если RSS все же
+    подходит к лимиту — батч сбрасывается в writer досрочно. Между
+    проверками RSS внутри батча генерируется не больше кейсов, чем по
+    оценке помещается в четверть оставшегося запаса до лимита. Память,
+    которая наберется за прогон независимо от батча (кэши и буферы
+    writer), резервируется заранее через reserve(). RSS зависит и от
+    аллокатора, поэтому превышение не исключено — report() о нем
+    предупреждает.
+    """
+
+    def __init__(self, limit_bytes: int, logger):
+        self.limit_bytes = limit_bytes
+        self.logger = logger
+        self.baseline_rss = current_rss()
+        if self.baseline_rss >= limit_bytes * MEMORY_SPILL_THRESHOLD:
+            raise ValueError(
+                f"--max-memory {limit_bytes // 1024 ** 2}MB is below the process "
+                f"baseline ({self.baseline_rss // 1024 ** 2}MB RSS)"
+            )
+        self.event_bytes = DEFAULT_EVENT_BYTES
+        # Память вне батча, которая еще вырастет до этого размера (reserve)
+        self.reserved_bytes = 0
+        self._measured = False
+        self.batches_capped = 0
+        self.spills = 0
+        # RSS в момент последнего досрочного сброса
+        self._spill_rss = None
+        self.exceeded = False
+
+    def reserve(self, nbytes: int):
+        """Вычитает из бюджета батча память, которую прогон займет помимо него"""
+        self.reserved_bytes += nbytes
+
+    def max_events(self) -> int:
+        """Сколько событий можно держать в буфере батча"""
+        free = self.limit_bytes - self.baseline_rss - self.reserved_bytes
+        budget = max(0, free) * BATCH_MEMORY_SHARE
+        return max(100, int(budget / self.event_bytes))
+
+    def cap_cases(self, batch_cases: int, events_per_case: float = 6.0) -> int:
+        """Ограничивает размер батча в кейсах под бюджет"""
+        limit = max(1, int(self.max_events() / events_per_case))
+        if batch_cases > limit:
+            self.batches_capped += 1
+            return limit
+        return batch_cases
+
+    def cap_events(self, batch_events: int) -> int:
+        """Ограничивает размер батча в событиях под бюджет"""
+        limit = self.max_events()
+        if batch_events > limit:
+            self.batches_capped += 1
+            return limit
+        return batch_events
+
+    def check_cases(self, events_per_case: float = 6.0) -> int:
+        """Сколько кейсов сгенерировать до следующей проверки should_spill.
+
+        Оценка порции (кейсы x события x байт на событие) не превышает
+        CHECK_HEADROOM_SHARE запаса между RSS и лимитом, поэтому батч не
+        проскакивает лимит между замерами; у лимита — по одному кейсу.
+        Резерв вычитается целиком, даже если кэши уже частично заполнены.
+        """
+        headroom = self.limit_bytes - current_rss() - self.reserved_bytes
+        cases = headroom * CHECK_HEADROOM_SHARE / (self.event_bytes * events_per_case)
+        return max(1, min(SPILL_CHECK_CASES, int(cases)))
+
+    def observe(self, events: List, bytes_written: int):
+        """Уточняет байты на событие по записанному батчу.
+
+        Первый замер заменяет априорную оценку, дальше берется максимум —
+        длинные кейсы (HRRecruitment) не должны занижать оценку.
+        """
+        if not events:
+            return
+        measured = event_footprint(events) + bytes_written // len(events)
+        if self._measured:
+            self.event_bytes = max(self.event_bytes, measured)
+        else:
+            self.event_bytes = measured
+            self._measured = True
+
+    def should_spill(self) -> bool:
+        """RSS подошел к лимиту — пора сбросить буфер в writer.
+
+        После сброса порог переносится на RSS сброса плюс
+        SPILL_REARM_SHARE лимита: освобожденная батчем память переиспользуется
+        аллокатором, но в RSS не уходит, и без гистерезиса сбрасывался бы
+        каждый следующий кусок. Выше самого лимита сброс — при любом
+        росте RSS с прошлого сброса: если RSS не растет, буфер умещается
+        в уже занятую память, и сброс на каждом кейсе ничего не дает.
+        """
+        rss = current_rss()
+        if rss < self.limit_bytes * MEMORY_SPILL_THRESHOLD:
+            return False
+        if self._spill_rss is not None:
+            rearm = 0 if rss >= self.limit_bytes else self.limit_bytes * SPILL_REARM_SHARE
+            if rss <= self._spill_rss + rearm:
+                return False
+        self._spill_rss = rss
+        self.spills += 1
+        return True
+
+    def report(self) -> bool:
+        """Итог по памяти; False — пиковый RSS вышел за лимит"""
+        peak = peak_rss()
+        self.exceeded = peak > self.limit_bytes
+        self.logger.info(
+            "Память: пик RSS %.1f MB, лимит %.1f MB, %d байт/событие",
+            peak / 1024 ** 2,
+            self.limit_bytes / 1024 ** 2,
+            self.event_bytes,
+        )
+        self.logger.info(
+            "Адаптация: %d батчей уменьшено под лимит, %d досрочных сбросов",
+            self.batches_capped,
+            self.spills,
+        )
+        if self.exceeded:
+            over = peak - self.limit_bytes
+            self.logger.warning(
+                "Лимит --max-memory НЕ выдержан: пиковый RSS больше на %.1f MB (%.1f%%)",
+                over / 1024 ** 2,
+                over / self.limit_bytes * 100,
+            )
+        return not self.exceeded
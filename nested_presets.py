@@ -0,0 +1,120 @@
+import os
+from typing import Dict, List, Optional
+
+# Ключи пресета, которые должны совпадать, чтобы меньший датасет был префиксом большего
+NESTED_SHARED_KEYS = ("process_distribution", "anomaly_rate", "rework_rate")
+# Батч не крупнее этой доли ближайшей меньшей цели — срез по кейсу не искажает смесь
+NESTED_BATCH_SHARE = 0.05
+_COPY_CHUNK = 8 * 1024 * 1024
+
+
+def check_nested_presets(presets: Dict[str, Dict]):
+    """Пресеты вкладываются, только если смесь процессов и доли аномалий/rework общие"""
+    names = list(presets)
+    base = presets[names[0]]
+    for name in names[1:]:
+        for key in NESTED_SHARED_KEYS:
+            if presets[name][key] != base[key]:
+                raise ValueError(
+                    f"Nested presets must share {key}: {names[0]} and {name} differ"
+                )
+
+
+def copy_prefix(src: str, dst: str, length: int) -> str:
+    """Копирует первые length байт src в новый файл dst; возвращает способ.
+
+    copy_file_range копирует в ядре, а на btrfs/xfs/NFS разделяет экстенты
+    (reflink), не дублируя данные; иначе — обычное чтение и запись.
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    copied = 0
+    method = "copy"
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < length:
+                    n = os.copy_file_range(
+                        fsrc.fileno(), fdst.fileno(), length - copied, copied, copied
+                    )
+                    if n == 0:
+                        break
+                    copied += n
+                method = "copy_file_range"
+            except OSError:
+                # Ядро или ФС не поддерживает — докопируем с того же места
+                pass
+        fsrc.seek(copied)
+        fdst.seek(copied)
+        while copied < length:
+            chunk = fsrc.read(min(_COPY_CHUNK, length - copied))
+            if not chunk:
+                break
+            fdst.write(chunk)
+            copied += len(chunk)
+    return method
+
+
+class PrefixCutter:
+    """Точки среза меньших датасетов внутри одного большого CSV.
+
+    Наблюдатель байтового пути CSVWriter: для каждого порога (целевой
+    размер меньшего пресета) запоминает первую границу кейса, на которой
+    размер файла достиг порога, — смещение, число кейсов и событий.
+    Префикс файла до этого смещения — готовый меньший датасет.
+    """
+
+    def __init__(self, thresholds: List[int]):
+        self.thresholds = sorted(thresholds)
+        # порог -> {"offset", "cases", "events"}
+        self.cuts: Dict[int, Dict] = {}
+        self.offset = 0
+        self._pending = 0
+        self._cases = 0
+        self._events = 0
+        self._case_id = None
+
+    @property
+    def next_threshold(self) -> Optional[int]:
+        """Ближайший еще не достигнутый порог"""
+        if self._pending < len(self.thresholds):
+            return self.thresholds[self._pending]
+        return None
+
+    def start(self, offset: int):
+        self.offset = offset
+        self.cuts = {}
+        self._pending = 0
+        self._cases = 0
+        self._events = 0
+        self._case_id = None
+
+    def add_rows(self, events: List, rows: List[bytes]):
+        if self._pending >= len(self.thresholds):
+            # Все срезы найдены — дальше только смещение
+            self.offset += sum(map(len, rows))
+            return
+        for event, row in zip(events, rows):
+            if event.case_id != self._case_id:
+                self._cut_at_boundary()
+                self._case_id = event.case_id
+                self._cases += 1
+            self._events += 1
+            self.offset += len(row)
+
+    def _cut_at_boundary(self):
+        while (
+            self._pending < len(self.thresholds)
+            and self.offset >= self.thresholds[self._pending]
+        ):
+            self.cuts[self.thresholds[self._pending]] = {
+                "offset": self.offset,
+                "cases": self._cases,
+                "events": self._events,
+            }
+            self._pending += 1
+
+    def close(self):
+        """Конец файла — тоже граница кейса"""
+        if self._pending < len(self.thresholds):
+            self._cut_at_boundary()
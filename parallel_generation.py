@@ -0,0 +1,397 @@
+import array
+import errno
+import multiprocessing
+import os
+import pickle
+import random
+import struct
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from case_generator import CaseGenerator
+from csv_writer import CSVWriter
+from dataset_stats import DatasetStats
+from shm_ring import ShmRing
+from utils import distribute_processes
+
+# Кейсов в батче параллельного режима (~2.5 MB CSV)
+PARALLEL_BATCH_CASES = 2000
+# Кольцо на воркер: окно переупорядочивания — slots × slot_bytes на процесс
+PARALLEL_RING_SLOTS = 8
+PARALLEL_SLOT_BYTES = 1024 * 1024
+# Сколько ждать данных воркера, прежде чем проверить, что он жив
+_POLL_SECONDS = 1.0
+
+# Заголовок метаданных батча: номер, кейсов, событий
+_META = struct.Struct("<QII")
+# Ответ воркеру в режиме --region-write: смещение в файле, байт записать (-1 — стоп)
+_PLACEMENT = struct.Struct("<qq")
+
+
+class BatchFactory:
+    """Батч k — функция только от (seed, k), а не от порядка генерации.
+
+    Перед батчем random и поток выбора сотрудников пула пересеиваются
+    от (seed, k), счетчик кейсов ставится на k * batch_cases + 1. Поэтому
+    любой процесс собирает батч k побайтово одинаково, а case_id батчей
+    идут подряд без пропусков.
+    """
+
+    def __init__(self, config: Dict, resource_pool, seed,
+                 batch_cases: int = PARALLEL_BATCH_CASES):
+        self.config = config
+        self.seed = seed
+        self.batch_cases = batch_cases
+        self.resource_pool = resource_pool
+        self.generator = CaseGenerator(resource_pool=resource_pool)
+        self.writer = CSVWriter(None, vocabulary=self.generator.vocabulary)
+        self.start_date = datetime.strptime(config["start_date"], "%Y-%m-%d")
+        self.time_range_days = config.get("time_range_days", 365 * 2)
+
+    def events(self, k: int) -> List:
+        """События батча k: кейсы процессов по весам, у каждого процесса свой день старта"""
+        random.seed(f"{self.seed}/{k}")
+        self.resource_pool.reseed(f"{self.seed}/{k}/resources")
+        self.generator.reset_case_counter(1 + k * self.batch_cases)
+        events = []
+        process_counts = distribute_processes(
+            self.config["process_distribution"], self.batch_cases
+        )
+        for proc_name, proc_cases in process_counts.items():
+            if proc_cases <= 0:
+                continue
+            proc_start = self.start_date + timedelta(
+                days=random.randint(0, self.time_range_days)
+            )
+            events.extend(self.generator.generate_multiple_cases(
+                process_name=proc_name,
+                num_cases=proc_cases,
+                start_time=proc_start,
+                anomaly_rate=self.config["anomaly_rate"],
+                rework_rate=self.config["rework_rate"],
+            ))
+        return events
+
+    def serialize(self, k: int, with_stats: bool) -> Tuple[bytes, List[bytes]]:
+        """(метаданные, строки CSV) батча k.
+
+        Метаданные: заголовок, байтовые концы кейсов и число событий
+        до конца каждого кейса (по ним читатель режет последний батч по
+        границе кейса), затем pickle агрегатов DatasetStats батча.
+        """
+        events = self.events(k)
+        rows = list(map(self.writer._event_to_bytes, events))
+        case_ends = array.array("Q")
+        case_events = array.array("Q")
+        offset = 0
+        last = len(events) - 1
+        for i, row in enumerate(rows):
+            offset += len(row)
+            if i == last or events[i + 1].case_id != events[i].case_id:
+                case_ends.append(offset)
+                case_events.append(i + 1)
+        stats = b""
+        if with_stats:
+            batch_stats = DatasetStats()
+            batch_stats.add_events(events)
+            batch_stats.finish_cases()
+            stats = pickle.dumps(batch_stats, protocol=pickle.HIGHEST_PROTOCOL)
+        meta = b"".join((
+            _META.pack(k, len(case_ends), len(events)),
+            case_ends.tobytes(),
+            case_events.tobytes(),
+            stats,
+        ))
+        return meta, rows
+
+
+def _worker(index: int, workers: int, ring: ShmRing, stop, config: Dict,
+            resource_pool, seed, batch_cases: int, with_stats: bool):
+    """Процесс-воркер: батчи index, index + workers, ... в свое кольцо"""
+    factory = BatchFactory(config, resource_pool, seed, batch_cases)
+    try:
+        k = index
+        while not stop.is_set():
+            meta, rows = factory.serialize(k, with_stats)
+            ring.send(meta)
+            ring.send(rows)
+            k += workers
+    finally:
+        ring.send_close()
+        ring.close()
+
+
+def _region_worker(index: int, workers: int, conn, path: str, config: Dict,
+                   resource_pool, seed, batch_cases: int, with_stats: bool):
+    """Воркер --region-write: метаданные батча родителю, строки — pwrite в свой диапазон"""
+    factory = BatchFactory(config, resource_pool, seed, batch_cases)
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        k = index
+        while True:
+            meta, rows = factory.serialize(k, with_stats)
+            conn.send_bytes(meta)
+            offset, limit = _PLACEMENT.unpack(conn.recv_bytes())
+            if limit < 0:
+                break
+            data = memoryview(b"".join(rows))[:limit]
+            while data:
+                written = os.pwrite(fd, data, offset)
+                data = data[written:]
+                offset += written
+            k += workers
+    finally:
+        os.close(fd)
+        conn.close()
+
+
+class ParallelBatch:
+    """Батч воркера: метаданные разобраны; строки читаются из кольца на месте
+    (ParallelBatchPipeline) или пишутся воркером в файл (RegionWritePipeline)"""
+
+    def __init__(self, pipeline, worker: int, meta: bytes):
+        self._pipeline = pipeline
+        self._worker = worker
+        self.number, self.cases, self.events = _META.unpack_from(meta)
+        pos = _META.size
+        self.case_ends = array.array("Q", meta[pos:pos + 8 * self.cases])
+        pos += 8 * self.cases
+        self.case_events = array.array("Q", meta[pos:pos + 8 * self.cases])
+        pos += 8 * self.cases
+        self.stats: Optional[DatasetStats] = pickle.loads(meta[pos:]) if len(meta) > pos else None
+
+    @property
+    def size(self) -> int:
+        return self.case_ends[-1] if self.cases else 0
+
+    def cases_within(self, limit: int) -> int:
+        """Сколько первых кейсов взять: до первого, на котором набирается limit байт"""
+        for i, end in enumerate(self.case_ends):
+            if end >= limit:
+                return i + 1
+        return self.cases
+
+    def rows(self, limit: Optional[int] = None) -> Iterator[memoryview]:
+        """Фрагменты строк как memoryview на кольцо (первые limit байт).
+
+        Остаток сообщения дочитывается и отбрасывается — итератор нужно
+        исчерпать: слоты освобождаются по мере чтения.
+        """
+        remaining = self.size if limit is None else limit
+        for view in self._pipeline.message(self._worker):
+            if remaining <= 0:
+                continue
+            if len(view) > remaining:
+                view = view[:remaining]
+            remaining -= len(view)
+            yield view
+
+
+class ParallelBatchPipeline:
+    """Пул процессов собирает пронумерованные батчи, читатель получает их строго по порядку.
+
+    Батч k собирает воркер k % processes и кладет в свое кольцо в shared
+    memory (shm_ring.ShmRing) — без pickle строк. Читатель обходит кольца
+    по кругу, поэтому батчи выходят по номерам; кольца и есть буфер
+    переупорядочивания: воркер, ушедший вперед, ждет свободного слота, и
+    память ограничена processes × slots × slot_bytes. Процессы запускаются
+    через spawn: в родителе может работать пул потоков сжатия.
+    """
+
+    def __init__(self, config: Dict, resource_pool, processes: int, seed,
+                 with_stats: bool, batch_cases: int = PARALLEL_BATCH_CASES,
+                 ring_slots: int = PARALLEL_RING_SLOTS,
+                 slot_bytes: int = PARALLEL_SLOT_BYTES):
+        ctx = multiprocessing.get_context("spawn")
+        self.rings = [ShmRing(ring_slots, slot_bytes, ctx) for _ in range(processes)]
+        self._stop = ctx.Event()
+        self.processes = [
+            ctx.Process(
+                target=_worker,
+                args=(
+                    index, processes, ring, self._stop, config, resource_pool,
+                    seed, batch_cases, with_stats,
+                ),
+                daemon=True,
+            )
+            for index, ring in enumerate(self.rings)
+        ]
+        self._next = 0
+
+    def __enter__(self):
+        for process in self.processes:
+            process.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _check_alive(self, worker: int):
+        process = self.processes[worker]
+        if not process.is_alive():
+            raise RuntimeError(
+                f"Parallel worker {worker} exited with code {process.exitcode}"
+            )
+
+    def message(self, worker: int) -> Iterator[memoryview]:
+        """Фрагменты следующего сообщения воркера; ждет, пока воркер жив"""
+        ring = self.rings[worker]
+        while True:
+            try:
+                for view in ring.receive(_POLL_SECONDS):
+                    yield view
+                return
+            except TimeoutError:
+                # Таймаут не теряет позицию: следующий receive продолжит сообщение
+                self._check_alive(worker)
+
+    def next_batch(self) -> ParallelBatch:
+        """Следующий по номеру батч; его rows() нужно прочитать до следующего вызова"""
+        worker = self._next % len(self.rings)
+        meta = b"".join(bytes(view) for view in self.message(worker))
+        if self.rings[worker].closed:
+            raise RuntimeError(f"Parallel worker {worker} stopped before batch {self._next}")
+        batch = ParallelBatch(self, worker, meta)
+        if batch.number != self._next:
+            raise RuntimeError(f"Batch {batch.number} arrived instead of {self._next}")
+        self._next += 1
+        return batch
+
+    def close(self):
+        """Останавливает воркеры: недочитанные батчи отбрасываются до маркера конца"""
+        self._stop.set()
+        for worker, ring in enumerate(self.rings):
+            while not ring.closed and self.processes[worker].pid is not None:
+                try:
+                    for _ in ring.receive(_POLL_SECONDS):
+                        pass
+                except TimeoutError:
+                    if not self.processes[worker].is_alive():
+                        break
+        for process in self.processes:
+            if process.pid is not None:
+                process.join()
+        for ring in self.rings:
+            ring.close()
+
+
+class RegionWritePipeline:
+    """Воркеры пишут батчи прямо в заранее размеченный файл через os.pwrite.
+
+    Батч k по-прежнему собирает воркер k % processes, но строки не
+    покидают воркер: он присылает только метаданные (размеры кейсов,
+    агрегаты), а родитель в порядке номеров выдает ему диапазон
+    [offset, offset + limit) сразу за предыдущим батчем. Размер батча
+    известен до записи, поэтому диапазоны прилегают друг к другу — ни
+    заполнителей на стыках, ни уплотнения в конце не нужно. Записи идут
+    параллельно из всех воркеров; место под цель резервируется
+    posix_fallocate, при закрытии файл обрезается до записанного. Байты
+    совпадают с ParallelBatchPipeline при том же seed.
+    """
+
+    def __init__(self, path: str, header: bytes, preallocate: int, config: Dict,
+                 resource_pool, processes: int, seed, with_stats: bool,
+                 batch_cases: int = PARALLEL_BATCH_CASES, logger=None):
+        self.path = path
+        self.written = 0
+        self._data_start = len(header)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.write(self._fd, header)
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(self._fd, 0, max(preallocate, len(header)))
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                    os.close(self._fd)
+                    os.remove(path)
+                    if e.errno == errno.ENOSPC:
+                        raise Exception(
+                            f"Недостаточно места: не удалось зарезервировать "
+                            f"{preallocate / 1024 ** 3:.1f} GB под {path}"
+                        ) from e
+                    raise
+                # Файловая система без fallocate — пишем без резерва
+                if logger is not None:
+                    logger.warning("posix_fallocate недоступен для %s: %s", path, e)
+        ctx = multiprocessing.get_context("spawn")
+        pipes = [ctx.Pipe() for _ in range(processes)]
+        self.conns = [parent for parent, _ in pipes]
+        self.processes = [
+            ctx.Process(
+                target=_region_worker,
+                args=(
+                    index, processes, child, path, config, resource_pool,
+                    seed, batch_cases, with_stats,
+                ),
+                daemon=True,
+            )
+            for index, (_, child) in enumerate(pipes)
+        ]
+        self._child_conns = [child for _, child in pipes]
+        self._next = 0
+        self._stopped = set()
+        # Воркеры, чьи метаданные получены, а диапазон еще не выдан
+        self._awaiting = set()
+
+    def __enter__(self):
+        for process in self.processes:
+            process.start()
+        for conn in self._child_conns:
+            conn.close()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _receive(self, worker: int) -> bytes:
+        conn = self.conns[worker]
+        while not conn.poll(_POLL_SECONDS):
+            if not self.processes[worker].is_alive():
+                break
+        try:
+            return conn.recv_bytes()
+        except (EOFError, OSError):
+            self._stopped.add(worker)
+            process = self.processes[worker]
+            process.join()
+            raise RuntimeError(
+                f"Parallel worker {worker} exited with code {process.exitcode}"
+            )
+
+    def next_batch(self) -> ParallelBatch:
+        """Метаданные следующего по номеру батча; ответить place() до следующего вызова"""
+        worker = self._next % len(self.conns)
+        batch = ParallelBatch(self, worker, self._receive(worker))
+        if batch.number != self._next:
+            raise RuntimeError(f"Batch {batch.number} arrived instead of {self._next}")
+        self._next += 1
+        self._awaiting.add(worker)
+        return batch
+
+    def place(self, batch: ParallelBatch, limit: int):
+        """Отдает батчу диапазон файла сразу за предыдущим; воркер пишет первые limit байт"""
+        offset = self._data_start + self.written
+        self.conns[batch._worker].send_bytes(_PLACEMENT.pack(offset, limit))
+        self._awaiting.discard(batch._worker)
+        self.written += limit
+
+    def close(self):
+        """Останавливает воркеры (их следующий батч отбрасывается) и обрезает файл"""
+        for worker, conn in enumerate(self.conns):
+            if worker in self._stopped or self.processes[worker].pid is None:
+                continue
+            try:
+                if worker not in self._awaiting:
+                    self._receive(worker)
+                conn.send_bytes(_PLACEMENT.pack(0, -1))
+            except (RuntimeError, OSError):
+                pass
+        for process in self.processes:
+            if process.pid is not None:
+                process.join()
+        for conn in self.conns:
+            conn.close()
+        if self._fd is not None:
+            os.ftruncate(self._fd, self._data_start + self.written)
+            os.close(self._fd)
+            self._fd = None
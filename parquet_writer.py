@@ -0,0 +1,137 @@
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from constants import CSV_FIELD_NAMES
+from epoch_time import to_epoch
+from event_record import Event
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow — опциональная зависимость (extra "parquet")
+    pa = None
+    pq = None
+
+# Колонки с dictionary encoding в Parquet
+PARQUET_DICTIONARY_FIELDS = [
+    "process", "activity", "role", "resource", "resource_id",
+    "anomaly_type", "user_id", "department", "priority", "comment",
+]
+
+# Колонки времени: строятся из int64 epoch-секунд, без datetime на событие
+_TIMESTAMP_INDEXES = {
+    CSV_FIELD_NAMES.index("timestamp_start"),
+    CSV_FIELD_NAMES.index("timestamp_end"),
+}
+
+# Максимум строк в одной row group — ограничивает память на батч
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+
+def parquet_schema():
+    # Parquet не хранит секундную точность — TIMESTAMP(MILLIS)
+    return pa.schema([
+        ("case_id", pa.int64()),
+        ("timestamp_start", pa.timestamp("ms")),
+        ("timestamp_end", pa.timestamp("ms")),
+        ("process", pa.string()),
+        ("activity", pa.string()),
+        ("duration_minutes", pa.int32()),
+        ("role", pa.string()),
+        ("resource", pa.string()),
+        ("resource_id", pa.string()),
+        ("anomaly", pa.bool_()),
+        ("anomaly_type", pa.string()),
+        ("rework", pa.bool_()),
+        ("user_id", pa.string()),
+        ("department", pa.string()),
+        ("priority", pa.string()),
+        ("cost", pa.float64()),
+        ("comment", pa.string()),
+    ])
+
+
+class ParquetWriter:
+    """Потоковая запись событий в Parquet: каждый батч — row group(s).
+
+    Файл остается открытым между батчами и закрывается в close(),
+    которая дописывает footer.
+    """
+
+    def __init__(self, logger, compression: str = "snappy",
+                 row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        if pa is None:
+            raise ImportError(
+                "pyarrow is required for Parquet output: pip install -e \".[parquet]\""
+            )
+        self.logger = logger
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.schema = parquet_schema()
+        self.filepath: Optional[str] = None
+        self._sink = None
+        self._writer = None
+
+    @property
+    def bytes_written(self) -> int:
+        """Байт записано в файл (без footer, пока файл не закрыт)"""
+        if self._sink is not None:
+            return self._sink.tell()
+        if self.filepath and os.path.exists(self.filepath):
+            return os.path.getsize(self.filepath)
+        return 0
+
+    def write_events_to_parquet(self, events: List, filepath: str, mode: str = "w"):
+        """Записывает батч событий как row group"""
+        if mode == "a":
+            if self._writer is None or filepath != self.filepath:
+                raise ValueError("Parquet file can only be appended while it is open")
+        else:
+            self.close()
+            self._open(filepath)
+
+        self.logger.info("Запись %d событий в Parquet (mode: %s)...", len(events), mode)
+
+        for start in range(0, len(events), self.row_group_size):
+            table = self._to_table(events[start:start + self.row_group_size])
+            self._writer.write_table(table)
+
+    def close(self):
+        """Дописывает footer и закрывает файл"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def _open(self, filepath: str):
+        self.filepath = filepath
+        self._sink = pa.OSFile(filepath, "wb")
+        self._writer = pq.ParquetWriter(
+            self._sink,
+            self.schema,
+            compression=self.compression,
+            use_dictionary=PARQUET_DICTIONARY_FIELDS,
+        )
+
+    def _to_table(self, events: List):
+        rows = [_epoch_values(e) for e in events]
+        columns = list(zip(*rows)) if rows else [()] * len(CSV_FIELD_NAMES)
+        arrays = [
+            pa.array(column, type=pa.int64()).cast(pa.timestamp("s")).cast(field.type)
+            if i in _TIMESTAMP_INDEXES else pa.array(column, type=field.type)
+            for i, (column, field) in enumerate(zip(columns, self.schema))
+        ]
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+
+def _epoch_values(event) -> tuple:
+    """Значения в порядке CSV_FIELD_NAMES, время — epoch-секунды"""
+    if isinstance(event, Event):
+        return event.to_epoch_values()
+    return tuple(
+        to_epoch(value) if isinstance(value, datetime) else value
+        for value in (event.get(field) for field in CSV_FIELD_NAMES)
+    )
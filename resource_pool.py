@@ -1,4 +1,6 @@
+import copy
 import random
+import sys
 from typing import Dict, Optional
 
 # English names for broad compatibility (MIT-licensed open-source project)
@@ -45,6 +47,9 @@ _ROLE_DEPARTMENTS = {
     "Coordinator": ["Operations", "Sales"],
 }
 
+_SYSTEM_RECORD = {"resource_id": "SYSTEM", "resource_name": "System", "efficiency": 1.0}
+_UNKNOWN_RECORD = {"resource_id": "UNKNOWN", "resource_name": "Unknown", "efficiency": 1.0}
+
 
 class ResourcePool:
     """Pool of employees with persistent identities."""
@@ -53,6 +58,8 @@ class ResourcePool:
         self._rng = random.Random(seed)
         self.employees: Dict[str, Dict] = {}
         self._by_role: Dict[str, list] = {}
+        # Shared read-only records returned by get_employee (no dict per event)
+        self._records: Dict[str, Dict] = {}
         self._generate_employees()
 
     def _generate_employees(self):
@@ -76,38 +83,42 @@ class ResourcePool:
                     "efficiency": efficiency,
                 }
                 self._by_role[role].append(eid)
+                self._records[eid] = {
+                    "resource_id": sys.intern(eid),
+                    "resource_name": sys.intern(name),
+                    "efficiency": efficiency,
+                }
                 emp_id += 1
 
+    def fork(self) -> "ResourcePool":
+        """Copy with the same employees and its own choice stream."""
+        clone = copy.copy(self)
+        clone._rng = random.Random()
+        clone._rng.setstate(self._rng.getstate())
+        return clone
+
+    def reseed(self, seed) -> None:
+        """Restarts the employee-choice stream; the employees themselves stay the same."""
+        self._rng.seed(seed)
+
     def get_employee(self, role: str) -> Dict:
         """Returns a random employee matching the role.
 
         Returns resource_id, resource_name, and efficiency.
         For "System" role returns a system placeholder.
+        The returned dict is shared between calls and must not be modified.
         """
         if role == "System":
-            return {
-                "resource_id": "SYSTEM",
-                "resource_name": "System",
-                "efficiency": 1.0,
-            }
+            return _SYSTEM_RECORD
 
         candidates = self._by_role.get(role)
         if not candidates:
             # Fall back to any employee
             all_ids = list(self.employees.keys())
             if not all_ids:
-                return {
-                    "resource_id": "UNKNOWN",
-                    "resource_name": "Unknown",
-                    "efficiency": 1.0,
-                }
+                return _UNKNOWN_RECORD
             eid = self._rng.choice(all_ids)
         else:
             eid = self._rng.choice(candidates)
 
-        emp = self.employees[eid]
-        return {
-            "resource_id": eid,
-            "resource_name": emp["name"],
-            "efficiency": emp["efficiency"],
-        }
+        return self._records[eid]
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import struct
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator, Union
+
+# Слотов в кольце и полезных байт в слоте (32 MB разделяемой памяти на кольцо)
+DEFAULT_RING_SLOTS = 8
+DEFAULT_SLOT_BYTES = 4 * 1024 * 1024
+
+# Заголовок слота: длина данных, флаг
+_SLOT_HEADER = struct.Struct("<IB3x")
+_ALIGN = 64
+# Сообщение продолжается в следующем слоте / последний фрагмент / поток закрыт
+_MORE, _END, _CLOSE = 0, 1, 2
+
+Payload = Union[bytes, bytearray, memoryview]
+
+
+class ShmRing:
+    """Кольцевой буфер в multiprocessing.shared_memory: один писатель, один читатель.
+
+    Писатель (процесс-воркер) кладет сериализованный батч — байты или
+    список байтовых кусков, например строки CSV, — прямо в слоты без
+    pickle и без склейки; сообщение больше слота занимает несколько слотов
+    подряд. Читатель получает фрагменты как memoryview на разделяемую
+    память и освобождает слот, как только переходит к следующему.
+    Владение слотами — два семафора: свободные (писатель ждет на нем,
+    если читатель отстает — обратное давление) и заполненные. Позиции
+    головы и хвоста локальны для своей стороны, поэтому писатель у кольца
+    ровно один; для нескольких воркеров — по кольцу на воркер.
+
+    Кольцо передается в дочерний процесс аргументом Process (семафоры
+    наследуются только при запуске процесса). Создатель кольца вызывает
+    close() с удалением сегмента, подключившийся — просто close().
+    """
+
+    def __init__(self, slots: int = DEFAULT_RING_SLOTS,
+                 slot_bytes: int = DEFAULT_SLOT_BYTES, ctx=None):
+        if slots < 1 or slot_bytes < 1:
+            raise ValueError("Ring needs at least one slot of at least one byte")
+        ctx = ctx or multiprocessing.get_context()
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._stride = -(-(_SLOT_HEADER.size + slot_bytes) // _ALIGN) * _ALIGN
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * self._stride)
+        self._free = ctx.Semaphore(slots)
+        self._filled = ctx.Semaphore(0)
+        self._owner_pid = os.getpid()
+        self._attach()
+
+    def _attach(self):
+        self._buf = self._shm.buf
+        self._head = 0
+        self._tail = 0
+        self.closed = False
+
+    def __getstate__(self):
+        return (
+            self._shm.name, self.slots, self.slot_bytes, self._stride,
+            self._free, self._filled,
+        )
+
+    def __setstate__(self, state):
+        name, self.slots, self.slot_bytes, self._stride, self._free, self._filled = state
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._owner_pid = None
+        self._attach()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    # --- писатель ---
+
+    def _acquire_slot(self, timeout) -> int:
+        if not self._free.acquire(True, timeout):
+            raise TimeoutError("Ring consumer did not free a slot in time")
+        return self._head * self._stride
+
+    def _publish(self, offset: int, length: int, flag: int):
+        _SLOT_HEADER.pack_into(self._buf, offset, length, flag)
+        self._head = (self._head + 1) % self.slots
+        self._filled.release()
+
+    def send(self, parts: Union[Payload, Iterable[Payload]], timeout=None):
+        """Кладет сообщение: байты или куски, склеиваемые при чтении.
+
+        Каждый кусок копируется прямо в слот с текущего смещения, без
+        промежуточной склейки; кусок больше остатка слота продолжается
+        в следующем. Блокируется, пока читатель не освободит слот
+        (timeout — TimeoutError).
+        """
+        if isinstance(parts, (bytes, bytearray, memoryview)):
+            parts = (parts,)
+        buf = self._buf
+        header = _SLOT_HEADER.size
+        # Текущий слот сообщения и свободное место в нем: [pos, end)
+        offset = None
+        pos = end = 0
+        for part in parts:
+            n = len(part)
+            if pos + n <= end:
+                # Кусок целиком помещается в текущий слот (строки CSV)
+                buf[pos:pos + n] = part
+                pos += n
+                continue
+            view = memoryview(part).cast("B")
+            done = 0
+            while done < n:
+                if pos == end:
+                    if offset is not None:
+                        # Полный слот уходит читателю, только когда есть продолжение
+                        self._publish(offset, end - offset - header, _MORE)
+                    offset = self._acquire_slot(timeout)
+                    pos = offset + header
+                    end = pos + self.slot_bytes
+                k = min(n - done, end - pos)
+                buf[pos:pos + k] = view[done:done + k]
+                pos += k
+                done += k
+        if offset is None:
+            offset = self._acquire_slot(timeout)
+            pos = offset + header
+        self._publish(offset, pos - offset - header, _END)
+
+    def send_close(self, timeout=None):
+        """Маркер конца потока: у читателя receive() вернет пустое сообщение"""
+        self._publish(self._acquire_slot(timeout), 0, _CLOSE)
+
+    # --- читатель ---
+
+    def receive(self, timeout=None) -> Iterator[memoryview]:
+        """Фрагменты следующего сообщения как memoryview на разделяемую память.
+
+        Фрагмент действителен до перехода к следующему: затем слот
+        возвращается писателю. Сообщение нужно дочитать до конца. После
+        маркера конца потока фрагментов нет, а closed становится True.
+        """
+        stride = self._stride
+        while True:
+            if not self._filled.acquire(True, timeout):
+                raise TimeoutError("Ring producer did not fill a slot in time")
+            offset = self._tail * stride
+            length, flag = _SLOT_HEADER.unpack_from(self._buf, offset)
+            if flag == _CLOSE:
+                self._release_slot()
+                self.closed = True
+                return
+            view = self._buf[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + length]
+            try:
+                yield view
+            finally:
+                view.release()
+                self._release_slot()
+            if flag == _END:
+                return
+
+    def receive_bytes(self, timeout=None) -> bytes:
+        """Сообщение целиком (с копированием); b"" и closed после маркера конца"""
+        return b"".join(bytes(view) for view in self.receive(timeout))
+
+    def _release_slot(self):
+        self._tail = (self._tail + 1) % self.slots
+        self._free.release()
+
+    def close(self):
+        """Отключается от сегмента; создатель кольца удаляет его"""
+        if self._buf is None:
+            return
+        self._buf.release()
+        self._buf = None
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            # Не в дочернем процессе после fork: там объект — копия создателя
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
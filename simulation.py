@@ -0,0 +1,168 @@
+import heapq
+import random
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from config import SEASONAL_MULTIPLIERS
+from epoch_time import SECONDS_PER_DAY, to_epoch
+from utils import get_season_epoch
+
+# Событий в одном батче записи (~10000 кейсов пакетного режима)
+SIMULATION_BATCH_EVENTS = 60000
+
+_MINUTES_PER_DAY = 24 * 60
+
+
+class SimulationEngine:
+    """Дискретно-событийная симуляция: события выходят в порядке timestamp_start.
+
+    Поступление кейсов каждого процесса — сезонный пуассоновский поток на
+    всем интервале [start_date, start_date + time_range_days): кандидаты
+    с интенсивностью λ·max(multiplier), принимаются с вероятностью
+    multiplier(t) / max(multiplier) (thinning). Открытые кейсы лежат в
+    куче по времени следующего события; следующее событие кейса
+    генерируется лениво (CaseGenerator.iter_case) только после выдачи
+    предыдущего — O(log n) на событие при любом числе открытых кейсов.
+    """
+
+    def __init__(
+        self,
+        generator,
+        process_distribution: Dict[str, float],
+        start_date: datetime,
+        time_range_days: int,
+        cases_per_day: float,
+        anomaly_rate: float = 0.03,
+        rework_rate: float = 0.08,
+    ):
+        self.generator = generator
+        # Модельное время — epoch-секунды, как и в событиях
+        self.start_ts = to_epoch(start_date)
+        self.end_ts = self.start_ts + time_range_days * SECONDS_PER_DAY
+        self.anomaly_rate = anomaly_rate
+        self.rework_rate = rework_rate
+        self.cases_started = 0
+        # Кейсы, чье последнее событие вышло в последнем next_batch
+        self.finished_case_ids: List[int] = []
+
+        total_weight = sum(process_distribution.values())
+        self._weights = {
+            process: weight / total_weight
+            for process, weight in process_distribution.items()
+            if weight > 0
+        }
+        self._max_multiplier = {
+            process: max(SEASONAL_MULTIPLIERS.get(process, {}).values(), default=1.0)
+            for process in self._weights
+        }
+        self._cases_per_day = cases_per_day
+        self._arrivals_open = True
+        # Элементы кучи: (время, seq, событие | None, итератор кейса | процесс)
+        self._heap: List[tuple] = []
+        self._seq = 0
+        self._open_cases = 0
+        # Процессы с запланированным прибытием и текущее модельное время
+        self._scheduled = set()
+        self._clock = self.start_ts
+
+        for process in self._weights:
+            self._schedule_arrival(process, self.start_ts)
+
+    @property
+    def open_cases(self) -> int:
+        """Кейсы, у которых еще остались невыданные события"""
+        return self._open_cases
+
+    @property
+    def exhausted(self) -> bool:
+        return not self._heap
+
+    def seasonal_factor(self, when: int) -> float:
+        """Во сколько раз сезонность меняет суммарную интенсивность в момент when"""
+        season = get_season_epoch(when)
+        return sum(
+            weight * SEASONAL_MULTIPLIERS.get(process, {}).get(season, 1.0)
+            for process, weight in self._weights.items()
+        )
+
+    def set_arrival_rate(self, cases_per_day: float):
+        """Новая интенсивность поступления (действует со следующего кандидата)"""
+        self._cases_per_day = cases_per_day
+        for process in self._weights:
+            if process not in self._scheduled:
+                self._schedule_arrival(process, self._clock)
+
+    def stop_arrivals(self):
+        """Прекращает поступление новых кейсов; открытые дорабатываются до конца"""
+        if not self._arrivals_open:
+            return
+        self._arrivals_open = False
+        self._scheduled.clear()
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+
+    def next_batch(self, max_events: int) -> List:
+        """До max_events следующих событий в порядке времени начала"""
+        heap = self._heap
+        events = []
+        finished = self.finished_case_ids = []
+        while heap and len(events) < max_events:
+            when, _, event, source = heapq.heappop(heap)
+            self._clock = when
+            if event is None:
+                self._start_case(source, when)
+                continue
+            events.append(event)
+            if not self._advance(source):
+                finished.append(event.case_id)
+        return events
+
+    def _push(self, when: int, event, source):
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, event, source))
+
+    def _schedule_arrival(self, process: str, after: int):
+        """Следующее принятое прибытие процесса после after (thinning)"""
+        if not self._arrivals_open or self._cases_per_day <= 0:
+            return
+        max_multiplier = self._max_multiplier[process]
+        rate_per_minute = (
+            self._cases_per_day * self._weights[process] * max_multiplier / _MINUTES_PER_DAY
+        )
+        multipliers = SEASONAL_MULTIPLIERS.get(process, {})
+        when = after
+        while True:
+            when += round(random.expovariate(rate_per_minute) * 60)
+            if when >= self.end_ts:
+                return
+            multiplier = multipliers.get(get_season_epoch(when), 1.0)
+            if random.random() * max_multiplier < multiplier:
+                break
+        self._scheduled.add(process)
+        self._push(when, None, process)
+
+    def _start_case(self, process: str, when: int):
+        self._scheduled.discard(process)
+        self._schedule_arrival(process, when)
+        self.cases_started += 1
+        self._open_cases += 1
+        self._advance(
+            self.generator.iter_case(
+                process,
+                start_time=when,
+                anomaly_rate=self.anomaly_rate,
+                rework_rate=self.rework_rate,
+            )
+        )
+
+    def _advance(self, case: Iterator) -> bool:
+        """Ставит в очередь следующее событие кейса (события кейса не убывают по времени).
+
+        False — событий больше нет, кейс завершен.
+        """
+        event = next(case, None)
+        if event is None:
+            self._open_cases -= 1
+            return False
+        self._push(event.start_ts, event, case)
+        return True
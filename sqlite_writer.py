@@ -0,0 +1,181 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import List, Optional
+
+from constants import CSV_FIELD_NAMES, EVENT_CSV_FIELD_NAMES, CASE_CSV_FIELD_NAMES
+from event_record import Event
+
+_COLUMN_TYPES = {
+    "case_id": "INTEGER",
+    "duration_minutes": "INTEGER",
+    "anomaly": "INTEGER",
+    "rework": "INTEGER",
+    "cost": "REAL",
+}
+
+# Индексы строятся после загрузки — вставка без индексов в разы быстрее
+SQLITE_INDEXES = [
+    ("idx_events_case_id", "events", "case_id"),
+    ("idx_events_activity", "events", "activity"),
+    ("idx_events_timestamp_start", "events", "timestamp_start"),
+]
+# Запись индекса сверх ключа и rowid: заголовок записи (3 байта), длина
+# ячейки (1) и указатель на ячейку в странице (2). Индексы строятся
+# сортировкой, страницы заполнены почти целиком
+_INDEX_ENTRY_OVERHEAD = 6
+
+
+def _value_bytes(value) -> int:
+    """Размер значения в записи SQLite: целые — 1..8 байт, текст — UTF-8"""
+    if isinstance(value, int):
+        return (value.bit_length() + 8) // 8
+    return len(str(value).encode("utf-8"))
+
+
+def _create_table_sql(table: str, fieldnames: List[str], primary_key: str = "") -> str:
+    columns = []
+    for field in fieldnames:
+        column = f"{field} {_COLUMN_TYPES.get(field, 'TEXT')}"
+        if field == primary_key:
+            column += " PRIMARY KEY"
+        columns.append(column)
+    return f"CREATE TABLE {table} ({', '.join(columns)})"
+
+
+def _insert_sql(table: str, fieldnames: List[str]) -> str:
+    placeholders = ", ".join("?" * len(fieldnames))
+    return f"INSERT INTO {table} ({', '.join(fieldnames)}) VALUES ({placeholders})"
+
+
+class SQLiteWriter:
+    """Загрузка событий в SQLite батчами.
+
+    На время загрузки: WAL, synchronous=OFF, одна транзакция на батч
+    через executemany; после батча WAL переносится в базу. Индексы
+    создаются в close(), их размер заранее оценивается по ключам
+    вставленных строк — таргетинг идет по итоговому размеру базы.
+    """
+
+    def __init__(self, logger, normalized: bool = False):
+        self.logger = logger
+        self.normalized = normalized
+        self.filepath: Optional[str] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._events_fields = EVENT_CSV_FIELD_NAMES if normalized else CSV_FIELD_NAMES
+        self._index_positions = [
+            self._events_fields.index(column) for _, _, column in SQLITE_INDEXES
+        ]
+        # Строк в events и оценка байт индексов, которые построит close()
+        self._rows = 0
+        self._index_bytes = 0
+
+    @property
+    def bytes_written(self) -> int:
+        """Ожидаемый размер базы: файл после checkpoint плюс будущие индексы"""
+        if not self.filepath:
+            return 0
+        size = sum(
+            os.path.getsize(path)
+            for path in (self.filepath, self.filepath + "-wal")
+            if os.path.exists(path)
+        )
+        return size + (self._index_bytes if self._conn is not None else 0)
+
+    def write_events_to_sqlite(self, events: List, filepath: str, mode: str = "w"):
+        """Вставляет батч событий (и кейсов в normalized-режиме) одной транзакцией"""
+        if mode == "w" or self._conn is None or filepath != self.filepath:
+            self.close(build_indexes=False)
+            self._open(filepath, create=(mode == "w" or not os.path.exists(filepath)))
+
+        self.logger.info("Запись %d событий в SQLite (mode: %s)...", len(events), mode)
+
+        rows = [
+            e.to_row() if isinstance(e, Event) else self._dict_to_row(e)
+            for e in events
+        ]
+        n_event_fields = len(EVENT_CSV_FIELD_NAMES)
+
+        with self._conn:
+            if self.normalized:
+                self._conn.executemany(
+                    _insert_sql("events", EVENT_CSV_FIELD_NAMES),
+                    (row[:n_event_fields] for row in rows),
+                )
+                self._conn.executemany(
+                    _insert_sql("cases", CASE_CSV_FIELD_NAMES),
+                    self._case_rows(rows, n_event_fields),
+                )
+            else:
+                self._conn.executemany(_insert_sql("events", CSV_FIELD_NAMES), rows)
+        self._estimate_indexes(rows)
+        # Страницы из WAL — в файл базы: размер базы отражает загруженное
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _estimate_indexes(self, rows: List[tuple]):
+        """Байты записей индексов SQLITE_INDEXES для вставленных строк"""
+        positions = self._index_positions
+        rowid = self._rows
+        total = 0
+        for row in rows:
+            rowid += 1
+            entry = _INDEX_ENTRY_OVERHEAD + _value_bytes(rowid)
+            total += len(positions) * entry + sum(
+                _value_bytes(row[i]) for i in positions
+            )
+        self._rows = rowid
+        self._index_bytes += total
+
+    def close(self, build_indexes: bool = True):
+        """Строит индексы, переносит WAL в базу и закрывает соединение"""
+        if self._conn is None:
+            return
+        if build_indexes:
+            self.logger.info("Построение индексов SQLite...")
+            with self._conn:
+                for name, table, column in SQLITE_INDEXES:
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"
+                    )
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("PRAGMA journal_mode = DELETE")
+        self._conn.close()
+        self._conn = None
+
+    def _open(self, filepath: str, create: bool):
+        self.filepath = filepath
+        if create:
+            self._rows = 0
+            self._index_bytes = 0
+            for path in (filepath, filepath + "-wal", filepath + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self._conn = sqlite3.connect(filepath)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("PRAGMA temp_store = MEMORY")
+
+        if create:
+            with self._conn:
+                self._conn.execute(_create_table_sql("events", self._events_fields))
+                if self.normalized:
+                    self._conn.execute(
+                        _create_table_sql("cases", CASE_CSV_FIELD_NAMES, primary_key="case_id")
+                    )
+
+    @staticmethod
+    def _dict_to_row(event: dict) -> tuple:
+        return tuple(
+            value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else value
+            for value in (event.get(field) for field in CSV_FIELD_NAMES)
+        )
+
+    @staticmethod
+    def _case_rows(rows: List[tuple], n_event_fields: int):
+        """Одна строка на кейс: события кейса идут подряд"""
+        last_case_id = None
+        for row in rows:
+            if row[0] != last_case_id:
+                last_case_id = row[0]
+                yield row[:1] + row[n_event_fields:]
@@ -0,0 +1,117 @@
+import csv
+import io
+import os
+import stat
+import sys
+from typing import Callable, List, Optional
+
+from constants import CSV_FIELD_NAMES
+
+STDOUT_TARGET = "-"
+FIFO_PREFIX = "fifo:"
+
+# Форматы потока: csv (с заголовком), postgres — COPY ... FROM STDIN (text),
+# clickhouse — INSERT ... FORMAT TabSeparated
+STREAM_FORMATS = ["csv", "postgres", "clickhouse"]
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_NULL = "\\N"
+_BOOL_VALUES = {
+    "postgres": ("f", "t"),
+    "clickhouse": ("0", "1"),
+}
+
+
+def is_stream_target(output: Optional[str]) -> bool:
+    """--output - (stdout) или --output fifo:<path>"""
+    return bool(output) and (output == STDOUT_TARGET or output.startswith(FIFO_PREFIX))
+
+
+def format_text_row(row: tuple, stream_format: str) -> str:
+    """Строка в текстовом формате COPY/TSV: табы, \\N для NULL, backslash-экранирование"""
+    false_value, true_value = _BOOL_VALUES[stream_format]
+    fields = []
+    for value in row:
+        if value is None:
+            fields.append(_NULL)
+        elif value is True:
+            fields.append(true_value)
+        elif value is False:
+            fields.append(false_value)
+        elif isinstance(value, str):
+            fields.append(value.translate(_TEXT_ESCAPES))
+        else:
+            fields.append(str(value))
+    return "\t".join(fields) + "\n"
+
+
+class StreamWriter:
+    """Потоковая запись батчей в stdout или именованный канал без временных файлов.
+
+    Запись в pipe блокируется, пока читатель не заберет данные, — это и есть
+    backpressure: генерация не убегает вперед потребителя. Размер считается
+    по отправленным байтам, os.path.getsize на pipe не работает.
+    """
+
+    def __init__(self, logger, target: str, stream_format: str = "csv",
+                 row_builder: Optional[Callable] = None):
+        if stream_format not in STREAM_FORMATS:
+            raise ValueError(f"Unknown stream format: {stream_format}")
+        self.logger = logger
+        self.target = target
+        self.stream_format = stream_format
+        self.bytes_written = 0
+        self._row_builder = row_builder
+        self._stream = None
+
+    def write_events_to_stream(self, events: List, mode: str = "w"):
+        """Отправляет батч; заголовок (только csv) — в первом батче"""
+        if self._stream is None:
+            self._open()
+
+        self.logger.info("Отправка %d событий в поток (%s)...", len(events), self.stream_format)
+
+        if self.stream_format == "csv":
+            buffer = io.StringIO(newline="")
+            writer = csv.writer(buffer, lineterminator="\n")
+            if mode == "w":
+                writer.writerow(CSV_FIELD_NAMES)
+            for event in events:
+                writer.writerow(self._row(event))
+            text = buffer.getvalue()
+        else:
+            text = "".join(
+                format_text_row(self._row(event), self.stream_format) for event in events
+            )
+
+        data = text.encode("utf-8")
+        self._stream.write(data)
+        self._stream.flush()
+        self.bytes_written += len(data)
+
+    def close(self):
+        if self._stream is None:
+            return
+        self._stream.flush()
+        if self._stream is not sys.stdout.buffer:
+            self._stream.close()
+        self._stream = None
+
+    def _row(self, event) -> tuple:
+        if self._row_builder is not None:
+            return self._row_builder(event)
+        return tuple(event[field] for field in CSV_FIELD_NAMES)
+
+    def _open(self):
+        if self.target == STDOUT_TARGET:
+            self._stream = sys.stdout.buffer
+            return
+
+        path = self.target[len(FIFO_PREFIX):]
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        elif not stat.S_ISFIFO(os.stat(path).st_mode):
+            raise ValueError(f"Not a named pipe: {path}")
+        # open блокируется, пока читатель не откроет канал
+        self.logger.info("Ожидание читателя канала %s...", path)
+        self._stream = open(path, "wb")
@@ -0,0 +1,107 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from binary_writer import (
+    BINARY_DTYPE,
+    FLAG_ANOMALY,
+    FLAG_REWORK,
+    NULL_CODE,
+    RECORD_SIZE,
+    BinaryWriter,
+    build_binary_encoder,
+    iter_binary_records,
+    load_binary,
+    read_binary_header,
+)
+from case_generator import CaseGenerator
+from logger import get_logger
+from resource_pool import ResourcePool
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class TestBinaryWriter:
+    def setup_method(self):
+        random.seed(42)
+        self.pool = ResourcePool(seed=42)
+        self.gen = CaseGenerator(start_case_id=1, resource_pool=self.pool)
+        self.encoder = build_binary_encoder(self.pool)
+        self.writer = BinaryWriter(get_logger(), self.encoder)
+
+    def _generate_events(self, n_cases=5):
+        events = []
+        for _ in range(n_cases):
+            events.extend(self.gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0),
+                anomaly_rate=0.5, rework_rate=0.5,
+            ))
+        return events
+
+    def test_header_describes_dtype(self, tmp_path):
+        path = str(tmp_path / "log.bin")
+        self.writer.write_events_to_binary(self._generate_events(1), path)
+        meta = read_binary_header(path)
+        assert [tuple(f) for f in meta["dtype"]] == BINARY_DTYPE
+        assert meta["record_size"] == RECORD_SIZE
+        assert meta["offset"] % 64 == 0
+
+    def test_fixed_width_records(self, tmp_path):
+        path = tmp_path / "log.bin"
+        events = self._generate_events(5)
+        self.writer.write_events_to_binary(events, str(path))
+        meta = read_binary_header(str(path))
+        assert path.stat().st_size == meta["offset"] + len(events) * RECORD_SIZE
+
+    def test_records_match_events(self, tmp_path):
+        path = str(tmp_path / "log.bin")
+        events = self._generate_events(5)
+        self.writer.write_events_to_binary(events, path)
+        vocab = self.encoder.vocabularies
+
+        records = list(iter_binary_records(path))
+        assert len(records) == len(events)
+        for record, event in zip(records, events):
+            assert record["case_id"] == event["case_id"]
+            assert EPOCH + timedelta(seconds=record["timestamp_start"]) == event["timestamp_start"]
+            assert EPOCH + timedelta(seconds=record["timestamp_end"]) == event["timestamp_end"]
+            assert record["duration_minutes"] == event["duration_minutes"]
+            assert record["cost"] == event["cost"]
+            assert vocab["activity"][record["activity"]] == event["activity"]
+            assert vocab["user_id"][record["user_id"]] == event["user_id"]
+            assert bool(record["flags"] & FLAG_ANOMALY) == event["anomaly"]
+            assert bool(record["flags"] & FLAG_REWORK) == event["rework"]
+            if event["anomaly_type"] is None:
+                assert record["anomaly_type"] == NULL_CODE
+
+    def test_append_writes_header_once(self, tmp_path):
+        path = str(tmp_path / "log.bin")
+        events1, events2 = self._generate_events(2), self._generate_events(2)
+        self.writer.write_events_to_binary(events1, path, mode="w")
+        self.writer.write_events_to_binary(events2, path, mode="a")
+        assert len(list(iter_binary_records(path))) == len(events1) + len(events2)
+
+    def test_vocabulary_overflow_raises(self):
+        comments = self.encoder.vocabularies["comment"]
+        for i in range(NULL_CODE - len(comments)):
+            assert self.encoder.encode("comment", f"extra {i}") < NULL_CODE
+        # Следующий код совпал бы с NULL_CODE
+        with pytest.raises(ValueError, match="comment"):
+            self.encoder.encode("comment", "one too many")
+        assert self.encoder.encode("user_id", "user_5000") == 4999
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "log.bin"
+        path.write_bytes(b"case_id,timestamp_start\n")
+        with pytest.raises(ValueError, match="Not a process log binary file"):
+            read_binary_header(str(path))
+
+    def test_numpy_memmap(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        path = str(tmp_path / "log.bin")
+        events = self._generate_events(5)
+        self.writer.write_events_to_binary(events, path)
+        data = load_binary(path)
+        assert len(data) == len(events)
+        assert list(data["case_id"]) == [e["case_id"] for e in events]
+        assert data.dtype.itemsize == RECORD_SIZE
@@ -0,0 +1,120 @@
+import csv
+import random
+import pytest
+from case_index import CaseIndex, CaseIndexBuilder, case_index_path
+from logger import get_logger
+from main import ProcessMiningGenerator
+
+BASE_CONFIG = {
+    "target_size_gb": 0.0003,
+    "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+    "anomaly_rate": 0.03,
+    "rework_rate": 0.08,
+    "start_date": "2024-01-01",
+    "time_range_days": 30,
+    "case_index": True,
+}
+
+
+class _Event:
+    def __init__(self, case_id):
+        self.case_id = case_id
+
+
+def _write(tmp_path, cases, batches=1):
+    """CSV с заголовком и индексом; cases — [(case_id, число событий)]"""
+    path = str(tmp_path / "log.csv")
+    header = b"case_id,value\n"
+    builder = CaseIndexBuilder(case_index_path(path))
+    events = [_Event(case_id) for case_id, count in cases for _ in range(count)]
+    rows = [b"%d,%d\n" % (event.case_id, i) for i, event in enumerate(events)]
+    with open(path, "wb") as f:
+        f.write(header)
+        builder.start(len(header))
+        step = max(1, len(events) // batches)
+        for start in range(0, len(events), step):
+            builder.add_rows(events[start:start + step], rows[start:start + step])
+            f.write(b"".join(rows[start:start + step]))
+    builder.close()
+    return path, builder
+
+
+class TestCaseIndex:
+    def test_find_and_read_case(self, tmp_path):
+        path, builder = _write(tmp_path, [(1, 3), (2, 1), (5, 4)])
+        assert builder.cases == 3
+        with CaseIndex(path) as index:
+            assert len(index) == 3
+            assert index.find(3) is None
+            assert index.find(5)[1] == 4
+            assert index.read_case(2) == [["2", "3"]]
+            assert [row[0] for row in index.read_case(5)] == ["5"] * 4
+            assert index.read_case(4) == []
+
+    def test_case_spanning_batches(self, tmp_path):
+        path, builder = _write(tmp_path, [(1, 5), (2, 5), (3, 5)], batches=4)
+        with CaseIndex(path) as index:
+            assert [index.entry(i)[2] for i in range(len(index))] == [5, 5, 5]
+            assert [row[1] for row in index.read_case(2)] == ["5", "6", "7", "8", "9"]
+
+    def test_range(self, tmp_path):
+        path, _ = _write(tmp_path, [(10, 2), (11, 3), (12, 1), (13, 2)])
+        with CaseIndex(path) as index:
+            start, end, events = index.range(11, 12)
+            assert events == 4
+            assert {row[0] for row in index.read_range(11, 12)} == {"11", "12"}
+            assert index.range(0, 9) == (0, 0, 0)
+            assert index.range(13, 100)[1] == index.data_size
+
+    def test_split_on_case_boundaries(self, tmp_path):
+        path, _ = _write(tmp_path, [(i, i % 4 + 1) for i in range(1, 200)])
+        with CaseIndex(path) as index:
+            parts = index.split(4)
+            assert len(parts) == 4
+            assert parts[0][0] == index.entry(0)[1]
+            assert parts[-1][1] == index.data_size
+            starts = {index.entry(i)[1] for i in range(len(index))}
+            for (start, end), (next_start, _) in zip(parts, parts[1:]):
+                assert end == next_start and start in starts
+
+    def test_rejects_descending_case_ids(self, tmp_path):
+        with pytest.raises(ValueError):
+            _write(tmp_path, [(2, 1), (1, 1)])
+
+    def test_not_an_index(self, tmp_path):
+        (tmp_path / "log.csv").write_bytes(b"x\n")
+        (tmp_path / "log.csv.idx").write_bytes(b"garbage!")
+        with pytest.raises(ValueError):
+            CaseIndex(str(tmp_path / "log.csv"))
+
+
+class TestGeneratedIndex:
+    def test_index_matches_csv(self, tmp_path):
+        random.seed(42)
+        gen = ProcessMiningGenerator(dict(BASE_CONFIG, output_dir=str(tmp_path)), get_logger())
+        gen.generate_data()
+
+        path = gen.output_paths["events"]
+        with open(path, newline="") as f:
+            rows = list(csv.reader(f))[1:]
+        expected = {}
+        for row in rows:
+            expected.setdefault(row[0], []).append(row)
+
+        assert case_index_path(path) in gen.output_files()
+        with CaseIndex(path) as index:
+            assert len(index) == len(expected)
+            for case_id in random.sample(sorted(expected, key=int), 20):
+                assert index.read_case(int(case_id)) == expected[case_id]
+            assert sum(index.entry(i)[2] for i in range(len(index))) == len(rows)
+
+    @pytest.mark.parametrize("extra", [
+        {"engine": "simulation"},
+        {"layout": "normalized"},
+        {"encode_categories": True},
+        {"compress": "gzip"},
+    ])
+    def test_rejects_unsupported_outputs(self, tmp_path, extra):
+        config = dict(BASE_CONFIG, output_dir=str(tmp_path), **extra)
+        with pytest.raises(ValueError):
+            ProcessMiningGenerator(config, get_logger())
@@ -0,0 +1,82 @@
+import random
+from datetime import datetime
+from case_generator import CaseGenerator
+from categorical import (
+    CATEGORICAL_FIELDS,
+    CategoryEncoder,
+    build_vocabularies,
+    decode_csv,
+)
+from config import PROCESS_MODELS
+from csv_writer import CSVWriter
+from logger import get_logger
+from resource_pool import ResourcePool
+
+
+class TestVocabularies:
+    def test_all_categorical_fields_covered(self):
+        vocabularies = build_vocabularies(ResourcePool(seed=42))
+        assert set(vocabularies) == set(CATEGORICAL_FIELDS)
+
+    def test_values_are_unique(self):
+        for values in build_vocabularies(ResourcePool(seed=42)).values():
+            assert len(values) == len(set(values))
+
+    def test_generated_values_are_in_vocabulary(self):
+        """Closed vocabularies: generation at high rates adds no new values"""
+        random.seed(42)
+        pool = ResourcePool(seed=42)
+        encoder = CategoryEncoder.from_resource_pool(pool)
+        sizes = {f: len(v) for f, v in encoder.vocabularies.items()}
+        gen = CaseGenerator(start_case_id=1, resource_pool=pool)
+        writer = CSVWriter(get_logger(), encoder=encoder)
+        for process in PROCESS_MODELS:
+            for _ in range(200):
+                for event in gen.generate_case(
+                    process, start_time=datetime(2024, 1, 1),
+                    anomaly_rate=0.5, rework_rate=0.5,
+                ):
+                    writer._event_to_row(event)
+        assert {f: len(v) for f, v in encoder.vocabularies.items()} == sizes
+
+
+class TestCategoryEncoder:
+    def test_empty_values_stay_empty(self):
+        encoder = CategoryEncoder({"anomaly_type": ["Manual Override"]})
+        assert encoder.encode("anomaly_type", None) == ""
+        assert encoder.encode("anomaly_type", "") == ""
+
+    def test_unknown_value_appended(self):
+        encoder = CategoryEncoder({"department": ["IT", "HR"]})
+        assert encoder.encode("department", "HR") == 1
+        assert encoder.encode("department", "CUSTOM") == 2
+        assert encoder.vocabularies["department"] == ["IT", "HR", "CUSTOM"]
+
+    def test_roundtrip_through_decode(self, tmp_path):
+        random.seed(42)
+        pool = ResourcePool(seed=42)
+        gen = CaseGenerator(start_case_id=1, resource_pool=pool)
+        events = []
+        for process in PROCESS_MODELS:
+            for _ in range(5):
+                events.extend(gen.generate_case(
+                    process, start_time=datetime(2024, 1, 1), anomaly_rate=0.5
+                ))
+        events[0]["comment"] = "Custom, comment"
+
+        plain_path = tmp_path / "plain.csv"
+        encoded_path = tmp_path / "encoded.csv"
+        decoded_path = tmp_path / "decoded.csv"
+        categories_path = tmp_path / "categories.json"
+
+        CSVWriter(get_logger()).write_events_to_csv(events, str(plain_path))
+        encoder = CategoryEncoder.from_resource_pool(pool)
+        CSVWriter(get_logger(), encoder=encoder).write_events_to_csv(
+            events, str(encoded_path)
+        )
+        encoder.save(str(categories_path))
+
+        rows = decode_csv(str(encoded_path), str(categories_path), str(decoded_path))
+        assert rows == len(events)
+        assert decoded_path.read_bytes() == plain_path.read_bytes()
+        assert encoded_path.stat().st_size < plain_path.stat().st_size * 0.7
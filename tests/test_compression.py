@@ -0,0 +1,96 @@
+import gzip
+import random
+from datetime import datetime
+import pytest
+from case_generator import CaseGenerator
+from compression import ParallelGzipCompressor
+from csv_writer import CSVWriter
+from logger import get_logger
+from main import ProcessMiningGenerator
+
+
+class TestParallelGzipCompressor:
+    def setup_method(self):
+        self.compressor = ParallelGzipCompressor(workers=4, block_size=1000)
+
+    def teardown_method(self):
+        self.compressor.close()
+
+    def test_multi_member_stream_roundtrip(self, tmp_path):
+        path = str(tmp_path / "data.gz")
+        data = b"".join(b"line %d\n" % i for i in range(5000))
+        self.compressor.write(path, data, mode="w")
+        with open(path, "rb") as f:
+            assert gzip.decompress(f.read()) == data
+
+    def test_appended_batches_keep_order(self, tmp_path):
+        path = str(tmp_path / "data.gz")
+        first = b"a" * 2500 + b"\n"
+        second = b"b" * 3500 + b"\n"
+        self.compressor.write(path, first, mode="w")
+        self.compressor.write(path, second, mode="a")
+        with gzip.open(path, "rb") as f:
+            assert f.read() == first + second
+
+    def test_raw_bytes_counted_per_file(self, tmp_path):
+        path = str(tmp_path / "data.gz")
+        self.compressor.write(path, b"x" * 1500, mode="w")
+        self.compressor.write(path, b"y" * 500, mode="a")
+        assert self.compressor.raw_bytes[path] == 2000
+        self.compressor.write(path, b"z" * 10, mode="w")
+        assert self.compressor.raw_bytes[path] == 10
+
+    def test_pool_stopped_on_error(self, tmp_path):
+        with pytest.raises(OSError):
+            with ParallelGzipCompressor(workers=2, block_size=1000) as compressor:
+                compressor.write(str(tmp_path / "missing" / "data.gz"), b"x" * 5000, mode="w")
+        assert compressor._pool._shutdown
+
+    def test_interrupted_generation_stops_pool(self, tmp_path, monkeypatch):
+        def failing(self, events, mode, finished_cases=None):
+            self.write_batch(events, mode)
+            raise RuntimeError("stats failed")
+
+        monkeypatch.setattr(ProcessMiningGenerator, "_write_observed", failing)
+        config = {
+            "target_size_gb": 0.0003,
+            "process_distribution": {"OrderFulfillment": 1.0},
+            "anomaly_rate": 0.05,
+            "rework_rate": 0.1,
+            "start_date": "2024-01-01",
+            "time_range_days": 60,
+            "output_dir": str(tmp_path),
+            "compress": "gzip",
+            "workers": 2,
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        with pytest.raises(RuntimeError):
+            gen.generate_data()
+        assert gen.compressor._pool._shutdown
+
+
+class TestCompressedCSVWriter:
+    def test_gzip_content_matches_plain_csv(self, tmp_path):
+        random.seed(42)
+        gen = CaseGenerator(start_case_id=1)
+        events = []
+        for _ in range(20):
+            events.extend(gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+            ))
+
+        plain = tmp_path / "plain.csv"
+        packed = tmp_path / "packed.csv.gz"
+        compressor = ParallelGzipCompressor(workers=2, block_size=4096)
+        try:
+            CSVWriter(get_logger()).write_events_to_csv(events[:50], str(plain))
+            CSVWriter(get_logger()).write_events_to_csv(events[50:], str(plain), mode="a")
+            writer = CSVWriter(get_logger(), compressor=compressor)
+            writer.write_events_to_csv(events[:50], str(packed))
+            writer.write_events_to_csv(events[50:], str(packed), mode="a")
+        finally:
+            compressor.close()
+
+        with gzip.open(packed, "rb") as f:
+            assert f.read() == plain.read_bytes()
+        assert compressor.raw_bytes[str(packed)] == plain.stat().st_size
@@ -1,10 +1,11 @@
 import csv
 import random
 import pytest
+import csv_writer
 from datetime import datetime
 from csv_writer import CSVWriter
 from case_generator import CaseGenerator
-from constants import CSV_FIELD_NAMES
+from constants import CSV_FIELD_NAMES, EVENT_CSV_FIELD_NAMES, CASE_CSV_FIELD_NAMES
 from logger import get_logger
 
 
@@ -32,6 +33,16 @@ class TestCSVWriter:
             reader = csv.DictReader(f)
             assert set(reader.fieldnames) == set(CSV_FIELD_NAMES)
 
+    def test_progress_logged_without_observers(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(csv_writer, "_LOG_EVERY", 5)
+        messages = []
+        monkeypatch.setattr(self.logger, "info", lambda msg, *args: messages.append(msg % args))
+        events = self._generate_events(3)
+        writer = CSVWriter(self.logger, vocabulary=self.gen.vocabulary)
+        writer.write_events_to_csv(events, str(tmp_path / "test.csv"))
+        progress = [m for m in messages if m.startswith("Записано")]
+        assert len(progress) == len(events) // 5
+
     def test_writes_correct_number_of_rows(self, tmp_path):
         filepath = str(tmp_path / "test.csv")
         events = self._generate_events(3)
@@ -112,3 +123,152 @@ class TestCSVWriter:
         with open(filepath, encoding="utf-8") as f:
             content = f.read()
         assert len(content) > 0
+
+
+class TestNormalizedCSVWriter:
+    def setup_method(self):
+        self.writer = CSVWriter(get_logger())
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+
+    def _generate_events(self, n_cases=3):
+        events = []
+        for _ in range(n_cases):
+            events.extend(self.gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+            ))
+        return events
+
+    def _read(self, path):
+        with open(path) as f:
+            reader = csv.DictReader(f)
+            return reader.fieldnames, list(reader)
+
+    def test_headers(self, tmp_path):
+        events_path, cases_path = str(tmp_path / "e.csv"), str(tmp_path / "c.csv")
+        self.writer.write_normalized_to_csv(self._generate_events(1), events_path, cases_path)
+        assert self._read(events_path)[0] == EVENT_CSV_FIELD_NAMES
+        assert self._read(cases_path)[0] == CASE_CSV_FIELD_NAMES
+
+    def test_one_case_row_per_case(self, tmp_path):
+        events_path, cases_path = str(tmp_path / "e.csv"), str(tmp_path / "c.csv")
+        events = self._generate_events(4)
+        self.writer.write_normalized_to_csv(events, events_path, cases_path)
+        _, event_rows = self._read(events_path)
+        _, case_rows = self._read(cases_path)
+        assert len(event_rows) == len(events)
+        assert [r["case_id"] for r in case_rows] == ["1", "2", "3", "4"]
+
+    def test_join_restores_flat_rows(self, tmp_path):
+        flat_path = str(tmp_path / "flat.csv")
+        events_path, cases_path = str(tmp_path / "e.csv"), str(tmp_path / "c.csv")
+        events = self._generate_events(3)
+        self.writer.write_events_to_csv(events, flat_path)
+        self.writer.write_normalized_to_csv(events, events_path, cases_path)
+
+        _, flat_rows = self._read(flat_path)
+        _, event_rows = self._read(events_path)
+        cases = {r["case_id"]: r for r in self._read(cases_path)[1]}
+        joined = [{**r, **cases[r["case_id"]]} for r in event_rows]
+        assert joined == flat_rows
+
+    def test_append_mode(self, tmp_path):
+        events_path, cases_path = str(tmp_path / "e.csv"), str(tmp_path / "c.csv")
+        self.writer.write_normalized_to_csv(self._generate_events(2), events_path, cases_path)
+        self.writer.write_normalized_to_csv(
+            self._generate_events(2), events_path, cases_path, mode="a"
+        )
+        _, case_rows = self._read(cases_path)
+        assert len(case_rows) == 4
+
+
+class TestVocabularyCSVWriter:
+    """Байтовый путь через VocabularyRegistry совпадает с csv.writer"""
+
+    def setup_method(self):
+        random.seed(7)
+        self.gen = CaseGenerator(start_case_id=1)
+        self.logger = get_logger()
+
+    def test_bytes_path_identical_to_csv_writer(self, tmp_path):
+        events = self.gen.generate_multiple_cases(
+            "CustomerSupport", num_cases=30, start_time=datetime(2024, 2, 1),
+            anomaly_rate=0.3, rework_rate=0.3,
+        )
+        events[0].case.comment = 'Needs "follow-up", soon'
+        plain = tmp_path / "plain.csv"
+        fast = tmp_path / "fast.csv"
+        CSVWriter(self.logger).write_events_to_csv(events[:10], str(plain), mode="w")
+        CSVWriter(self.logger).write_events_to_csv(events[10:], str(plain), mode="a")
+        writer = CSVWriter(self.logger, vocabulary=self.gen.vocabulary)
+        writer.write_events_to_csv(events[:10], str(fast), mode="w")
+        writer.write_events_to_csv(events[10:], str(fast), mode="a")
+        assert fast.read_bytes() == plain.read_bytes()
+
+    def test_bytes_path_dict_events(self, tmp_path):
+        event = {
+            "case_id": 1,
+            "timestamp_start": datetime(2024, 1, 1, 9, 0),
+            "timestamp_end": datetime(2024, 1, 1, 9, 30),
+            "process": "OrderFulfillment",
+            "activity": "Order Created",
+            "comment": "a,b",
+        }
+        plain = tmp_path / "plain.csv"
+        fast = tmp_path / "fast.csv"
+        CSVWriter(self.logger).write_events_to_csv([event], str(plain))
+        CSVWriter(self.logger, vocabulary=self.gen.vocabulary).write_events_to_csv(
+            [event], str(fast)
+        )
+        assert fast.read_bytes() == plain.read_bytes()
+
+    def test_row_fragments_cached(self, tmp_path):
+        events = self.gen.generate_multiple_cases(
+            "OrderFulfillment", num_cases=200, start_time=datetime(2024, 2, 1)
+        )
+        writer = CSVWriter(self.logger, vocabulary=self.gen.vocabulary)
+        writer.write_events_to_csv(events, str(tmp_path / "out.csv"))
+
+        rows = writer._row_fragments.cache_info()
+        assert rows.hits + rows.misses == len(events)
+        assert rows.currsize < len(events) // 2
+        # Хвост кейса собирается один раз на кейс
+        cases = writer._case_fragment.cache_info()
+        assert cases.misses == 200
+        assert cases.hits == len(events) - 200
+
+    def test_case_mutated_between_writes(self, tmp_path):
+        events = self.gen.generate_multiple_cases(
+            "OrderFulfillment", num_cases=3, start_time=datetime(2024, 2, 1)
+        )
+        first_case = [e for e in events if e.case_id == events[0].case_id]
+        plain = tmp_path / "plain.csv"
+        fast = tmp_path / "fast.csv"
+        writer = CSVWriter(self.logger, vocabulary=self.gen.vocabulary)
+        CSVWriter(self.logger).write_events_to_csv(first_case, str(plain), mode="w")
+        writer.write_events_to_csv(first_case, str(fast), mode="w")
+        # Запись через Event меняет общий объект кейса
+        first_case[0]["priority"] = "Low" if first_case[0]["priority"] != "Low" else "High"
+        first_case[0]["comment"] = "updated"
+        CSVWriter(self.logger).write_events_to_csv(first_case, str(plain), mode="a")
+        writer.write_events_to_csv(first_case, str(fast), mode="a")
+        assert fast.read_bytes() == plain.read_bytes()
+        assert b"updated" in fast.read_bytes()
+
+    def test_fixed_footprint_covers_case_cache(self):
+        import tracemalloc
+        writer = CSVWriter(self.logger, vocabulary=self.gen.vocabulary, buffer_size=1024)
+        events = self.gen.generate_multiple_cases(
+            "CustomerSupport", num_cases=2000, start_time=datetime(2024, 2, 1)
+        )
+        rows = list({id(e.case): e.case.to_row() for e in events}.values())
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for row in rows:
+            writer._case_fragment(*row)
+        per_entry = (tracemalloc.get_traced_memory()[0] - before) / len(rows)
+        tracemalloc.stop()
+        assert per_entry <= csv_writer.FRAGMENT_CACHE_ENTRY_BYTES
+        assert writer.fixed_footprint() == 1024 + (
+            csv_writer.ROW_FRAGMENT_CACHE_SIZE + csv_writer.CASE_FRAGMENT_CACHE_SIZE
+        ) * csv_writer.FRAGMENT_CACHE_ENTRY_BYTES
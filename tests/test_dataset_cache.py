@@ -0,0 +1,158 @@
+import os
+import random
+import time
+import dataset_cache
+from dataset_cache import (
+    DatasetCache, cache_key, file_sha256, link_or_copy, unlink_for_rewrite,
+)
+from logger import get_logger
+from main import ProcessMiningGenerator
+
+BASE_CONFIG = {
+    "target_size_gb": 0.0002,
+    "process_distribution": {"OrderFulfillment": 0.6, "LoanApplication": 0.4},
+    "anomaly_rate": 0.03,
+    "rework_rate": 0.08,
+    "start_date": "2024-01-01",
+    "time_range_days": 30,
+    "seed": 42,
+}
+
+
+class TestCacheKey:
+    def test_stable_and_ignores_output_dir(self):
+        a = dict(BASE_CONFIG, output_dir="/a", workers=2)
+        b = dict(BASE_CONFIG, output_dir="/b", workers=8)
+        assert cache_key(a) == cache_key(b)
+
+    def test_sensitive_to_content(self):
+        base = cache_key(BASE_CONFIG)
+        assert cache_key(dict(BASE_CONFIG, seed=43)) != base
+        assert cache_key(dict(BASE_CONFIG, format="parquet")) != base
+
+    def test_sensitive_to_version(self, monkeypatch):
+        base = cache_key(BASE_CONFIG)
+        monkeypatch.setattr(dataset_cache, "GENERATOR_VERSION", "9.9.9")
+        assert cache_key(BASE_CONFIG) != base
+
+    def test_not_cacheable_without_seed_or_streaming(self):
+        assert cache_key(dict(BASE_CONFIG, seed=None)) is None
+        assert cache_key(dict(BASE_CONFIG, stream_output="-")) is None
+
+    def test_not_cacheable_with_memory_cap(self):
+        # Размер батчей зависит от RSS — байты не определяются конфигом
+        assert cache_key(dict(BASE_CONFIG, max_memory_bytes=512 * 1024 ** 2)) is None
+
+
+class TestDatasetCache:
+    def _files(self, tmp_path, name="data.csv", content=b"a,b\n1,2\n"):
+        src = tmp_path / "src"
+        src.mkdir(exist_ok=True)
+        path = src / name
+        path.write_bytes(content)
+        return [str(path)]
+
+    def test_store_and_restore(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), None, get_logger())
+        files = self._files(tmp_path)
+        cache.store("k1", files, BASE_CONFIG)
+
+        restored = cache.restore("k1", str(tmp_path / "out"))
+        assert restored == [str(tmp_path / "out" / "data.csv")]
+        assert (tmp_path / "out" / "data.csv").read_bytes() == b"a,b\n1,2\n"
+        assert cache.restore("missing", str(tmp_path / "out")) is None
+
+    def test_corrupted_entry_is_dropped(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), None, get_logger())
+        cache.store("k1", self._files(tmp_path, content=b"x" * 100), BASE_CONFIG)
+        stored = tmp_path / "cache" / "k1" / "data.csv"
+        os.remove(stored)
+        stored.write_bytes(b"y" * 100)  # тот же размер, другое содержимое
+
+        assert cache.restore("k1", str(tmp_path / "out")) is None
+        assert not (tmp_path / "cache" / "k1").exists()
+
+    def test_in_place_edit_with_same_mtime_is_detected(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), None, get_logger())
+        cache.store("k1", self._files(tmp_path, content=b"x" * 100), BASE_CONFIG)
+        restored = cache.restore("k1", str(tmp_path / "out"))
+        # Правка жесткой ссылки в --output с возвратом mtime
+        st = os.stat(restored[0])
+        with open(restored[0], "r+b") as f:
+            f.write(b"y")
+        os.utime(restored[0], ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        assert cache.restore("k1", str(tmp_path / "out2")) is None
+        assert not (tmp_path / "cache" / "k1").exists()
+
+    def test_lru_eviction(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), 250, get_logger())
+        for key in ("old", "used"):
+            cache.store(key, self._files(tmp_path, name=f"{key}.csv", content=b"z" * 100),
+                        BASE_CONFIG)
+            time.sleep(0.01)
+        # Обращение к "old" делает его свежее "used"
+        assert cache.restore("old", str(tmp_path / "out")) is not None
+        time.sleep(0.01)
+        cache.store("new", self._files(tmp_path, name="new.csv", content=b"z" * 100),
+                    BASE_CONFIG)
+
+        assert {m["key"] for m in cache.entries()} == {"old", "new"}
+
+    def test_unlink_for_rewrite_keeps_linked_copy(self, tmp_path):
+        src = tmp_path / "src.bin"
+        src.write_bytes(b"cached")
+        dst = tmp_path / "dst.bin"
+        link_or_copy(str(src), str(dst))
+        unlink_for_rewrite(str(dst))
+        unlink_for_rewrite(str(dst))  # отсутствующий файл — не ошибка
+        dst.write_bytes(b"new")
+        assert src.read_bytes() == b"cached"
+
+    def test_link_or_copy(self, tmp_path):
+        src = tmp_path / "src.bin"
+        src.write_bytes(b"data")
+        dst = tmp_path / "dst.bin"
+        method = link_or_copy(str(src), str(dst))
+        assert method in ("hardlink", "reflink", "copy")
+        assert file_sha256(str(dst)) == file_sha256(str(src))
+
+
+class TestGenerateOrRestore:
+    def _run(self, out_dir, cache, **overrides):
+        random.seed(42)
+        config = dict(BASE_CONFIG, output_dir=str(out_dir), **overrides)
+        generator = ProcessMiningGenerator(config, get_logger())
+        generator.generate_or_restore(cache)
+        return generator
+
+    def test_hit_reproduces_dataset(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), None, get_logger())
+        self._run(tmp_path / "first", cache)
+        self._run(tmp_path / "second", cache)
+
+        first = list((tmp_path / "first").glob("*.csv"))[0]
+        second = tmp_path / "second" / first.name
+        assert second.read_bytes() == first.read_bytes()
+        assert (tmp_path / "second" / "generation_config.json").exists()
+        assert len(cache.entries()) == 1
+
+    def test_regeneration_does_not_corrupt_cache(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), None, get_logger())
+        out = tmp_path / "out"
+        self._run(out, cache)
+        # Другой seed в тот же каталог: файл-ссылка не должен перезаписаться на месте
+        self._run(out, cache, seed=7)
+        assert len(cache.entries()) == 2
+        for manifest in cache.entries():
+            for name, meta in manifest["files"].items():
+                path = os.path.join(manifest["path"], name)
+                assert file_sha256(path) == meta["sha256"]
+
+    def test_encoded_categories_cached(self, tmp_path):
+        cache = DatasetCache(str(tmp_path / "cache"), None, get_logger())
+        self._run(tmp_path / "first", cache, encode_categories=True)
+        self._run(tmp_path / "second", cache, encode_categories=True)
+        assert (tmp_path / "second" / "categories.json").read_bytes() == (
+            tmp_path / "first" / "categories.json"
+        ).read_bytes()
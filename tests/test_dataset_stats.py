@@ -0,0 +1,231 @@
+import csv
+import json
+import os
+import random
+from collections import Counter
+from datetime import datetime
+import pytest
+from dataset_stats import (
+    DFG_END, DFG_START, STATS_FILENAME, DatasetStats, HeavyHitters, QuantileSketch,
+)
+from logger import get_logger
+from main import ProcessMiningGenerator
+
+
+class _Event:
+    def __init__(self, case_id, activity, start, end, process="P", anomaly=False, rework=False):
+        self.case_id = case_id
+        self.activity = activity
+        self.start_ts = start
+        self.end_ts = end
+        self.process = process
+        self.anomaly = anomaly
+        self.rework = rework
+
+
+class TestQuantileSketch:
+    def test_relative_accuracy(self):
+        rng = random.Random(1)
+        values = [rng.lognormvariate(10, 1.5) for _ in range(20000)]
+        sketch = QuantileSketch(accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        values.sort()
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+        # Память — корзины по диапазону значений, не по их числу
+        assert len(sketch.buckets) < 1000
+
+    def test_zero_and_empty(self):
+        sketch = QuantileSketch()
+        assert sketch.quantile(0.5) is None
+        assert sketch.summary() == {"count": 0}
+        sketch.add(0)
+        sketch.add(0)
+        sketch.add(100)
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == pytest.approx(100, rel=0.01)
+
+
+class TestHeavyHitters:
+    def test_exact_under_capacity(self):
+        hitters = HeavyHitters(capacity=10)
+        for item in "aaabbc":
+            hitters.add(item)
+        assert hitters.exact
+        assert hitters.most_common(2) == [("a", 3), ("b", 2)]
+
+    def test_keeps_frequent_items_over_capacity(self):
+        hitters = HeavyHitters(capacity=5)
+        for i in range(1000):
+            hitters.add("hot" if i % 2 else f"rare{i}")
+        assert not hitters.exact
+        assert len(hitters.counts) == 5
+        assert hitters.most_common(1)[0][0] == "hot"
+        assert hitters.counts["hot"] - hitters.errors["hot"] <= 500 <= hitters.counts["hot"]
+
+    def test_guarantees_on_skewed_stream(self):
+        rng = random.Random(3)
+        hitters = HeavyHitters(capacity=50)
+        true = Counter()
+        for _ in range(20000):
+            item = int(rng.paretovariate(1.2))
+            weight = rng.choice((1, 1, 1, 5))
+            hitters.add(item, weight)
+            true[item] += weight
+        assert sum(hitters.counts.values()) == sum(true.values())
+        for item, count in hitters.counts.items():
+            assert count - hitters.errors[item] <= true[item] <= count
+        # Элемент чаще total/capacity обязательно в скетче
+        for item, count in true.items():
+            if count > sum(true.values()) / 50:
+                assert item in hitters.counts
+        # Вытесняется самый редкий: корзины и куча согласованы со счетчиками
+        assert hitters.counts[hitters._min_item()] == min(hitters.counts.values())
+        assert len(hitters._heap) <= 2 * len(hitters._buckets) + 17
+
+    def test_merge(self):
+        left, right = HeavyHitters(capacity=3), HeavyHitters(capacity=3)
+        for item in "aab":
+            left.add(item)
+        for item in "bcd":
+            right.add(item)
+        left.merge(right)
+        assert not left.exact
+        assert left.counts["a"] == 2 and left.counts["b"] == 2
+        assert sum(left.counts.values()) == 6
+
+
+class TestDatasetStats:
+    def test_interleaved_cases(self):
+        stats = DatasetStats()
+        stats.add_events([
+            _Event(1, "A", 0, 3600),
+            _Event(2, "A", 100, 200, anomaly=True),
+            _Event(1, "B", 3600, 7200),
+        ])
+        stats.finish_cases([2])
+        assert stats.cases == 1 and stats.events == 1
+        stats.add_events([_Event(1, "C", 7200, 10800, rework=True)])
+        stats.finish_cases()
+
+        data = stats.to_dict()
+        assert data["cases"] == 2 and data["events"] == 4
+        assert data["activities"] == {"A": 2, "B": 1, "C": 1}
+        dfg = {(edge["from"], edge["to"]): edge["count"] for edge in data["directly_follows"]}
+        assert dfg == {
+            (DFG_START, "A"): 2, ("A", DFG_END): 1, ("A", "B"): 1,
+            ("B", "C"): 1, ("C", DFG_END): 1,
+        }
+        assert data["anomaly"] == {"cases": 1, "case_rate": 0.5, "events": 1}
+        assert data["rework"]["cases"] == 1
+        assert data["throughput_hours"]["max"] == 3.0
+        top = data["variants"]["top"]
+        assert [variant["activities"] for variant in top] == [["A"], ["A", "B", "C"]]
+
+    def test_merge_matches_single_pass(self):
+        rng = random.Random(3)
+        events = [
+            _Event(case, rng.choice("ABC"), case * 100, case * 100 + rng.randint(0, 5000),
+                   process=rng.choice(["P", "Q"]), anomaly=rng.random() < 0.2)
+            for case in range(1, 301)
+            for _ in range(rng.randint(1, 4))
+        ]
+        single = DatasetStats()
+        single.add_events(events)
+        single.finish_cases()
+
+        # Части из целых кейсов, как батчи воркеров
+        merged = DatasetStats()
+        for case in range(1, 301, 50):
+            part = DatasetStats()
+            part.add_events(e for e in events if case <= e.case_id < case + 50)
+            part.finish_cases()
+            merged.merge(part)
+        assert merged.to_dict() == single.to_dict()
+
+    def test_snapshot_at_checkpoint(self):
+        stats = DatasetStats()
+        stats.checkpoints = {2}
+        stats.add_events([_Event(i, "A", 0, 60) for i in range(1, 5)])
+        stats.finish_cases()
+        assert stats.snapshots[2]["cases"] == 2
+        assert stats.snapshots[2]["activities"] == {"A": 2}
+
+
+class TestGeneratedStats:
+    CONFIG = {
+        "target_size_gb": 0.0003,
+        "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+        "anomaly_rate": 0.1,
+        "rework_rate": 0.2,
+        "start_date": "2024-01-01",
+        "time_range_days": 60,
+    }
+
+    @staticmethod
+    def _rescan(path):
+        cases = {}
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                cases.setdefault(row["case_id"], []).append(row)
+        activities = Counter()
+        dfg = Counter()
+        durations = []
+        for rows in cases.values():
+            sequence = [DFG_START] + [row["activity"] for row in rows] + [DFG_END]
+            activities.update(sequence[1:-1])
+            dfg.update(zip(sequence, sequence[1:]))
+            start = min(datetime.fromisoformat(row["timestamp_start"]) for row in rows)
+            end = max(datetime.fromisoformat(row["timestamp_end"]) for row in rows)
+            durations.append((end - start).total_seconds() / 3600)
+        return cases, activities, dfg, durations
+
+    @pytest.mark.parametrize("engine", ["batch", "simulation"])
+    def test_matches_rescan(self, tmp_path, engine):
+        random.seed(42)
+        gen = ProcessMiningGenerator(
+            dict(self.CONFIG, output_dir=str(tmp_path), engine=engine), get_logger()
+        )
+        gen.generate_data()
+
+        with open(tmp_path / STATS_FILENAME) as f:
+            stats = json.load(f)
+        cases, activities, dfg, durations = self._rescan(gen.output_paths["events"])
+
+        assert stats["cases"] == len(cases)
+        assert stats["events"] == sum(activities.values())
+        assert Counter(stats["activities"]) == activities
+        assert Counter({
+            (edge["from"], edge["to"]): edge["count"] for edge in stats["directly_follows"]
+        }) == dfg
+        assert stats["throughput_hours"]["max"] == pytest.approx(max(durations), abs=0.001)
+        assert stats["variants"]["exact"]
+        assert sum(p["cases"] for p in stats["processes"].values()) == len(cases)
+        assert str(tmp_path / STATS_FILENAME) in gen.output_files()
+
+    def test_nested_presets_get_own_stats(self, tmp_path):
+        random.seed(42)
+        config = dict(
+            self.CONFIG,
+            target_size_gb=0.0006,
+            output_dir=str(tmp_path / "big"),
+            nested_presets=[
+                {"name": "small", "target_size_gb": 0.0002, "output_dir": str(tmp_path / "small")},
+            ],
+        )
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        with open(tmp_path / "small" / STATS_FILENAME) as f:
+            stats = json.load(f)
+        csv_path = os.path.join(tmp_path, "small", "process_log_0_0002GB.csv")
+        cases, activities, _, _ = self._rescan(csv_path)
+        assert stats["cases"] == len(cases)
+        assert Counter(stats["activities"]) == activities
+
+    def test_disabled(self, tmp_path):
+        random.seed(42)
+        config = dict(self.CONFIG, output_dir=str(tmp_path), dataset_stats=False)
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+        assert not (tmp_path / STATS_FILENAME).exists()
@@ -0,0 +1,87 @@
+import random
+from datetime import datetime, timedelta
+from business_calendar import (
+    add_working_minutes, add_working_minutes_epoch,
+    adjust_to_business_hours, adjust_to_business_hours_epoch,
+)
+from epoch_time import (
+    civil_from_days, format_timestamp, from_epoch, hour_of_day, quarter_of,
+    to_epoch, weekday,
+)
+from event_record import CaseAttributes, Event
+from utils import get_season, get_season_epoch
+
+
+def _sample_datetimes(n=2000):
+    rng = random.Random(11)
+    base = datetime(1999, 12, 25)
+    return [base + timedelta(seconds=rng.randint(0, 40 * 365 * 86400)) for _ in range(n)]
+
+
+class TestEpochArithmetic:
+    def test_roundtrip(self):
+        for dt in _sample_datetimes():
+            assert from_epoch(to_epoch(dt)) == dt
+
+    def test_fields_match_datetime(self):
+        for dt in _sample_datetimes():
+            ts = to_epoch(dt)
+            assert weekday(ts) == dt.weekday()
+            assert hour_of_day(ts) == dt.hour
+            assert quarter_of(ts) == (dt.month - 1) // 3 + 1
+            assert get_season_epoch(ts) == get_season(dt)
+
+    def test_format_matches_strftime(self):
+        for dt in _sample_datetimes():
+            assert format_timestamp(to_epoch(dt)) == dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    def test_leap_days(self):
+        for day in (datetime(2000, 2, 29), datetime(2024, 2, 29), datetime(2100, 3, 1)):
+            days = to_epoch(day) // 86400
+            assert civil_from_days(days) == (day.year, day.month, day.day)
+
+    def test_before_epoch(self):
+        dt = datetime(1969, 12, 31, 23, 59, 58)
+        ts = to_epoch(dt)
+        assert ts == -2
+        assert format_timestamp(ts) == "1969-12-31 23:59:58"
+        assert weekday(ts) == dt.weekday()
+
+
+class TestBusinessCalendarEpoch:
+    def test_adjust_matches_datetime_adapter(self):
+        for dt in _sample_datetimes(500):
+            random.seed(dt.toordinal())
+            expected = adjust_to_business_hours(dt, "LoanApplication", "Document Review")
+            random.seed(dt.toordinal())
+            ts = adjust_to_business_hours_epoch(to_epoch(dt), "LoanApplication", "Document Review")
+            assert from_epoch(ts) == expected
+
+    def test_add_working_minutes_matches_adapter(self):
+        for dt in _sample_datetimes(500):
+            for minutes in (1, 45, 600, 3000):
+                expected = add_working_minutes(dt, minutes, "InvoiceProcessing", "Data Entry")
+                ts = add_working_minutes_epoch(to_epoch(dt), minutes, "InvoiceProcessing", "Data Entry")
+                assert from_epoch(ts) == expected
+
+
+class TestEventEpochStorage:
+    def _event(self, start, end):
+        case = CaseAttributes("user_1", "IT", "low", 10.0, "ok")
+        return Event(1, start, end, "OrderFulfillment", "Order Created", 5,
+                     "Clerk", "X", "EMP-0001", False, None, False, case)
+
+    def test_datetime_adapter(self):
+        start = datetime(2024, 3, 1, 10, 0, 5)
+        event = self._event(start, start + timedelta(minutes=5))
+        assert event.start_ts == to_epoch(start)
+        assert event.timestamp_start == start
+        assert event["timestamp_end"] == start + timedelta(minutes=5)
+        assert event.to_row()[1] == "2024-03-01 10:00:05"
+
+    def test_accepts_epoch_and_setter(self):
+        event = self._event(0, 60)
+        assert event.timestamp_start == datetime(1970, 1, 1)
+        event["timestamp_start"] = datetime(2024, 1, 1)
+        assert event.start_ts == to_epoch(datetime(2024, 1, 1))
+        assert event.to_epoch_values()[1] == event.start_ts
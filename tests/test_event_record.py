@@ -0,0 +1,63 @@
+import random
+import sys
+from datetime import datetime
+from case_generator import CaseGenerator
+from constants import CSV_FIELD_NAMES
+from event_record import CaseAttributes, Event
+
+
+class TestEventRecord:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+
+    def test_events_share_case_attributes_object(self):
+        events = self.gen.generate_case(
+            "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+        )
+        assert all(isinstance(e, Event) for e in events)
+        assert all(e.case is events[0].case for e in events)
+
+    def test_no_instance_dict(self):
+        events = self.gen.generate_case(
+            "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+        )
+        assert not hasattr(events[0], "__dict__")
+        assert not hasattr(events[0].case, "__dict__")
+
+    def test_mapping_access_matches_fields(self):
+        events = self.gen.generate_case(
+            "LoanApplication", start_time=datetime(2024, 3, 1)
+        )
+        e = events[0]
+        assert list(e.keys()) == CSV_FIELD_NAMES
+        assert e["activity"] == e.activity
+        assert e["user_id"] == e.case.user_id
+        assert "cost" in e
+        assert "missing" not in e
+        assert e.get("missing") is None
+
+    def test_case_field_assignment_updates_shared_case(self):
+        case = CaseAttributes("user_1", "IT", "low", 10.0, "c")
+        e1 = Event(1, datetime(2024, 1, 1), datetime(2024, 1, 1), "P", "A",
+                   1, "Clerk", "R", "EMP-0001", False, None, False, case)
+        e2 = Event(1, datetime(2024, 1, 1), datetime(2024, 1, 1), "P", "B",
+                   1, "Clerk", "R", "EMP-0001", False, None, False, case)
+        e1["department"] = "HR"
+        assert e2["department"] == "HR"
+
+    def test_to_row_formats_timestamps(self):
+        case = CaseAttributes("user_1", "IT", "low", 10.5, "c")
+        e = Event(7, datetime(2024, 1, 1, 9, 5), datetime(2024, 1, 1, 9, 30),
+                  "P", "A", 25, "Clerk", "R", "EMP-0001", False, None, False, case)
+        row = e.to_row()
+        assert len(row) == len(CSV_FIELD_NAMES)
+        assert row[:3] == (7, "2024-01-01 09:05:00", "2024-01-01 09:30:00")
+        assert row[-5:] == ("user_1", "IT", "low", 10.5, "c")
+
+    def test_smaller_than_equivalent_dict(self):
+        events = self.gen.generate_case(
+            "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+        )
+        e = events[0]
+        assert sys.getsizeof(e) < sys.getsizeof(e.to_dict())
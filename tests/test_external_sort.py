@@ -0,0 +1,120 @@
+import csv
+import random
+import pytest
+from datetime import datetime
+from case_generator import CaseGenerator
+from constants import CSV_FIELD_NAMES
+from csv_writer import CSVWriter
+from external_sort import ExternalSorter
+from logger import get_logger
+from main import ProcessMiningGenerator
+
+HEADER = (",".join(CSV_FIELD_NAMES) + "\n").encode("utf-8")
+
+
+class TestExternalSorter:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+        self.row_builder = CSVWriter(get_logger())._event_to_row
+
+    def _batch(self, n_cases, day):
+        return self.gen.generate_multiple_cases(
+            "OrderFulfillment", num_cases=n_cases, start_time=datetime(2024, 1, day)
+        )
+
+    def _read(self, path):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _sorter(self, tmp_path, **kwargs):
+        return ExternalSorter(get_logger(), str(tmp_path), self.row_builder, **kwargs)
+
+    def test_output_sorted_by_timestamp(self, tmp_path):
+        sorter = self._sorter(tmp_path, run_size=5000)
+        batches = [self._batch(20, day) for day in (20, 3, 11)]
+        for batch in batches:
+            sorter.add_events(batch)
+        path = tmp_path / "sorted.csv"
+        sorter.merge_into(str(path), HEADER)
+
+        rows = self._read(path)
+        assert len(rows) == sum(len(b) for b in batches)
+        keys = [(r["timestamp_start"], int(r["case_id"])) for r in rows]
+        assert keys == sorted(keys)
+
+    def test_same_rows_as_unsorted(self, tmp_path):
+        sorter = self._sorter(tmp_path, run_size=3000)
+        plain = tmp_path / "plain.csv"
+        writer = CSVWriter(get_logger())
+        for i, day in enumerate((9, 2)):
+            batch = self._batch(15, day)
+            sorter.add_events(batch)
+            writer.write_events_to_csv(batch, str(plain), mode="w" if i == 0 else "a")
+        path = tmp_path / "sorted.csv"
+        sorter.merge_into(str(path), HEADER)
+
+        def canonical(rows):
+            return sorted(tuple(r.values()) for r in rows)
+
+        assert canonical(self._read(path)) == canonical(self._read(plain))
+        assert path.stat().st_size == plain.stat().st_size == len(HEADER) + sorter.bytes_written
+
+    def test_multi_pass_merge_and_cleanup(self, tmp_path):
+        sorter = self._sorter(tmp_path, run_size=1, fan_in=3)
+        for day in range(1, 11):
+            sorter.add_events(self._batch(2, day * 2 % 27 + 1))
+        path = tmp_path / "sorted.csv"
+        sorter.merge_into(str(path), HEADER)
+
+        keys = [(r["timestamp_start"], int(r["case_id"])) for r in self._read(path)]
+        assert len(set(k[1] for k in keys)) == 20
+        assert keys == sorted(keys)
+        assert [p.name for p in tmp_path.iterdir()] == ["sorted.csv"]
+
+    def test_embedded_newlines_survive(self, tmp_path):
+        sorter = self._sorter(tmp_path)
+        events = self._batch(2, 5)
+        events[0]["comment"] = "multi\nline"
+        sorter.add_events(events)
+        path = tmp_path / "sorted.csv"
+        sorter.merge_into(str(path), HEADER)
+        rows = self._read(path)
+        assert len(rows) == len(events)
+        assert any(r["comment"] == "multi\nline" for r in rows)
+
+    def test_failed_merge_removes_runs(self, tmp_path):
+        sorter = self._sorter(tmp_path, run_size=1)
+        for day in (3, 1):
+            sorter.add_events(self._batch(2, day))
+        with pytest.raises(OSError):
+            sorter.merge_into(str(tmp_path / "missing" / "sorted.csv"), HEADER)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_abandoned_sorter_removes_runs(self, tmp_path):
+        with self._sorter(tmp_path, run_size=1) as sorter:
+            sorter.add_events(self._batch(2, 3))
+            assert len(list(tmp_path.iterdir())) == 1
+        assert list(tmp_path.iterdir()) == []
+
+    def test_interrupted_generation_removes_runs(self, tmp_path, monkeypatch):
+        def failing(self, events, mode, finished_cases=None):
+            self.write_batch(events, mode)
+            raise RuntimeError("stats failed")
+
+        monkeypatch.setattr(ProcessMiningGenerator, "_write_observed", failing)
+        config = {
+            "target_size_gb": 0.0003,
+            "process_distribution": {"OrderFulfillment": 1.0},
+            "anomaly_rate": 0.05,
+            "rework_rate": 0.1,
+            "start_date": "2024-01-01",
+            "time_range_days": 60,
+            "output_dir": str(tmp_path),
+            "sort_by_time": True,
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.sorter.run_size = 1
+        with pytest.raises(RuntimeError):
+            gen.generate_data()
+        assert not [p for p in tmp_path.iterdir() if p.name.startswith(".sort-")]
@@ -32,9 +32,10 @@ class TestIntegration:
         csv_files = list(tmp_path.glob("*.csv"))
         assert len(csv_files) == 1
 
-        # Config JSON saved
-        json_files = list(tmp_path.glob("*.json"))
-        assert len(json_files) == 1
+        # Config JSON and dataset stats saved
+        assert sorted(p.name for p in tmp_path.glob("*.json")) == [
+            "dataset_stats.json", "generation_config.json"
+        ]
 
         # CSV has correct headers
         with open(csv_files[0]) as f:
@@ -69,7 +70,7 @@ class TestIntegration:
         gen = ProcessMiningGenerator(config, logger)
         gen.generate_data()
 
-        json_files = list(tmp_path.glob("*.json"))
+        json_files = list(tmp_path.glob("generation_config.json"))
         assert len(json_files) == 1
 
         with open(json_files[0]) as f:
@@ -102,3 +103,309 @@ class TestIntegration:
 
         assert "OrderFulfillment" in processes
         assert "CustomerSupport" in processes
+
+    def test_normalized_layout(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0002,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "layout": "normalized",
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.generate_data()
+
+        events_path = tmp_path / "events.csv"
+        cases_path = tmp_path / "cases.csv"
+        assert sorted(p.name for p in tmp_path.glob("*.csv")) == ["cases.csv", "events.csv"]
+
+        total = events_path.stat().st_size + cases_path.stat().st_size
+        assert total >= config["target_size_gb"] * 1024 ** 3
+
+        with open(events_path) as f:
+            event_case_ids = set(row["case_id"] for row in csv.DictReader(f))
+        with open(cases_path) as f:
+            case_ids = [row["case_id"] for row in csv.DictReader(f)]
+        assert len(case_ids) == len(set(case_ids))
+        assert set(case_ids) == event_case_ids
+
+    def test_encoded_categories(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0001,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "LoanApplication": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "encode_categories": True,
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.generate_data()
+
+        assert (tmp_path / "categories.json").exists()
+        with open(gen.output_paths["events"]) as f:
+            rows = list(csv.DictReader(f))
+        assert rows
+        assert all(row["process"] in ("0", "1", "2", "3", "4") for row in rows)
+
+    def test_binary_format(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0001,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 1.0},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "format": "binary",
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.generate_data()
+
+        bin_files = list(tmp_path.glob("*.bin"))
+        assert len(bin_files) == 1
+        assert bin_files[0].stat().st_size >= config["target_size_gb"] * 1024 ** 3
+        assert (tmp_path / "categories.json").exists()
+
+    def test_parquet_format(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0001,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "CustomerSupport": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "format": "parquet",
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.generate_data()
+
+        parquet_files = list(tmp_path.glob("*.parquet"))
+        assert len(parquet_files) == 1
+        assert parquet_files[0].stat().st_size >= config["target_size_gb"] * 1024 ** 3
+        table = pq.read_table(str(parquet_files[0]))
+        assert table.num_rows > 0
+        assert table.column_names == CSV_FIELD_NAMES
+
+    def _gzip_config(self, tmp_path, size_target):
+        return {
+            "target_size_gb": 0.0005,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "CustomerSupport": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "compress": "gzip",
+            "size_target": size_target,
+            "workers": 2,
+        }
+
+    def test_gzip_uncompressed_target(self, tmp_path):
+        import gzip
+        random.seed(42)
+        config = self._gzip_config(tmp_path, "uncompressed")
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        gz_files = list(tmp_path.glob("*.csv.gz"))
+        assert len(gz_files) == 1
+        with gzip.open(gz_files[0], "rt") as f:
+            content = f.read()
+        target = config["target_size_gb"] * 1024 ** 3
+        assert len(content.encode("utf-8")) >= target
+        assert gz_files[0].stat().st_size < target
+        assert content.startswith(",".join(CSV_FIELD_NAMES))
+
+    def test_gzip_compressed_target(self, tmp_path):
+        random.seed(42)
+        config = self._gzip_config(tmp_path, "compressed")
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        gz_files = list(tmp_path.glob("*.csv.gz"))
+        assert gz_files[0].stat().st_size >= config["target_size_gb"] * 1024 ** 3
+
+    def test_xes_format(self, tmp_path):
+        import xml.etree.ElementTree as ET
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0002,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "CustomerSupport": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "format": "xes",
+        }
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        xes_files = list(tmp_path.glob("*.xes"))
+        assert len(xes_files) == 1
+        assert xes_files[0].stat().st_size >= config["target_size_gb"] * 1024 ** 3
+        root = ET.parse(str(xes_files[0])).getroot()
+        assert len(root.findall("{http://www.xes-standard.org/}trace")) > 0
+
+    def test_sqlite_format(self, tmp_path):
+        import sqlite3
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0002,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "CustomerSupport": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "format": "sqlite",
+            "layout": "normalized",
+        }
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        db_files = list(tmp_path.glob("*.sqlite"))
+        assert len(db_files) == 1
+        conn = sqlite3.connect(str(db_files[0]))
+        events, = conn.execute("SELECT COUNT(*) FROM events").fetchone()
+        cases, = conn.execute("SELECT COUNT(*) FROM cases").fetchone()
+        conn.close()
+        assert events > cases > 0
+
+    def test_sqlite_final_size_matches_target(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.004,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "CustomerSupport": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "format": "sqlite",
+            "seed": 42,
+        }
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        target = config["target_size_gb"] * 1024 ** 3
+        size = list(tmp_path.glob("*.sqlite"))[0].stat().st_size
+        # Размер после построения индексов и переноса WAL
+        assert target <= size < target * 1.03
+
+    def test_stdout_stream_output(self, tmp_path, monkeypatch):
+        import io
+        import sys
+        raw = io.BytesIO()
+        monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(raw))
+        monkeypatch.chdir(tmp_path)
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0001,
+            "output_dir": None,
+            "stream_output": "-",
+            "stream_format": "clickhouse",
+            "process_distribution": {"OrderFulfillment": 1.0},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+        }
+        ProcessMiningGenerator(config, get_logger(stream=sys.stderr)).generate_data()
+
+        data = raw.getvalue()
+        assert len(data) >= config["target_size_gb"] * 1024 ** 3
+        assert all(len(line.split(b"\t")) == len(CSV_FIELD_NAMES) for line in data.splitlines())
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sort_by_time(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0005,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 60,
+            "sort_by_time": True,
+        }
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        csv_files = list(tmp_path.glob("*.csv"))
+        assert len(csv_files) == 1
+        assert csv_files[0].stat().st_size >= config["target_size_gb"] * 1024 ** 3
+        with open(csv_files[0]) as f:
+            starts = [row["timestamp_start"] for row in csv.DictReader(f)]
+        assert starts == sorted(starts)
+        assert not [p for p in tmp_path.iterdir() if p.name.startswith(".sort-")]
+
+    def test_simulation_engine(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.0005,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "CustomerSupport": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 60,
+            "engine": "simulation",
+        }
+        ProcessMiningGenerator(config, get_logger()).generate_data()
+
+        csv_files = list(tmp_path.glob("*.csv"))
+        assert len(csv_files) == 1
+        # Размер подстраивается интенсивностью потока — точность в пределах шума
+        assert csv_files[0].stat().st_size >= 0.9 * config["target_size_gb"] * 1024 ** 3
+        with open(csv_files[0]) as f:
+            starts = [row["timestamp_start"] for row in csv.DictReader(f)]
+        assert starts == sorted(starts)
+        assert "2024-01-01" <= starts[0] and starts[-1] < "2024-04-01"
+
+    def test_simulation_rejects_normalized_layout(self, tmp_path):
+        config = {
+            "target_size_gb": 0.0001,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 1.0},
+            "anomaly_rate": 0.0,
+            "rework_rate": 0.0,
+            "start_date": "2024-01-01",
+            "engine": "simulation",
+            "layout": "normalized",
+        }
+        with pytest.raises(ValueError):
+            ProcessMiningGenerator(config, get_logger())
+
+    def test_max_memory_with_spills(self, tmp_path, monkeypatch):
+        """RSS у лимита: батчи сбрасываются досрочно, файл все равно корректен"""
+        import memory_budget
+
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.001,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "max_memory_bytes": 4 * 1024 ** 3,
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        monkeypatch.setattr(memory_budget, "current_rss", lambda: 4 * 1024 ** 3)
+        gen.generate_data()
+
+        assert gen.memory_budget.spills > 0
+        csv_files = list(tmp_path.glob("*.csv"))
+        assert csv_files[0].stat().st_size >= config["target_size_gb"] * 1024 ** 3
+        with open(csv_files[0]) as f:
+            rows = list(csv.DictReader(f))
+        assert list(rows[0].keys()) == CSV_FIELD_NAMES
+        assert len({row["case_id"] for row in rows}) > 0
@@ -0,0 +1,113 @@
+import random
+from datetime import datetime
+import pytest
+import memory_budget
+from case_generator import CaseGenerator
+from logger import get_logger
+from memory_budget import MemoryBudget, event_footprint, parse_memory_size, peak_rss
+
+MB = 1024 ** 2
+
+
+class TestParseMemorySize:
+    def test_suffixes(self):
+        assert parse_memory_size("512M") == 512 * MB
+        assert parse_memory_size("2G") == 2 * 1024 * MB
+        assert parse_memory_size("1.5g") == int(1.5 * 1024 * MB)
+        assert parse_memory_size("256MB") == 256 * MB
+
+    def test_plain_number_is_megabytes(self):
+        assert parse_memory_size("300") == 300 * MB
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_memory_size("lots")
+        with pytest.raises(ValueError):
+            parse_memory_size("0")
+
+
+class TestMemoryBudget:
+    def _budget(self, monkeypatch, rss=100 * MB, limit=1024 * MB):
+        monkeypatch.setattr(memory_budget, "current_rss", lambda: rss)
+        return MemoryBudget(limit, get_logger())
+
+    def test_limit_below_baseline_rejected(self, monkeypatch):
+        with pytest.raises(ValueError):
+            self._budget(monkeypatch, rss=500 * MB, limit=512 * MB)
+
+    def test_cap_cases_uses_event_bytes(self, monkeypatch):
+        budget = self._budget(monkeypatch)
+        budget.event_bytes = 1000
+        max_events = budget.max_events()
+        assert max_events == int((1024 - 100) * MB * 0.5 / 1000)
+        assert budget.cap_cases(10, events_per_case=6) == 10
+        assert budget.cap_cases(10 ** 9, events_per_case=6) == max_events // 6
+        assert budget.batches_capped == 1
+
+    def test_observe_first_then_max(self, monkeypatch):
+        random.seed(1)
+        events = CaseGenerator(start_case_id=1).generate_multiple_cases(
+            "HRRecruitment", num_cases=20, start_time=datetime(2024, 1, 1)
+        )
+        budget = self._budget(monkeypatch)
+        budget.observe(events, bytes_written=len(events) * 200)
+        first = budget.event_bytes
+        assert first == event_footprint(events) + 200
+        budget.observe(events, bytes_written=len(events) * 100)
+        assert budget.event_bytes == first
+        budget.observe(events, bytes_written=len(events) * 400)
+        assert budget.event_bytes > first
+
+    def test_should_spill(self, monkeypatch):
+        budget = self._budget(monkeypatch)
+        assert not budget.should_spill()
+        monkeypatch.setattr(memory_budget, "current_rss", lambda: 1000 * MB)
+        assert budget.should_spill()
+        assert budget.spills == 1
+
+    def test_spill_hysteresis(self, monkeypatch):
+        budget = self._budget(monkeypatch)
+        rss = [900 * MB]
+        monkeypatch.setattr(memory_budget, "current_rss", lambda: rss[0])
+        assert budget.should_spill()
+        # RSS не опускается после сброса — следующие куски не сбрасываются
+        assert not budget.should_spill()
+        rss[0] = 930 * MB
+        assert not budget.should_spill()
+        rss[0] = 960 * MB
+        assert budget.should_spill()
+        rss[0] = 1030 * MB
+        assert budget.should_spill()
+        # Выше лимита — сброс только при новом росте RSS, без сброса на каждом кейсе
+        assert not budget.should_spill()
+        rss[0] = 1031 * MB
+        assert budget.should_spill()
+        assert budget.spills == 4
+
+    def test_reserve_shrinks_batch(self, monkeypatch):
+        budget = self._budget(monkeypatch)
+        budget.event_bytes = 1000
+        budget.reserve(24 * MB)
+        assert budget.max_events() == int((1024 - 100 - 24) * MB * 0.5 / 1000)
+
+    def test_check_cases_bounded_by_headroom(self, monkeypatch):
+        budget = self._budget(monkeypatch)
+        budget.event_bytes = 1000
+        assert budget.check_cases(events_per_case=6) == memory_budget.SPILL_CHECK_CASES
+        monkeypatch.setattr(memory_budget, "current_rss", lambda: 1020 * MB)
+        # Порция по оценке занимает не больше четверти запаса до лимита
+        assert budget.check_cases(events_per_case=6) == int(4 * MB * 0.25 / 6000)
+        monkeypatch.setattr(memory_budget, "current_rss", lambda: 1030 * MB)
+        assert budget.check_cases(events_per_case=6) == 1
+
+    def test_report_flags_overshoot(self, monkeypatch):
+        budget = self._budget(monkeypatch)
+        monkeypatch.setattr(memory_budget, "peak_rss", lambda: 900 * MB)
+        assert budget.report()
+        assert not budget.exceeded
+        monkeypatch.setattr(memory_budget, "peak_rss", lambda: 1100 * MB)
+        assert not budget.report()
+        assert budget.exceeded
+
+    def test_peak_rss_positive(self):
+        assert peak_rss() > 0
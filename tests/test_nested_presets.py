@@ -0,0 +1,123 @@
+import argparse
+import csv
+import json
+import os
+import random
+import pytest
+from case_index import CaseIndex
+from config import CONFIG_1GB, CONFIG_30GB, CONFIG_50MB
+from logger import get_logger
+from main import ProcessMiningGenerator, nested_preset_names
+from nested_presets import PrefixCutter, check_nested_presets, copy_prefix
+
+
+class _Event:
+    def __init__(self, case_id):
+        self.case_id = case_id
+
+
+class TestPrefixCutter:
+    def test_cuts_at_case_boundaries(self):
+        cutter = PrefixCutter([25, 10])
+        cutter.start(2)
+        events = [_Event(1)] * 3 + [_Event(2)] * 2 + [_Event(3)] * 4
+        cutter.add_rows(events[:4], [b"xxx"] * 4)
+        assert cutter.next_threshold == 25
+        cutter.add_rows(events[4:], [b"xxx"] * 5)
+        cutter.close()
+        # Кейс 1 кончается на 11 (>= 10), кейс 2 — на 17, кейс 3 — на 29 (конец файла)
+        assert cutter.cuts[10] == {"offset": 11, "cases": 1, "events": 3}
+        assert cutter.cuts[25] == {"offset": 29, "cases": 3, "events": 9}
+        assert cutter.next_threshold is None
+
+    def test_threshold_not_reached(self):
+        cutter = PrefixCutter([100])
+        cutter.start(0)
+        cutter.add_rows([_Event(1)], [b"x"])
+        cutter.close()
+        assert cutter.cuts == {}
+
+
+class TestCopyPrefix:
+    def test_copies_prefix_into_new_inode(self, tmp_path):
+        src = tmp_path / "src"
+        src.write_bytes(bytes(range(256)) * 100)
+        dst = tmp_path / "dst"
+        os.link(src, dst)
+        copy_prefix(str(src), str(dst), 1000)
+        assert dst.read_bytes() == src.read_bytes()[:1000]
+        # Исходный файл (бывшая жесткая ссылка) не тронут
+        assert src.stat().st_size == 25600
+
+
+class TestPresetSelection:
+    def test_rejects_different_mix(self):
+        with pytest.raises(ValueError):
+            check_nested_presets({"30GB": CONFIG_30GB, "1GB": CONFIG_1GB})
+        check_nested_presets({"1GB": CONFIG_1GB, "50MB": CONFIG_50MB})
+
+    def test_names(self):
+        args = argparse.Namespace(config="1GB,50MB", nested=False)
+        assert nested_preset_names(args) == ["50MB", "1GB"]
+        args = argparse.Namespace(config="1GB", nested=True)
+        assert nested_preset_names(args) == ["50MB", "500MB", "750MB", "1GB"]
+        args = argparse.Namespace(config="1GB", nested=False)
+        assert nested_preset_names(args) == []
+
+
+class TestNestedGeneration:
+    def test_smaller_presets_are_prefixes(self, tmp_path):
+        random.seed(42)
+        config = {
+            "target_size_gb": 0.001,
+            "output_dir": str(tmp_path / "big"),
+            "process_distribution": {"OrderFulfillment": 0.6, "LoanApplication": 0.4},
+            "anomaly_rate": 0.03,
+            "rework_rate": 0.08,
+            "start_date": "2024-01-01",
+            "time_range_days": 30,
+            "case_index": True,
+            "nested_presets": [
+                {"name": "a", "target_size_gb": 0.0002, "output_dir": str(tmp_path / "a")},
+                {"name": "b", "target_size_gb": 0.0005, "output_dir": str(tmp_path / "b")},
+            ],
+        }
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.generate_data()
+
+        big = open(gen.output_paths["events"], "rb").read()
+        for preset in config["nested_presets"]:
+            path = os.path.join(preset["output_dir"], f"process_log_{str(preset['target_size_gb']).replace('.', '_')}GB.csv")
+            data = open(path, "rb").read()
+            assert big.startswith(data)
+            assert len(data) >= preset["target_size_gb"] * 1024 ** 3
+            # Срез по границе кейса: следующий кейс в большом файле начинается заново
+            last_case = data.rsplit(b"\n", 2)[-2].split(b",")[0]
+            assert big[len(data):].split(b",")[0] != last_case
+
+            with open(os.path.join(preset["output_dir"], "generation_config.json")) as f:
+                saved = json.load(f)
+            with open(path, newline="") as f:
+                rows = list(csv.reader(f))[1:]
+            assert saved["target_size_gb"] == preset["target_size_gb"]
+            assert saved["nested_source"]["events"] == len(rows)
+            assert saved["nested_source"]["cases"] == len({row[0] for row in rows})
+            assert "nested_presets" not in saved
+
+            with CaseIndex(path) as index:
+                assert len(index) == saved["nested_source"]["cases"]
+                assert index.read_case(int(rows[-1][0]))[-1] == rows[-1]
+
+    def test_rejects_simulation(self, tmp_path):
+        config = {
+            "target_size_gb": 0.001,
+            "output_dir": str(tmp_path),
+            "process_distribution": {"OrderFulfillment": 1.0},
+            "anomaly_rate": 0.0,
+            "rework_rate": 0.0,
+            "start_date": "2024-01-01",
+            "engine": "simulation",
+            "nested_presets": [{"name": "a", "target_size_gb": 0.0005, "output_dir": str(tmp_path)}],
+        }
+        with pytest.raises(ValueError):
+            ProcessMiningGenerator(config, get_logger())
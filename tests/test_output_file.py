@@ -0,0 +1,159 @@
+import os
+import random
+import pytest
+import output_file
+from csv_writer import CSVWriter
+from logger import get_logger
+from main import ProcessMiningGenerator
+from output_file import OutputFile
+
+
+class TestOutputFile:
+    def test_preallocate_and_truncate(self, tmp_path):
+        path = str(tmp_path / "out.csv")
+        output = OutputFile(path, buffer_size=1024, preallocate=1 << 20)
+        output.write(b"a" * 3000)
+        output.write(b"b" * 100)
+        assert output.size == 3100
+        assert os.path.getsize(path) == 1 << 20
+        output.close()
+        assert os.path.getsize(path) == 3100
+        with open(path, "rb") as f:
+            assert f.read() == b"a" * 3000 + b"b" * 100
+        output.close()
+
+    def test_written_ranges_dropped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(output_file, "DONTNEED_WINDOW", 1000)
+        path = str(tmp_path / "out.csv")
+        output = OutputFile(path, preallocate=10000)
+        for _ in range(5):
+            output.write(b"x" * 300)
+        if output.io_hints:
+            assert output._dropped == 1200
+        output.close()
+        assert os.path.getsize(path) == 1500
+
+    def test_hints_without_preallocation(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(output_file, "DONTNEED_WINDOW", 1000)
+        output = OutputFile(str(tmp_path / "out.csv"))
+        assert output.io_hints == hasattr(os, "posix_fadvise")
+        for _ in range(5):
+            output.write(b"x" * 300)
+        if output.io_hints:
+            assert output._dropped == 1200
+        output.close()
+
+    def test_preallocated_tail_truncated_on_error(self, tmp_path):
+        path = str(tmp_path / "out.csv")
+        with pytest.raises(RuntimeError):
+            with OutputFile(path, buffer_size=1024, preallocate=1 << 20) as output:
+                output.write(b"a" * 3000)
+                raise RuntimeError("batch failed")
+        assert output.closed
+        with open(path, "rb") as f:
+            assert f.read() == b"a" * 3000
+
+    def test_writer_keeps_one_handle(self, tmp_path, monkeypatch):
+        opened = []
+        monkeypatch.setattr(
+            output_file, "open", lambda *a, **kw: opened.append(a) or open(*a, **kw), raising=False
+        )
+        writer = CSVWriter(get_logger(), buffer_size=4096)
+        path = str(tmp_path / "out.csv")
+        events = [{"case_id": 1, "activity": "A"}]
+        writer.write_events_to_csv(events, path, mode="w")
+        writer.write_events_to_csv(events, path, mode="a")
+        writer.close()
+        assert len(opened) == 1
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 3 and lines[0].startswith("case_id,")
+        assert writer.output_size(path) == os.path.getsize(path)
+
+    def test_writer_appends_to_existing_file(self, tmp_path):
+        path = str(tmp_path / "out.csv")
+        events = [{"case_id": 1, "activity": "A"}]
+        CSVWriter(get_logger()).write_events_to_csv(events, path, mode="w")
+        with open(path, "rb") as f:
+            before = f.read()
+
+        writer = CSVWriter(get_logger(), buffer_size=4096)
+        writer.write_events_to_csv([{"case_id": 2, "activity": "B"}], path, mode="a")
+        assert writer.output_size(path) > len(before)
+        writer.close()
+        with open(path, "rb") as f:
+            data = f.read()
+        assert data.startswith(before)
+        assert data.count(b"case_id,") == 1
+        assert len(data.splitlines()) == 3
+        assert writer.output_size(path) == len(data)
+
+    def test_append_with_preallocation_keeps_contents(self, tmp_path):
+        path = str(tmp_path / "out.csv")
+        with open(path, "wb") as f:
+            f.write(b"head\n")
+        output = OutputFile(path, preallocate=1 << 16, mode="a")
+        assert output.size == 5
+        output.write(b"tail\n")
+        output.close()
+        with open(path, "rb") as f:
+            assert f.read() == b"head\ntail\n"
+
+
+class TestGeneratorPreallocate:
+    CONFIG = {
+        "target_size_gb": 0.0003,
+        "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+        "anomaly_rate": 0.05,
+        "rework_rate": 0.1,
+        "start_date": "2024-01-01",
+        "time_range_days": 60,
+        "dataset_stats": False,
+        "seed": 42,
+    }
+
+    def _generate(self, output_dir, **extra):
+        random.seed(42)
+        gen = ProcessMiningGenerator(
+            dict(self.CONFIG, output_dir=str(output_dir), **extra), get_logger()
+        )
+        gen.generate_data()
+        with open(gen.output_paths["events"], "rb") as f:
+            return f.read()
+
+    def test_same_bytes_as_plain_append(self, tmp_path):
+        plain = self._generate(tmp_path / "plain")
+        preallocated = self._generate(
+            tmp_path / "pre", preallocate=True, write_buffer_bytes=64 * 1024
+        )
+        assert preallocated == plain
+
+    def test_rejects_compressed_output(self, tmp_path):
+        with pytest.raises(ValueError, match="--preallocate"):
+            ProcessMiningGenerator(
+                dict(self.CONFIG, output_dir=str(tmp_path), preallocate=True, compress="gzip"),
+                get_logger(),
+            )
+
+    def test_interrupted_run_truncates_reserve(self, tmp_path, monkeypatch):
+        calls = []
+
+        def failing(self, events, mode, finished_cases=None):
+            if calls:
+                raise RuntimeError("disk error")
+            calls.append(mode)
+            self.write_batch(events, mode)
+
+        monkeypatch.setattr(ProcessMiningGenerator, "_write_observed", failing)
+        random.seed(42)
+        gen = ProcessMiningGenerator(
+            dict(self.CONFIG, output_dir=str(tmp_path), preallocate=True), get_logger()
+        )
+        with pytest.raises(RuntimeError):
+            gen.generate_data()
+        path = gen.output_paths["events"]
+        with open(path, "rb") as f:
+            data = f.read()
+        # Первый батч на диске целиком, нулей резерва за ним нет
+        assert len(data) < self.CONFIG["target_size_gb"] * 1024 ** 3
+        assert data.endswith(b"\n") and b"\0" not in data
@@ -0,0 +1,142 @@
+import errno
+import gzip
+import json
+import os
+import random
+import pytest
+from dataset_stats import STATS_FILENAME
+from logger import get_logger
+from main import ProcessMiningGenerator
+from parallel_generation import BatchFactory, RegionWritePipeline
+from resource_pool import ResourcePool
+
+CONFIG = {
+    "target_size_gb": 0.004,
+    "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.3, "CustomerSupport": 0.2},
+    "anomaly_rate": 0.05,
+    "rework_rate": 0.1,
+    "start_date": "2024-01-01",
+    "time_range_days": 60,
+    "seed": 11,
+}
+
+
+def _generate(output_dir, **extra):
+    random.seed(0)
+    gen = ProcessMiningGenerator(dict(CONFIG, output_dir=str(output_dir), **extra), get_logger())
+    gen.generate_data()
+    return gen
+
+
+class TestBatchFactory:
+    def test_batch_depends_only_on_seed_and_number(self):
+        pool = ResourcePool(seed=1)
+        factory = BatchFactory(CONFIG, pool, seed=5, batch_cases=50)
+        third = factory.serialize(3, with_stats=False)
+        factory.serialize(0, with_stats=False)
+        assert BatchFactory(CONFIG, pool, seed=5, batch_cases=50).serialize(3, False) == third
+
+        events = factory.events(3)
+        assert sorted({event.case_id for event in events}) == list(range(151, 201))
+
+
+class TestParallelGeneration:
+    def test_identical_for_any_number_of_processes(self, tmp_path):
+        single = _generate(tmp_path / "one", processes=1)
+        several = _generate(tmp_path / "three", processes=3)
+        with open(single.output_paths["events"], "rb") as f:
+            data = f.read()
+        with open(several.output_paths["events"], "rb") as f:
+            assert f.read() == data
+        with open(tmp_path / "one" / STATS_FILENAME, "rb") as f1, \
+                open(tmp_path / "three" / STATS_FILENAME, "rb") as f3:
+            assert f1.read() == f3.read()
+
+        target = int(CONFIG["target_size_gb"] * 1024 ** 3)
+        lines = data.split(b"\n")[1:-1]
+        case_ids = [int(line.split(b",", 1)[0]) for line in lines]
+        # Файл обрезан по границе кейса сразу после цели, case_id — подряд
+        assert target <= len(data) < target + 4096
+        assert sorted(set(case_ids)) == list(range(1, case_ids[-1] + 1))
+
+        with open(tmp_path / "one" / STATS_FILENAME) as f:
+            stats = json.load(f)
+        assert stats["cases"] == case_ids[-1]
+        assert stats["events"] == len(lines)
+
+    def test_stats_replay_keeps_parent_state(self, tmp_path):
+        random.seed(0)
+        gen = ProcessMiningGenerator(
+            dict(CONFIG, output_dir=str(tmp_path), processes=2), get_logger()
+        )
+        pool_state = gen.resource_pool._rng.getstate()
+        random_state = random.getstate()
+        gen.generate_data()
+        # Последний батч обрезан и воспроизведен ради агрегатов
+        assert gen.stats.cases % 2000 != 0
+        assert gen.resource_pool._rng.getstate() == pool_state
+        assert random.getstate() == random_state
+
+    def test_gzip(self, tmp_path):
+        plain = _generate(tmp_path / "plain", processes=2, dataset_stats=False)
+        packed = _generate(tmp_path / "gz", processes=2, dataset_stats=False, compress="gzip")
+        with open(plain.output_paths["events"], "rb") as f, \
+                gzip.open(packed.output_paths["events"], "rb") as g:
+            assert g.read() == f.read()
+
+    def test_worker_failure_is_reported(self, tmp_path):
+        with pytest.raises(RuntimeError, match="worker"):
+            _generate(tmp_path, processes=2, process_distribution={"NoSuchProcess": 1.0})
+
+    def test_region_write_matches_ring_transport(self, tmp_path):
+        ring = _generate(tmp_path / "ring", processes=2)
+        region = _generate(tmp_path / "region", processes=3, region_write=True)
+        with open(ring.output_paths["events"], "rb") as f, \
+                open(region.output_paths["events"], "rb") as g:
+            assert g.read() == f.read()
+        with open(tmp_path / "ring" / STATS_FILENAME, "rb") as f, \
+                open(tmp_path / "region" / STATS_FILENAME, "rb") as g:
+            assert g.read() == f.read()
+
+    def test_region_write_fallocate_errors(self, tmp_path, monkeypatch):
+        def failing(code):
+            def fallocate(fd, offset, length):
+                raise OSError(code, os.strerror(code))
+            return fallocate
+
+        path = str(tmp_path / "log.csv")
+        args = (path, b"h\n", 1024, CONFIG, ResourcePool(seed=1), 1, 5, False)
+        # Без поддержки fallocate — запись без резерва
+        monkeypatch.setattr(os, "posix_fallocate", failing(errno.EOPNOTSUPP), raising=False)
+        RegionWritePipeline(*args).close()
+        assert os.path.getsize(path) == 2
+
+        monkeypatch.setattr(os, "posix_fallocate", failing(errno.ENOSPC), raising=False)
+        with pytest.raises(Exception, match="Недостаточно места"):
+            RegionWritePipeline(*args)
+        assert not os.path.exists(path)
+
+        monkeypatch.setattr(os, "posix_fallocate", failing(errno.EIO), raising=False)
+        with pytest.raises(OSError):
+            RegionWritePipeline(*args)
+        assert not os.path.exists(path)
+
+    def test_region_worker_failure_is_reported(self, tmp_path):
+        with pytest.raises(RuntimeError, match="worker"):
+            _generate(
+                tmp_path, processes=2, region_write=True,
+                process_distribution={"NoSuchProcess": 1.0},
+            )
+
+    def test_region_write_requires_processes(self, tmp_path):
+        with pytest.raises(ValueError, match="--region-write"):
+            ProcessMiningGenerator(
+                dict(CONFIG, output_dir=str(tmp_path), region_write=True), get_logger()
+            )
+
+    def test_rejects_case_index(self, tmp_path):
+        with pytest.raises(ValueError, match="--processes"):
+            ProcessMiningGenerator(
+                dict(CONFIG, output_dir=str(tmp_path), processes=2, case_index=True),
+                get_logger(),
+            )
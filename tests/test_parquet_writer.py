@@ -0,0 +1,81 @@
+import random
+import pytest
+from datetime import datetime
+from case_generator import CaseGenerator
+from constants import CSV_FIELD_NAMES
+from logger import get_logger
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from parquet_writer import PARQUET_DICTIONARY_FIELDS, ParquetWriter  # noqa: E402
+
+
+class TestParquetWriter:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+        self.writer = ParquetWriter(get_logger(), row_group_size=20)
+
+    def _generate_events(self, n_cases=5):
+        events = []
+        for _ in range(n_cases):
+            events.extend(self.gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+            ))
+        return events
+
+    def test_batches_become_row_groups(self, tmp_path):
+        path = str(tmp_path / "log.parquet")
+        events1, events2 = self._generate_events(2), self._generate_events(2)
+        self.writer.write_events_to_parquet(events1, path, mode="w")
+        self.writer.write_events_to_parquet(events2, path, mode="a")
+        self.writer.close()
+
+        meta = pq.ParquetFile(path).metadata
+        assert meta.num_rows == len(events1) + len(events2)
+        assert meta.num_row_groups == 2
+
+    def test_row_group_size_bounds_batch(self, tmp_path):
+        path = str(tmp_path / "log.parquet")
+        events = self._generate_events(10)
+        self.writer.write_events_to_parquet(events, path)
+        self.writer.close()
+        meta = pq.ParquetFile(path).metadata
+        assert meta.num_row_groups == -(-len(events) // 20)
+
+    def test_schema_and_values(self, tmp_path):
+        path = str(tmp_path / "log.parquet")
+        events = self._generate_events(3)
+        self.writer.write_events_to_parquet(events, path)
+        self.writer.close()
+
+        table = pq.read_table(path)
+        assert table.column_names == CSV_FIELD_NAMES
+        assert str(table.schema.field("timestamp_start").type) == "timestamp[ms]"
+        rows = table.to_pylist()
+        for row, event in zip(rows, events):
+            assert row == event.to_dict()
+
+    def test_categorical_columns_dictionary_encoded(self, tmp_path):
+        path = str(tmp_path / "log.parquet")
+        self.writer.write_events_to_parquet(self._generate_events(3), path)
+        self.writer.close()
+        row_group = pq.ParquetFile(path).metadata.row_group(0)
+        for i in range(row_group.num_columns):
+            column = row_group.column(i)
+            if column.path_in_schema in PARQUET_DICTIONARY_FIELDS:
+                assert column.has_dictionary_page
+
+    def test_bytes_written_tracks_stream(self, tmp_path):
+        path = tmp_path / "log.parquet"
+        self.writer.write_events_to_parquet(self._generate_events(3), str(path))
+        in_progress = self.writer.bytes_written
+        assert in_progress > 0
+        self.writer.close()
+        assert self.writer.bytes_written == path.stat().st_size >= in_progress
+
+    def test_append_requires_open_file(self, tmp_path):
+        with pytest.raises(ValueError, match="appended"):
+            self.writer.write_events_to_parquet(
+                self._generate_events(1), str(tmp_path / "log.parquet"), mode="a"
+            )
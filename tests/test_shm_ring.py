@@ -0,0 +1,67 @@
+import multiprocessing
+import pytest
+from shm_ring import ShmRing
+
+
+def _produce(ring, messages):
+    for message in messages:
+        ring.send(message)
+    ring.send_close()
+    ring.close()
+
+
+class TestShmRing:
+    def test_roundtrip_in_place(self):
+        with ShmRing(slots=4, slot_bytes=64) as ring:
+            ring.send(b"hello")
+            ring.send([b"a,b\n", bytearray(b"c,d\n"), memoryview(b"e,f\n")])
+            ring.send(b"")
+            views = list(ring.receive())
+            assert len(views) == 1
+            assert ring.receive_bytes() == b"a,b\nc,d\ne,f\n"
+            assert ring.receive_bytes() == b""
+            assert not ring.closed
+
+    def test_message_spans_slots(self):
+        rows = [b"%06d\n" % i for i in range(100)]
+        with ShmRing(slots=16, slot_bytes=100) as ring:
+            ring.send(rows)
+            fragments = [bytes(view) for view in ring.receive()]
+            assert len(fragments) == 7  # 700 байт — ровно 7 слотов, без пустого хвоста
+            assert all(len(fragment) == 100 for fragment in fragments[:-1])
+            assert b"".join(fragments) == b"".join(rows)
+
+    def test_backpressure_timeout(self):
+        with ShmRing(slots=1, slot_bytes=8) as ring:
+            ring.send(b"x" * 8)
+            with pytest.raises(TimeoutError):
+                ring.send(b"y" * 8, timeout=0.05)
+            assert ring.receive_bytes() == b"x" * 8
+            with pytest.raises(TimeoutError):
+                ring.receive_bytes(timeout=0.05)
+
+    def test_close_marker(self):
+        with ShmRing(slots=2, slot_bytes=8) as ring:
+            ring.send_close()
+            assert list(ring.receive()) == []
+            assert ring.closed
+
+    @pytest.mark.parametrize("method", ["fork", "spawn"])
+    def test_worker_process(self, method):
+        if method not in multiprocessing.get_all_start_methods():
+            pytest.skip(f"{method} start method is unavailable")
+        ctx = multiprocessing.get_context(method)
+        # Сообщения в несколько раз больше всего кольца: писатель ждет читателя
+        messages = [bytes([i]) * 5000 for i in range(20)]
+        with ShmRing(slots=3, slot_bytes=1024, ctx=ctx) as ring:
+            process = ctx.Process(target=_produce, args=(ring, messages))
+            process.start()
+            received = []
+            while True:
+                data = ring.receive_bytes(timeout=30)
+                if ring.closed:
+                    break
+                received.append(data)
+            process.join()
+        assert received == messages
+        assert process.exitcode == 0
@@ -0,0 +1,101 @@
+import random
+from collections import Counter
+from datetime import datetime
+from case_generator import CaseGenerator
+from resource_pool import ResourcePool
+from simulation import SimulationEngine
+
+START = datetime(2024, 1, 1)
+
+
+class TestIterCase:
+    def test_iter_case_matches_generate_case(self):
+        eager_gen = CaseGenerator(start_case_id=1, resource_pool=ResourcePool(seed=1))
+        lazy_gen = CaseGenerator(start_case_id=1, resource_pool=ResourcePool(seed=1))
+        random.seed(5)
+        eager = eager_gen.generate_case("LoanApplication", START)
+        random.seed(5)
+        lazy = list(lazy_gen.iter_case("LoanApplication", START))
+        assert [e.to_row() for e in lazy] == [e.to_row() for e in eager]
+
+
+class TestSimulationEngine:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+
+    def _engine(self, cases_per_day=20.0, days=30, distribution=None):
+        return SimulationEngine(
+            self.gen,
+            distribution or {"OrderFulfillment": 0.6, "CustomerSupport": 0.4},
+            START,
+            days,
+            cases_per_day=cases_per_day,
+        )
+
+    def _drain(self, engine, batch=500):
+        events = []
+        while not engine.exhausted:
+            events.extend(engine.next_batch(batch))
+        return events
+
+    def test_events_in_time_order(self):
+        events = self._drain(self._engine())
+        starts = [e.timestamp_start for e in events]
+        assert starts == sorted(starts)
+
+    def test_cases_complete_and_ordered(self):
+        engine = self._engine()
+        events = self._drain(engine)
+        by_case = {}
+        for e in events:
+            by_case.setdefault(e.case_id, []).append(e)
+        assert len(by_case) == engine.cases_started
+        assert engine.open_cases == 0
+        for case_events in by_case.values():
+            starts = [e.timestamp_start for e in case_events]
+            assert starts == sorted(starts)
+
+    def test_arrivals_within_range(self):
+        engine = self._engine(days=10)
+        events = self._drain(engine)
+        first_starts = {}
+        for e in events:
+            first_starts.setdefault(e.case_id, e.timestamp_start)
+        # Первое событие может сдвинуться на рабочие часы, но кейс начат в интервале
+        assert min(first_starts.values()) >= START
+        assert engine.cases_started > 0
+
+    def test_arrival_rate_roughly_poisson_mean(self):
+        engine = self._engine(cases_per_day=50.0, days=60)
+        self._drain(engine)
+        # Q1: множители 0.8 (OrderFulfillment) и 1.0 (CustomerSupport)
+        expected = 50.0 * 60 * (0.6 * 0.8 + 0.4 * 1.0)
+        assert abs(engine.cases_started - expected) < expected * 0.1
+
+    def test_process_distribution(self):
+        engine = self._engine(cases_per_day=50.0, days=60)
+        events = self._drain(engine)
+        processes = Counter({e.case_id: e.process for e in events}.values())
+        assert processes["OrderFulfillment"] > processes["CustomerSupport"]
+
+    def test_batch_size_respected(self):
+        engine = self._engine()
+        batch = engine.next_batch(7)
+        assert len(batch) == 7
+
+    def test_stop_arrivals_drains_open_cases(self):
+        engine = self._engine(cases_per_day=100.0)
+        first_events = engine.next_batch(200)
+        started = engine.cases_started
+        engine.stop_arrivals()
+        rest = self._drain(engine)
+        assert engine.cases_started == started
+        assert engine.open_cases == 0
+        case_ids = {e.case_id for e in first_events + rest}
+        assert len(case_ids) == started
+
+    def test_zero_rate_produces_nothing(self):
+        engine = self._engine(cases_per_day=0)
+        assert engine.exhausted
+        assert engine.next_batch(10) == []
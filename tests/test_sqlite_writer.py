@@ -0,0 +1,103 @@
+import os
+import random
+import sqlite3
+from datetime import datetime
+from case_generator import CaseGenerator
+from constants import CSV_FIELD_NAMES, CASE_CSV_FIELD_NAMES
+from logger import get_logger
+from sqlite_writer import SQLITE_INDEXES, SQLiteWriter
+
+
+class TestSQLiteWriter:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+
+    def _generate_events(self, n_cases=3):
+        events = []
+        for _ in range(n_cases):
+            events.extend(self.gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+            ))
+        return events
+
+    def _columns(self, conn, table):
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+    def test_flat_load(self, tmp_path):
+        path = str(tmp_path / "log.sqlite")
+        writer = SQLiteWriter(get_logger())
+        events1, events2 = self._generate_events(2), self._generate_events(3)
+        writer.write_events_to_sqlite(events1, path, mode="w")
+        writer.write_events_to_sqlite(events2, path, mode="a")
+        writer.close()
+
+        conn = sqlite3.connect(path)
+        assert self._columns(conn, "events") == CSV_FIELD_NAMES
+        count, = conn.execute("SELECT COUNT(*) FROM events").fetchone()
+        assert count == len(events1) + len(events2)
+        first = conn.execute(
+            "SELECT timestamp_start, activity, anomaly FROM events ORDER BY rowid LIMIT 1"
+        ).fetchone()
+        assert first == ("2024-01-15 10:00:00", events1[0]["activity"], 0)
+        conn.close()
+
+    def test_indexes_built_on_close(self, tmp_path):
+        path = str(tmp_path / "log.sqlite")
+        writer = SQLiteWriter(get_logger())
+        writer.write_events_to_sqlite(self._generate_events(2), path)
+
+        conn = sqlite3.connect(path)
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert not names & {name for name, _, _ in SQLITE_INDEXES}
+        conn.close()
+
+        writer.close()
+        conn = sqlite3.connect(path)
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert {name for name, _, _ in SQLITE_INDEXES} <= names
+        conn.close()
+        assert not (tmp_path / "log.sqlite-wal").exists()
+
+    def test_normalized_load(self, tmp_path):
+        path = str(tmp_path / "log.sqlite")
+        writer = SQLiteWriter(get_logger(), normalized=True)
+        events = self._generate_events(4)
+        writer.write_events_to_sqlite(events, path)
+        writer.close()
+
+        conn = sqlite3.connect(path)
+        assert self._columns(conn, "cases") == CASE_CSV_FIELD_NAMES
+        assert "user_id" not in self._columns(conn, "events")
+        case_ids = [r[0] for r in conn.execute("SELECT case_id FROM cases ORDER BY case_id")]
+        assert case_ids == [1, 2, 3, 4]
+        joined, = conn.execute(
+            "SELECT COUNT(*) FROM events JOIN cases USING (case_id)"
+        ).fetchone()
+        assert joined == len(events)
+        conn.close()
+
+    def test_mode_w_replaces_database(self, tmp_path):
+        path = str(tmp_path / "log.sqlite")
+        writer = SQLiteWriter(get_logger())
+        writer.write_events_to_sqlite(self._generate_events(2), path)
+        writer.close()
+        events = self._generate_events(1)
+        writer.write_events_to_sqlite(events, path, mode="w")
+        writer.close()
+
+        conn = sqlite3.connect(path)
+        count, = conn.execute("SELECT COUNT(*) FROM events").fetchone()
+        assert count == len(events)
+        conn.close()
+
+    def test_bytes_written_predicts_final_size(self, tmp_path):
+        path = str(tmp_path / "log.sqlite")
+        writer = SQLiteWriter(get_logger())
+        for _ in range(5):
+            writer.write_events_to_sqlite(self._generate_events(400), path, mode="a")
+        expected = writer.bytes_written
+        # Индексы строятся только в close(): оценка должна их учесть
+        assert expected > os.path.getsize(path)
+        writer.close()
+        assert abs(os.path.getsize(path) - expected) < 0.03 * expected
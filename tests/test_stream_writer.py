@@ -0,0 +1,101 @@
+import io
+import os
+import random
+import sys
+import threading
+import pytest
+from datetime import datetime
+from case_generator import CaseGenerator
+from constants import CSV_FIELD_NAMES
+from csv_writer import CSVWriter
+from logger import get_logger
+from stream_writer import StreamWriter, format_text_row, is_stream_target
+
+
+class TestFormatTextRow:
+    def test_postgres_nulls_bools_escapes(self):
+        row = (1, "a\tb", "line\nbreak", "back\\slash", None, True, False, 2.5)
+        assert format_text_row(row, "postgres") == (
+            "1\ta\\tb\tline\\nbreak\tback\\\\slash\t\\N\tt\tf\t2.5\n"
+        )
+
+    def test_clickhouse_bools(self):
+        assert format_text_row((True, False, None), "clickhouse") == "1\t0\t\\N\n"
+
+
+class TestIsStreamTarget:
+    @pytest.mark.parametrize("output,expected", [
+        ("-", True), ("fifo:/tmp/pipe", True), ("./dataset/", False), (None, False),
+    ])
+    def test_targets(self, output, expected):
+        assert is_stream_target(output) == expected
+
+
+class TestStreamWriter:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+        self.row_builder = CSVWriter(get_logger())._event_to_row
+
+    def _generate_events(self, n_cases=3):
+        events = []
+        for _ in range(n_cases):
+            events.extend(self.gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0)
+            ))
+        return events
+
+    def test_stdout_csv_header_once(self, monkeypatch):
+        raw = io.BytesIO()
+        monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(raw))
+        writer = StreamWriter(
+            get_logger(stream=sys.stderr), "-", "csv", row_builder=self.row_builder
+        )
+        events1, events2 = self._generate_events(2), self._generate_events(2)
+        writer.write_events_to_stream(events1, mode="w")
+        writer.write_events_to_stream(events2, mode="a")
+        writer.close()
+
+        lines = raw.getvalue().decode("utf-8").splitlines()
+        assert lines[0] == ",".join(CSV_FIELD_NAMES)
+        assert len(lines) == 1 + len(events1) + len(events2)
+        assert writer.bytes_written == len(raw.getvalue())
+
+    def test_fifo_postgres_copy(self, tmp_path):
+        path = str(tmp_path / "pipe")
+        received = []
+
+        def reader():
+            while not os.path.exists(path):
+                pass
+            with open(path, "rb") as f:
+                received.append(f.read())
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        writer = StreamWriter(
+            get_logger(), f"fifo:{path}", "postgres", row_builder=self.row_builder
+        )
+        events = self._generate_events(3)
+        writer.write_events_to_stream(events)
+        writer.close()
+        thread.join(timeout=10)
+
+        lines = received[0].decode("utf-8").splitlines()
+        assert len(lines) == len(events)
+        fields = lines[0].split("\t")
+        assert len(fields) == len(CSV_FIELD_NAMES)
+        assert fields[CSV_FIELD_NAMES.index("anomaly_type")] == "\\N"
+        assert fields[CSV_FIELD_NAMES.index("anomaly")] == "f"
+        assert writer.bytes_written == len(received[0])
+
+    def test_rejects_regular_file(self, tmp_path):
+        path = tmp_path / "file.csv"
+        path.write_text("")
+        writer = StreamWriter(get_logger(), f"fifo:{path}")
+        with pytest.raises(ValueError, match="Not a named pipe"):
+            writer.write_events_to_stream(self._generate_events(1))
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown stream format"):
+            StreamWriter(get_logger(), "-", "json")
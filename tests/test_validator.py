@@ -0,0 +1,160 @@
+import random
+import pytest
+from logger import get_logger
+from main import ProcessMiningGenerator
+from validator import split_chunks, validate_csv
+
+
+def _generate(tmp_path, **extra):
+    random.seed(42)
+    config = {
+        "target_size_gb": 0.0005,
+        "output_dir": str(tmp_path),
+        "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+        "anomaly_rate": 0.05,
+        "rework_rate": 0.1,
+        "start_date": "2024-01-01",
+        "time_range_days": 60,
+        "dataset_stats": False,
+    }
+    config.update(extra)
+    gen = ProcessMiningGenerator(config, get_logger())
+    gen.generate_data()
+    return gen.output_paths["events"]
+
+
+def _rows(path):
+    with open(path, "rb") as f:
+        return f.read().split(b"\n")
+
+
+def _write(path, lines):
+    with open(path, "wb") as f:
+        f.write(b"\n".join(lines))
+
+
+def _offset(lines, i):
+    return sum(len(line) + 1 for line in lines[:i])
+
+
+class TestValidator:
+    @pytest.mark.parametrize("engine", ["batch", "simulation"])
+    def test_generated_file_is_valid(self, tmp_path, engine):
+        path = _generate(tmp_path, engine=engine)
+        lines = _rows(path)
+        result = validate_csv(path, workers=1, chunk_bytes=32 * 1024)
+        assert result["violation_count"] == 0, result["violations"]
+        assert result["chunks"] > 5
+        assert result["rows"] == len(lines) - 2
+        assert result["cases"] == len({line.split(b",")[0] for line in lines[1:-1]})
+
+    def test_process_pool(self, tmp_path):
+        path = _generate(tmp_path)
+        result = validate_csv(path, workers=2, chunk_bytes=64 * 1024)
+        assert result["violation_count"] == 0
+
+    def test_chunks_start_at_case_boundaries(self, tmp_path):
+        path = _generate(tmp_path)
+        data = open(path, "rb").read()
+        header = data.index(b"\n") + 1
+        chunks = split_chunks(path, header, len(data), 10)
+        assert chunks[0][0] == header and chunks[-1][1] == len(data)
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            assert end == start and data[start - 1:start] == b"\n"
+            previous_line = data[data.rindex(b"\n", 0, start - 1) + 1:start]
+            assert previous_line.split(b",")[0] != data[start:].split(b",")[0]
+
+    def test_reports_violations_with_offsets(self, tmp_path):
+        path = _generate(tmp_path)
+        lines = _rows(path)
+        # Кейс из нескольких событий в середине файла
+        i = next(
+            i for i in range(len(lines) // 2, len(lines) - 3)
+            if lines[i].split(b",")[0] == lines[i + 1].split(b",")[0]
+        )
+        fields = lines[i + 1].split(b",")
+        fields[2] = b"2000-01-01 00:00:00"       # timestamp_end < timestamp_start
+        fields[8] = b"EMP-9999"                  # нет в пуле
+        fields[12] = b"user_0"                   # атрибут кейса изменился
+        lines[i + 1] = b",".join(fields)
+        lines[5] = b"1,2,3"
+        bad = str(tmp_path / "bad.csv")
+        _write(bad, lines)
+
+        result = validate_csv(bad, workers=1, chunk_bytes=32 * 1024)
+        found = {(offset, rule) for offset, _, rule, _ in result["violations"]}
+        assert (_offset(lines, 5), "fields") in found
+        assert (_offset(lines, i + 1), "duration") in found
+        assert (_offset(lines, i + 1), "resource_id") in found
+        assert (_offset(lines, i + 1), "case_attributes") in found
+        assert result["violation_count"] == 4
+
+    def test_header_and_cross_chunk_order(self, tmp_path):
+        path = _generate(tmp_path, engine="simulation")
+        lines = _rows(path)
+        lines[0] = lines[0].replace(b"case_id", b"case")
+        # Последнее событие первого кейса переносится в конец файла с ранним временем
+        case_id = lines[1].split(b",")[0]
+        last = max(i for i in range(1, len(lines) - 1) if lines[i].split(b",")[0] == case_id)
+        moved = lines.pop(last)
+        fields = moved.split(b",")
+        fields[1] = fields[2] = lines[1].split(b",")[1]
+        lines.insert(len(lines) - 1, b",".join(fields))
+        bad = str(tmp_path / "bad.csv")
+        _write(bad, lines)
+
+        result = validate_csv(bad, workers=1, chunk_bytes=16 * 1024)
+        rules = {rule for _, _, rule, _ in result["violations"]}
+        assert rules == {"header", "order"}
+        assert result["violations"][0][0] == 0
+
+    def test_quoted_newline_keeps_offsets(self, tmp_path):
+        path = _generate(tmp_path)
+        lines = _rows(path)
+        case_id = lines[1].split(b",")[0]
+        # Комментарий с переводом строки в кавычках у всех событий первого кейса
+        i = 1
+        while lines[i].split(b",")[0] == case_id:
+            fields = lines[i].split(b",")
+            lines[i] = b",".join(fields[:-1] + [b'"multi\nline"'])
+            i += 1
+        j = len(lines) // 2
+        fields = lines[j].split(b",")
+        fields[8] = b"EMP-9999"
+        lines[j] = b",".join(fields)
+        bad = str(tmp_path / "bad.csv")
+        _write(bad, lines)
+
+        result = validate_csv(bad, workers=1, chunk_bytes=32 * 1024)
+        assert [(offset, rule) for offset, _, rule, _ in result["violations"]] == [
+            (_offset(lines, j), "resource_id")
+        ]
+        assert result["rows"] == len(lines) - 2
+
+    def test_case_repeated_far_from_its_chunk(self, tmp_path):
+        path = _generate(tmp_path)
+        lines = _rows(path)
+        # Событие кейса из середины первого куска дописывается в конец файла
+        case_id = next(
+            line.split(b",")[0] for line in lines[20:]
+            if line.split(b",")[0] != lines[1].split(b",")[0]
+        )
+        row = next(line for line in lines[1:] if line.split(b",")[0] == case_id)
+        fields = row.split(b",")
+        fields[1] = fields[2] = b"2099-01-01 00:00:00"
+        fields[12] = b"user_0"
+        lines.insert(len(lines) - 1, b",".join(fields))
+        bad = str(tmp_path / "bad.csv")
+        _write(bad, lines)
+
+        result = validate_csv(bad, workers=2, chunk_bytes=32 * 1024)
+        rules = {rule for _, _, rule, _ in result["violations"]}
+        assert rules == {"case_attributes"}
+        assert result["violations"][0][0] == _offset(lines, len(lines) - 2)
+
+    def test_case_index_bounds(self, tmp_path):
+        path = _generate(tmp_path, case_index=True)
+        lines = _rows(path)
+        result = validate_csv(path, workers=1, chunk_bytes=32 * 1024)
+        assert result["violation_count"] == 0
+        assert result["cases"] == len({line.split(b",")[0] for line in lines[1:-1]})
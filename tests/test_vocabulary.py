@@ -0,0 +1,81 @@
+import csv
+import io
+import random
+from datetime import datetime
+from case_generator import CaseGenerator
+from constants import ANOMALY_ACTIVITIES, REWORK_ACTIVITIES
+from resource_pool import ResourcePool
+from vocabulary import USER_ID_COUNT, VocabularyRegistry, csv_escape
+
+
+def _csv_line(value):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow([value])
+    return buffer.getvalue().rstrip("\n")
+
+
+class TestCsvEscape:
+    def test_matches_csv_writer(self):
+        for value in ["plain", "a,b", 'say "hi"', "line\nbreak", "cr\rx", "ünïcode"]:
+            assert csv_escape(value) == _csv_line(value)
+
+
+class TestVocabularyRegistry:
+    def setup_method(self):
+        self.pool = ResourcePool(seed=1)
+        self.registry = VocabularyRegistry(self.pool)
+
+    def test_all_variant_labels_enumerated(self):
+        activities = set(self.registry.values["activity"])
+        for variants in (ANOMALY_ACTIVITIES, REWORK_ACTIVITIES):
+            for suffix, acts in variants.items():
+                for activity in acts:
+                    assert f"{activity} - {suffix}" in activities
+
+    def test_activity_label_is_shared_object(self):
+        suffix, acts = next(iter(REWORK_ACTIVITIES.items()))
+        activity = acts[0]
+        first = self.registry.activity_label(activity, suffix)
+        second = self.registry.activity_label(activity, suffix)
+        assert first == f"{activity} - {suffix}"
+        assert first is second
+
+    def test_user_ids(self):
+        assert len(self.registry.user_ids) == USER_ID_COUNT
+        assert self.registry.user_id(1) == "user_1"
+        assert self.registry.user_id(USER_ID_COUNT) == f"user_{USER_ID_COUNT}"
+
+    def test_encoded_bytes(self):
+        for eid, employee in self.pool.employees.items():
+            assert self.registry.encode("resource_id", eid) == eid.encode()
+            assert self.registry.encode("resource", employee["name"]) == employee["name"].encode()
+        assert self.registry.encode("anomaly_type", None) == b""
+
+    def test_unknown_value_encoded_and_cached(self):
+        data = self.registry.encode("comment", 'custom, "quoted"')
+        assert data == b'"custom, ""quoted"""'
+        assert self.registry.encoded["comment"]['custom, "quoted"'] is data
+
+    def test_generator_reuses_registry_strings(self):
+        gen = CaseGenerator(start_case_id=1, resource_pool=self.pool, vocabulary=self.registry)
+        random.seed(3)
+        events = gen.generate_multiple_cases(
+            "OrderFulfillment", num_cases=200, start_time=datetime(2024, 1, 1),
+            anomaly_rate=0.5, rework_rate=0.5,
+        )
+        labels = {label: label for label in self.registry.values["activity"]}
+        users = {user: user for user in self.registry.user_ids}
+        variants = [e for e in events if e.anomaly or e.rework]
+        assert variants
+        for event in variants:
+            assert event.activity is labels[event.activity]
+        for event in events:
+            assert event.case.user_id is users[event.case.user_id]
+
+
+class TestResourcePoolRecords:
+    def test_get_employee_returns_shared_records(self):
+        pool = ResourcePool(seed=1)
+        records = {id(pool.get_employee("Clerk")) for _ in range(200)}
+        assert len(records) <= sum(1 for e in pool.employees.values() if e["role"] == "Clerk")
+        assert pool.get_employee("System") is pool.get_employee("System")
@@ -0,0 +1,76 @@
+import random
+import xml.etree.ElementTree as ET
+import pytest
+from datetime import datetime
+from case_generator import CaseGenerator
+from logger import get_logger
+from xes_writer import XESWriter
+
+NS = {"xes": "http://www.xes-standard.org/"}
+
+
+def _attrs(element):
+    return {child.get("key"): child.get("value") for child in element
+            if child.tag != "{http://www.xes-standard.org/}event"}
+
+
+class TestXESWriter:
+    def setup_method(self):
+        random.seed(42)
+        self.gen = CaseGenerator(start_case_id=1)
+        self.writer = XESWriter(get_logger())
+
+    def _generate_events(self, n_cases=3):
+        events = []
+        for _ in range(n_cases):
+            events.extend(self.gen.generate_case(
+                "OrderFulfillment", start_time=datetime(2024, 1, 15, 10, 0),
+                anomaly_rate=0.5,
+            ))
+        return events
+
+    def test_valid_xml_with_one_trace_per_case(self, tmp_path):
+        path = str(tmp_path / "log.xes")
+        events1, events2 = self._generate_events(3), self._generate_events(2)
+        self.writer.write_events_to_xes(events1, path, mode="w")
+        self.writer.write_events_to_xes(events2, path, mode="a")
+        self.writer.close()
+
+        root = ET.parse(path).getroot()
+        # Вложенные атрибуты не пишутся — фича не объявляется
+        assert "xes.features" not in root.attrib
+        traces = root.findall("xes:trace", NS)
+        assert [_attrs(t)["concept:name"] for t in traces] == ["1", "2", "3", "4", "5"]
+        assert sum(len(t.findall("xes:event", NS)) for t in traces) == len(events1) + len(events2)
+
+    def test_event_attributes(self, tmp_path):
+        path = str(tmp_path / "log.xes")
+        events = self._generate_events(1)
+        self.writer.write_events_to_xes(events, path)
+        self.writer.close()
+
+        trace = ET.parse(path).getroot().find("xes:trace", NS)
+        assert _attrs(trace)["user_id"] == events[0]["user_id"]
+        assert _attrs(trace)["process"] == "OrderFulfillment"
+        for element, event in zip(trace.findall("xes:event", NS), events):
+            attrs = _attrs(element)
+            assert attrs["concept:name"] == event["activity"]
+            assert attrs["org:resource"] == event["resource"]
+            assert attrs["time:timestamp"] == event["timestamp_end"].strftime("%Y-%m-%dT%H:%M:%S")
+            assert attrs["anomaly"] == ("true" if event["anomaly"] else "false")
+
+    def test_attribute_values_escaped(self, tmp_path):
+        path = str(tmp_path / "log.xes")
+        events = self._generate_events(1)
+        events[0]["comment"] = 'Says "hi" & <bye>'
+        self.writer.write_events_to_xes(events, path)
+        self.writer.close()
+
+        trace = ET.parse(path).getroot().find("xes:trace", NS)
+        assert _attrs(trace)["comment"] == 'Says "hi" & <bye>'
+
+    def test_append_requires_open_file(self, tmp_path):
+        with pytest.raises(ValueError, match="appended"):
+            self.writer.write_events_to_xes(
+                self._generate_events(1), str(tmp_path / "log.xes"), mode="a"
+            )
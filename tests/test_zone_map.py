@@ -0,0 +1,116 @@
+import csv
+import io
+import random
+from datetime import datetime
+import pytest
+from epoch_time import to_epoch
+from logger import get_logger
+from main import ProcessMiningGenerator
+from zone_map import ZoneMapBuilder, load_zone_map, select_zones, zone_map_path
+
+
+class _Event:
+    def __init__(self, case_id, start, process, anomaly=False, rework=False):
+        self.case_id = case_id
+        self.start_ts = to_epoch(start)
+        self.process = process
+        self.anomaly = anomaly
+        self.rework = rework
+
+
+def _build(tmp_path, events, chunk_bytes, batch=3):
+    builder = ZoneMapBuilder(str(tmp_path / "log.csv.zones.json"), chunk_bytes)
+    builder.start(10)
+    rows = [b"x" * 10 for _ in events]
+    for i in range(0, len(events), batch):
+        builder.add_rows(events[i:i + batch], rows[i:i + batch])
+    builder.close()
+    return load_zone_map(builder.path)
+
+
+class TestZoneMapBuilder:
+    def test_zones_cover_rows(self, tmp_path):
+        events = [
+            _Event(i, datetime(2024, 1, 1 + i), "A" if i <= 5 else "B", anomaly=i == 2)
+            for i in range(1, 11)
+        ]
+        zone_map = _build(tmp_path, events, chunk_bytes=40)
+        zones = zone_map["zones"]
+
+        assert zone_map["chunk_bytes"] == 40
+        assert [zone["rows"] for zone in zones] == [4, 4, 2]
+        assert zones[0]["offset"] == 10 and zones[-1]["end"] == 110
+        assert all(a["end"] == b["offset"] for a, b in zip(zones, zones[1:]))
+        assert zones[0]["start_min"] == "2024-01-02 00:00:00"
+        assert zones[0]["start_max"] == "2024-01-05 00:00:00"
+        assert (zones[1]["case_id_min"], zones[1]["case_id_max"]) == (5, 8)
+        assert zones[1]["processes"] == ["A", "B"]
+        assert [zone["anomalies"] for zone in zones] == [1, 0, 0]
+
+    def test_rows_larger_than_chunk(self, tmp_path):
+        events = [_Event(i, datetime(2024, 1, 1), "A", rework=True) for i in range(5)]
+        zones = _build(tmp_path, events, chunk_bytes=4)["zones"]
+        assert [zone["rows"] for zone in zones] == [1] * 5
+        assert sum(zone["reworks"] for zone in zones) == 5
+
+
+class TestSelectZones:
+    ZONE_MAP = {"zones": [
+        {"start_min": "2024-01-01 09:00:00", "start_max": "2024-01-10 17:00:00", "processes": ["A"]},
+        {"start_min": "2024-01-05 09:00:00", "start_max": "2024-01-20 17:00:00", "processes": ["B"]},
+        {"start_min": "2024-02-01 09:00:00", "start_max": "2024-02-10 17:00:00", "processes": ["A", "B"]},
+    ]}
+
+    def test_time_window(self):
+        selected = select_zones(self.ZONE_MAP, start=datetime(2024, 1, 15), end="2024-01-31 23:59:59")
+        assert selected == [self.ZONE_MAP["zones"][1]]
+
+    def test_processes(self):
+        selected = select_zones(self.ZONE_MAP, processes=["A"])
+        assert selected == [self.ZONE_MAP["zones"][0], self.ZONE_MAP["zones"][2]]
+
+    def test_no_filter(self):
+        assert select_zones(self.ZONE_MAP) == self.ZONE_MAP["zones"]
+
+
+class TestGeneratedZoneMap:
+    CONFIG = {
+        "target_size_gb": 0.0003,
+        "process_distribution": {"OrderFulfillment": 0.5, "HRRecruitment": 0.5},
+        "anomaly_rate": 0.05,
+        "rework_rate": 0.1,
+        "start_date": "2024-01-01",
+        "time_range_days": 60,
+        "zone_map_bytes": 32 * 1024,
+    }
+
+    @pytest.mark.parametrize("engine", ["batch", "simulation"])
+    def test_stats_match_file(self, tmp_path, engine):
+        random.seed(42)
+        config = dict(self.CONFIG, output_dir=str(tmp_path), engine=engine)
+        gen = ProcessMiningGenerator(config, get_logger())
+        gen.generate_data()
+
+        path = gen.output_paths["events"]
+        assert zone_map_path(path) in gen.output_files()
+        zones = load_zone_map(zone_map_path(path))["zones"]
+        assert len(zones) > 5
+        data = open(path, "rb").read()
+        assert zones[-1]["end"] == len(data)
+
+        for zone in zones:
+            chunk = data[zone["offset"]:zone["end"]].decode("utf-8")
+            rows = list(csv.reader(io.StringIO(chunk, newline="")))
+            assert len(rows) == zone["rows"]
+            starts = [row[1] for row in rows]
+            case_ids = [int(row[0]) for row in rows]
+            assert (min(starts), max(starts)) == (zone["start_min"], zone["start_max"])
+            assert (min(case_ids), max(case_ids)) == (zone["case_id_min"], zone["case_id_max"])
+            assert sorted({row[3] for row in rows}) == zone["processes"]
+            assert sum(row[9] == "True" for row in rows) == zone["anomalies"]
+            assert sum(row[11] == "True" for row in rows) == zone["reworks"]
+
+    def test_rejects_gzip(self, tmp_path):
+        config = dict(self.CONFIG, output_dir=str(tmp_path), compress="gzip")
+        with pytest.raises(ValueError):
+            ProcessMiningGenerator(config, get_logger())
@@ -1,7 +1,8 @@
 import random
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
 from config import Season, SEASONAL_MULTIPLIERS, WAITING_TIMES
+from epoch_time import quarter_of
 from constants import (
     ACTIVITY_DURATIONS,
     ANOMALY_DURATIONS,
@@ -21,8 +22,23 @@ def get_season(dt: datetime) -> Season:
     return Season.Q4
 
 
+_SEASON_BY_QUARTER = {1: Season.Q1, 2: Season.Q2, 3: Season.Q3, 4: Season.Q4}
+
+
+def get_season_epoch(ts: int) -> Season:
+    """get_season для времени в epoch-секундах — без построения datetime"""
+    return _SEASON_BY_QUARTER[quarter_of(ts)]
+
+
+def _season_of(when) -> Season:
+    """Сезон для datetime (публичный API) или epoch-секунд (генератор)"""
+    if isinstance(when, int):
+        return get_season_epoch(when)
+    return get_season(when)
+
+
 def get_activity_duration(
-    activity: str, process_name: str, current_time: datetime
+    activity: str, process_name: str, current_time: Union[datetime, int]
 ) -> int:
     if activity in ACTIVITY_DURATIONS:
         min_dur, max_dur = ACTIVITY_DURATIONS[activity]
@@ -31,17 +47,17 @@ def get_activity_duration(
         base_duration = random.randint(1, 5)
 
     # Apply seasonal multiplier
-    season = get_season(current_time)
+    season = _season_of(current_time)
     multiplier = SEASONAL_MULTIPLIERS.get(process_name, {}).get(season, 1.0)
 
     return max(1, int(base_duration * multiplier))
 
 
-def get_waiting_time(process_name: str, current_time: datetime) -> int:
+def get_waiting_time(process_name: str, current_time: Union[datetime, int]) -> int:
     min_wait, max_wait = WAITING_TIMES.get(process_name, (5, 60))
     base_wait = random.randint(min_wait, max_wait)
 
-    season = get_season(current_time)
+    season = _season_of(current_time)
     multiplier = SEASONAL_MULTIPLIERS.get(process_name, {}).get(season, 1.0)
 
     return max(1, int(base_wait * multiplier))
@@ -0,0 +1,377 @@
+import argparse
+import array
+import csv
+import hashlib
+import heapq
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from case_index import CaseIndex, case_index_path
+from constants import CSV_FIELD_NAMES, EXTENDED_CSV_FIELDS
+from memory_budget import parse_memory_size
+from resource_pool import ResourcePool
+
+# Объем файла на одну задачу пула
+VALIDATE_CHUNK_BYTES = 64 * 1024 * 1024
+# Нарушений, сохраняемых с каждого куска (считаются все)
+MAX_VIOLATIONS_PER_CHUNK = 1000
+# Сколько строк просматривается вперед в поисках границы кейса
+_ALIGN_MAX_LINES = 10000
+
+_HEADER = (",".join(CSV_FIELD_NAMES) + "\n").encode("utf-8")
+_N_FIELDS = len(CSV_FIELD_NAMES)
+_RESOURCE_ID = CSV_FIELD_NAMES.index("resource_id")
+_CASE_FIELDS = slice(_N_FIELDS - len(EXTENDED_CSV_FIELDS), _N_FIELDS)
+_TIMESTAMP_LENGTH = len("YYYY-MM-DD HH:MM:SS")
+# Колонки состояния кейса для сверки между кусками
+_STATE_COLUMNS = ("case_id", "first_start", "last_start", "attributes", "offset")
+
+
+def valid_resource_ids() -> frozenset:
+    """resource_id сотрудников пула (не зависят от seed) и системные значения"""
+    return frozenset(ResourcePool().employees) | {"SYSTEM", "UNKNOWN", ""}
+
+
+def _case_id_at(mm, pos: int) -> bytes:
+    return mm[pos:mm.find(b",", pos, pos + 64)]
+
+
+def _align(mm, pos: int, end: int) -> int:
+    """Первая граница строки не раньше pos, на которой начинается новый кейс.
+
+    Если кейс тянется дольше _ALIGN_MAX_LINES строк (перемежающиеся кейсы
+    после --engine simulation или --sort-by-time), остается граница строки —
+    кейсы на стыке кусков проверяются при слиянии.
+    """
+    if pos <= 0:
+        return 0
+    newline = mm.find(b"\n", pos - 1, end)
+    if newline == -1:
+        return end
+    line_start = mm.rfind(b"\n", 0, newline) + 1
+    previous_case = _case_id_at(mm, line_start)
+    pos = newline + 1
+    for _ in range(_ALIGN_MAX_LINES):
+        if pos >= end or _case_id_at(mm, pos) != previous_case:
+            return min(pos, end)
+        newline = mm.find(b"\n", pos, end)
+        pos = end if newline == -1 else newline + 1
+    return pos
+
+
+def split_chunks(path: str, data_start: int, size: int, parts: int) -> List[Tuple[int, int]]:
+    """Байтовые диапазоны [start, end) по границам строк и кейсов.
+
+    Если рядом лежит индекс кейсов (--case-index), границы берутся из него.
+    """
+    if os.path.exists(case_index_path(path)):
+        with CaseIndex(path) as index:
+            if len(index):
+                return index.split(parts)
+    step = max(1, (size - data_start) // max(1, parts))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [data_start]
+        for k in range(1, parts):
+            pos = _align(mm, data_start + step * k, size)
+            if pos > bounds[-1] and pos < size:
+                bounds.append(pos)
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _lines(mm, start: int, end: int, starts: List[int], report) -> Iterator[str]:
+    """Строки [start, end) по одной прямо из mmap, без копии куска.
+
+    Смещение каждой отданной строки дописывается в starts: csv.reader
+    забирает строки по мере надобности, поэтому строки записи с переводом
+    строки в кавычках лежат в starts до выдачи этой записи.
+    """
+    find = mm.find
+    append = starts.append
+    pos = start
+    while pos < end:
+        stop = find(b"\n", pos, end) + 1 or end
+        raw = mm[pos:stop]
+        try:
+            text = raw.decode()
+        except UnicodeDecodeError as e:
+            report(pos + e.start, None, "encoding", "invalid utf-8")
+            text = raw.decode("utf-8", "replace")
+        append(pos)
+        pos = stop
+        yield text
+
+
+def _timestamp_key(ts: str) -> int:
+    """"YYYY-MM-DD HH:MM:SS" -> YYYYMMDDHHMMSS (порядок тот же); 0 — не timestamp"""
+    digits = ts[0:4] + ts[5:7] + ts[8:10] + ts[11:13] + ts[14:16] + ts[17:19]
+    return int(digits) if len(ts) == _TIMESTAMP_LENGTH and digits.isdigit() else 0
+
+
+def _timestamp_text(key: int) -> str:
+    s = f"{key:014d}"
+    return f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[8:10]}:{s[10:12]}:{s[12:14]}"
+
+
+def _attributes_digest(attributes: tuple) -> int:
+    """8 байт blake2b атрибутов кейса: одинаковый во всех процессах пула"""
+    payload = "\x1f".join(attributes).encode("utf-8", "replace")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little")
+
+
+def _pack_states(states: Dict[str, list]) -> Tuple[array.array, ...]:
+    """Состояния кейсов колонками array("Q"), по возрастанию case_id"""
+    columns = tuple(array.array("Q") for _ in _STATE_COLUMNS)
+    ids, first, last, digest, offset = columns
+    for case_id in sorted(states, key=int):
+        state = states[case_id]
+        ids.append(int(case_id))
+        first.append(_timestamp_key(state[0]))
+        last.append(_timestamp_key(state[1]))
+        digest.append(_attributes_digest(state[2]))
+        offset.append(state[3])
+    return columns
+
+
+def check_chunk(path: str, start: int, end: int, states_mode: str = "edges") -> Dict:
+    """Проверяет записи [start, end) — задача для пула процессов.
+
+    Строки читаются по одной прямо из mmap. Возвращает нарушения (offset,
+    case_id, правило, описание), число записей и состояния кейсов для
+    проверки на стыках: первый и последний timestamp_start, хэш атрибутов
+    кейса, offset первой строки — колонками array, по возрастанию case_id.
+    states_mode: "none" — кейсы не выходят за кусок (границы из индекса
+    кейсов), "edges" — если кейсы идут подряд по возрастанию case_id, с
+    другими кусками могут пересекаться только первый и последний, иначе
+    все; "all" — все кейсы.
+    """
+    resource_ids = valid_resource_ids()
+    violations = []
+    count = 0
+
+    def report(offset, case_id, rule, message):
+        nonlocal count
+        count += 1
+        if len(violations) < MAX_VIOLATIONS_PER_CHUNK:
+            violations.append((offset, case_id, rule, message))
+
+    states: Dict[str, list] = {}
+    contiguous = True
+    previous_case = None
+    rows = 0
+    starts: List[int] = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for row in csv.reader(_lines(mm, start, end, starts, report)):
+            line_offset = starts[0]
+            starts.clear()
+            rows += 1
+            if len(row) != _N_FIELDS:
+                report(line_offset, None, "fields", f"{len(row)} fields instead of {_N_FIELDS}")
+                continue
+            case_id, ts_start, ts_end = row[0], row[1], row[2]
+            if not case_id.isdigit():
+                report(line_offset, case_id, "case_id", "case_id is not an integer")
+                continue
+            if len(ts_start) != _TIMESTAMP_LENGTH or len(ts_end) != _TIMESTAMP_LENGTH:
+                report(line_offset, case_id, "timestamp", "timestamp is not YYYY-MM-DD HH:MM:SS")
+            elif ts_end < ts_start:
+                report(line_offset, case_id, "duration", f"timestamp_end {ts_end} < timestamp_start {ts_start}")
+            if row[_RESOURCE_ID] not in resource_ids:
+                report(line_offset, case_id, "resource_id", f"unknown resource_id {row[_RESOURCE_ID]!r}")
+
+            attributes = tuple(row[_CASE_FIELDS])
+            state = states.get(case_id)
+            if state is None:
+                if previous_case is not None and int(case_id) <= int(previous_case):
+                    contiguous = False
+                states[case_id] = [ts_start, ts_start, attributes, line_offset]
+            else:
+                if case_id != previous_case:
+                    contiguous = False
+                if ts_start < state[1]:
+                    report(line_offset, case_id, "order", f"timestamp_start {ts_start} before {state[1]}")
+                else:
+                    state[1] = ts_start
+                if attributes != state[2]:
+                    report(line_offset, case_id, "case_attributes", "case-level attributes differ within case")
+            previous_case = case_id
+
+    case_ids = list(states)
+    result = {
+        "start": start,
+        "end": end,
+        "rows": rows,
+        "cases": len(case_ids),
+        "contiguous": contiguous,
+        "min_case": min(map(int, case_ids)) if case_ids else None,
+        "max_case": max(map(int, case_ids)) if case_ids else None,
+        "violations": violations,
+        "violation_count": count,
+    }
+    if states_mode == "none":
+        states = {}
+    elif states_mode == "edges" and contiguous and len(case_ids) > 2:
+        states = {case_id: states[case_id] for case_id in (case_ids[0], case_ids[-1])}
+    result["states"] = _pack_states(states)
+    return result
+
+
+def _overlapping(results: List[Dict]) -> List[int]:
+    """Куски с кейсами подряд, чьи внутренние case_id могут встретиться в других кусках.
+
+    Такому куску мало первого и последнего кейса. Общий кейс на стыке
+    (край обоих диапазонов) пересечением не считается.
+    """
+    ranges = [
+        (i, result["min_case"], result["max_case"])
+        for i, result in enumerate(results) if result["cases"]
+    ]
+    overlapping = []
+    for i, low, high in ranges:
+        if not results[i]["contiguous"] or results[i]["cases"] <= 2:
+            continue
+        for j, other_low, other_high in ranges:
+            lo, hi = max(low, other_low), min(high, other_high)
+            if j != i and lo <= hi and not (lo == hi and lo in (low, high)):
+                overlapping.append(i)
+                break
+    return overlapping
+
+
+def _state_stream(order: int, columns) -> Iterator[tuple]:
+    ids, first, last, digest, offset = columns
+    for i in range(len(ids)):
+        yield ids[i], order, first[i], last[i], digest[i], offset[i]
+
+
+def _merge_states(results: List[Dict], report) -> int:
+    """Проверки кейсов, которые встречаются в нескольких кусках; возвращает их число.
+
+    Состояния кусков отсортированы по case_id — слияние потоковое, без
+    словаря всех кейсов файла.
+    """
+    repeated = 0
+    previous = None
+    streams = [_state_stream(order, result["states"]) for order, result in enumerate(results)]
+    for state in heapq.merge(*streams):
+        case_id, _, first, last, digest, offset = state
+        if previous is None or case_id != previous[0]:
+            previous = state
+            continue
+        repeated += 1
+        if first < previous[3]:
+            report(offset, str(case_id), "order",
+                   f"timestamp_start {_timestamp_text(first)} before {_timestamp_text(previous[3])}")
+        if digest != previous[4]:
+            report(offset, str(case_id), "case_attributes", "case-level attributes differ within case")
+        previous = previous[:3] + (max(previous[3], last),) + previous[4:]
+    return repeated
+
+
+def validate_csv(path: str, workers: Optional[int] = None,
+                 chunk_bytes: int = VALIDATE_CHUNK_BYTES) -> Dict:
+    """Проверяет инварианты плоского CSV в пуле процессов.
+
+    Заголовок совпадает с CSV_FIELD_NAMES; timestamp_end >= timestamp_start;
+    события кейса не убывают по timestamp_start; resource_id есть в пуле;
+    атрибуты уровня кейса постоянны внутри кейса. Файл читается через mmap
+    кусками по границам кейсов; нарушения — с байтовыми смещениями.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    violations = []
+    count = 0
+
+    def report(offset, case_id, rule, message):
+        nonlocal count
+        count += 1
+        if len(violations) < MAX_VIOLATIONS_PER_CHUNK:
+            violations.append((offset, case_id, rule, message))
+
+    with open(path, "rb") as f:
+        header = f.readline()
+    if header != _HEADER:
+        report(0, None, "header", "header does not match CSV_FIELD_NAMES")
+    data_start = len(header)
+
+    parts = max(workers, -(-(size - data_start) // chunk_bytes))
+    chunks = split_chunks(path, data_start, size, parts) if size > data_start else []
+    # Границы из индекса — границы кейсов: сверять кейсы между кусками не нужно
+    indexed = os.path.exists(case_index_path(path))
+    mode = "none" if indexed else "edges"
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(chunks) > 1 else None
+    try:
+        def run(tasks):
+            if not tasks:
+                return []
+            if pool is None:
+                return [check_chunk(*task) for task in tasks]
+            return list(pool.map(check_chunk, *zip(*tasks)))
+
+        results = run([(path, start, end, mode) for start, end in chunks])
+        if not indexed:
+            # Кейсы подряд, но диапазон case_id пересекается с другими кусками:
+            # нужны все кейсы куска — повторный проход в пуле
+            rescan = _overlapping(results)
+            tasks = [(path, results[i]["start"], results[i]["end"], "all") for i in rescan]
+            for i, result in zip(rescan, run(tasks)):
+                results[i]["states"] = result["states"]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    for result in results:
+        for violation in result["violations"]:
+            report(*violation)
+        count += result["violation_count"] - len(result["violations"])
+    cases = sum(result["cases"] for result in results) - _merge_states(results, report)
+
+    violations.sort(key=lambda violation: violation[0])
+    return {
+        "path": path,
+        "rows": sum(result["rows"] for result in results),
+        "cases": cases,
+        "chunks": len(chunks),
+        "violations": violations,
+        "violation_count": count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Проверка инвариантов сгенерированного CSV (параллельно, mmap)"
+    )
+    parser.add_argument("input", help="Плоский CSV (process_log_*.csv)")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Число процессов (по умолчанию — число CPU)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=parse_memory_size,
+        default=VALIDATE_CHUNK_BYTES,
+        help="Объем куска на задачу (64M по умолчанию)",
+    )
+    parser.add_argument(
+        "--max-report", type=int, default=20, help="Сколько нарушений вывести"
+    )
+    args = parser.parse_args()
+
+    result = validate_csv(args.input, workers=args.workers, chunk_bytes=args.chunk_size)
+    print(
+        f"{result['path']}: {result['rows']} строк, {result['cases']} кейсов, "
+        f"{result['chunks']} кусков"
+    )
+    for offset, case_id, rule, message in result["violations"][:args.max_report]:
+        print(f"  offset {offset}: case {case_id}: [{rule}] {message}")
+    if result["violation_count"]:
+        print(f"Нарушений: {result['violation_count']}")
+        sys.exit(1)
+    print("Нарушений нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import csv
+import io
+import sys
+from typing import Dict, List, Tuple
+
+from categorical import build_vocabularies
+from resource_pool import ResourcePool
+
+# Диапазон user_id: user_1 .. user_5000
+USER_ID_COUNT = 5000
+
+
+def _quoted_chars() -> tuple:
+    """Символы, из-за которых csv.writer (lineterminator="\\n") берет поле в кавычки.
+
+    Набор зависит от версии Python (\\r), поэтому определяется пробой.
+    """
+    chars = []
+    for char in (",", '"', "\r", "\n"):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow([char])
+        if buffer.getvalue().startswith('"'):
+            chars.append(char)
+    return tuple(chars)
+
+
+_CSV_SPECIAL = _quoted_chars()
+
+
+def csv_escape(value: str) -> str:
+    """Экранирование как у csv.writer (QUOTE_MINIMAL)"""
+    if any(char in value for char in _CSV_SPECIAL):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+class VocabularyRegistry:
+    """Единый реестр значений категориальных колонок.
+
+    Все возможные значения (активности с вариантами аномалий и rework,
+    user_id, сотрудники, отделы, комментарии) перечисляются один раз
+    при старте: строки интернируются, а для каждой заранее готова
+    CSV-экранированная форма в байтах. Генератор берет отсюда готовые
+    строки, writer — готовые байты.
+    """
+
+    def __init__(self, resource_pool: ResourcePool):
+        values = build_vocabularies(resource_pool)
+        values["user_id"] = [f"user_{n}" for n in range(1, USER_ID_COUNT + 1)]
+
+        self.values: Dict[str, List[str]] = {
+            field: [sys.intern(value) for value in field_values]
+            for field, field_values in values.items()
+        }
+        # field -> {значение: байты}; None — пустое поле
+        self.encoded: Dict[str, Dict] = {
+            field: {None: b"", "": b""} for field in self.values
+        }
+        for field, field_values in self.values.items():
+            for value in field_values:
+                self.encoded[field][value] = csv_escape(value).encode("utf-8")
+
+        self.user_ids: Tuple[str, ...] = tuple(self.values["user_id"])
+        self._labels: Dict[Tuple[str, str], str] = {}
+        known = set(self.values["activity"])
+        for label in known:
+            if " - " in label:
+                activity, suffix = label.rsplit(" - ", 1)
+                self._labels[(activity, suffix)] = label
+
+    def user_id(self, number: int) -> str:
+        """user_<number> из пула (1 <= number <= USER_ID_COUNT)"""
+        return self.user_ids[number - 1]
+
+    def activity_label(self, activity: str, suffix: str) -> str:
+        """Интернированная метка "<activity> - <anomaly|rework>" """
+        label = self._labels.get((activity, suffix))
+        if label is None:
+            label = sys.intern(f"{activity} - {suffix}")
+            self._labels[(activity, suffix)] = label
+        return label
+
+    def encode(self, field: str, value) -> bytes:
+        """CSV-байты значения; значения вне словаря кодируются и запоминаются"""
+        encoded = self.encoded[field]
+        data = encoded.get(value)
+        if data is None:
+            data = csv_escape(str(value)).encode("utf-8")
+            encoded[value] = data
+        return data
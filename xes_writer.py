@@ -0,0 +1,155 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from constants import CSV_FIELD_NAMES
+from epoch_time import format_timestamp
+from event_record import Event
+
+# Буфер записи — XML пишется крупными кусками без построения DOM
+XES_BUFFER_SIZE = 8 * 1024 * 1024
+_XES_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+_ATTR_ENTITIES = {'"': "&quot;"}
+
+XES_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" ?>\n'
+    '<log xes.version="1.0" xmlns="http://www.xes-standard.org/">\n'
+    '<extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext"/>\n'
+    '<extension name="Time" prefix="time" uri="http://www.xes-standard.org/time.xesext"/>\n'
+    '<extension name="Organizational" prefix="org" uri="http://www.xes-standard.org/org.xesext"/>\n'
+    '<extension name="Lifecycle" prefix="lifecycle" uri="http://www.xes-standard.org/lifecycle.xesext"/>\n'
+    '<global scope="trace">\n'
+    '<string key="concept:name" value="__INVALID__"/>\n'
+    '</global>\n'
+    '<global scope="event">\n'
+    '<string key="concept:name" value="__INVALID__"/>\n'
+    '<date key="time:timestamp" value="1970-01-01T00:00:00"/>\n'
+    '</global>\n'
+    '<classifier name="Activity" keys="concept:name"/>\n'
+)
+XES_FOOTER = "</log>\n"
+
+_FIELD_INDEX = {field: i for i, field in enumerate(CSV_FIELD_NAMES)}
+
+# Строковые атрибуты события: (индекс поля, ключ XES)
+_EVENT_STRING_KEYS = [
+    (_FIELD_INDEX["activity"], "concept:name"),
+    (_FIELD_INDEX["resource"], "org:resource"),
+    (_FIELD_INDEX["role"], "org:role"),
+    (_FIELD_INDEX["resource_id"], "resource_id"),
+    (_FIELD_INDEX["anomaly_type"], "anomaly_type"),
+]
+# Строковые атрибуты трейса (case-level)
+_TRACE_STRING_KEYS = [
+    (_FIELD_INDEX[field], field)
+    for field in ("process", "user_id", "department", "priority", "comment")
+]
+_START, _END = _FIELD_INDEX["timestamp_start"], _FIELD_INDEX["timestamp_end"]
+_DURATION, _COST = _FIELD_INDEX["duration_minutes"], _FIELD_INDEX["cost"]
+_ANOMALY, _REWORK = _FIELD_INDEX["anomaly"], _FIELD_INDEX["rework"]
+
+
+def _xes_time(value) -> str:
+    """ISO-время для XES из epoch-секунд (Event) или datetime (dict-события)"""
+    if isinstance(value, datetime):
+        return value.strftime(_XES_TIMESTAMP_FORMAT)
+    return format_timestamp(value).replace(" ", "T", 1)
+
+
+class XESWriter:
+    """Потоковая запись событий в XES (<trace>/<event> по мере генерации).
+
+    События одного кейса в батче идут подряд, поэтому трейс открывается
+    при смене case_id. Экранированные фрагменты строковых атрибутов
+    кэшируются: словари значений маленькие (активности, сотрудники, отделы).
+    """
+
+    def __init__(self, logger, buffer_size: int = XES_BUFFER_SIZE):
+        self.logger = logger
+        self.buffer_size = buffer_size
+        self.filepath: Optional[str] = None
+        self._file = None
+        self._fragments: Dict[str, Dict[str, str]] = {}
+
+    @property
+    def bytes_written(self) -> int:
+        """Байт записано в файл (без закрывающего </log>, пока файл открыт)"""
+        if self._file is not None:
+            return self._file.tell()
+        if self.filepath and os.path.exists(self.filepath):
+            return os.path.getsize(self.filepath)
+        return 0
+
+    def write_events_to_xes(self, events: List, filepath: str, mode: str = "w"):
+        """Записывает батч событий как последовательность трейсов"""
+        if mode == "a":
+            if self._file is None or filepath != self.filepath:
+                raise ValueError("XES file can only be appended while it is open")
+        else:
+            self.close()
+            self.filepath = filepath
+            self._file = open(filepath, "wb", buffering=self.buffer_size)
+            self._file.write(XES_HEADER.encode("utf-8"))
+
+        self.logger.info("Запись %d событий в XES (mode: %s)...", len(events), mode)
+
+        parts = []
+        last_case_id = None
+        for event in events:
+            values = (
+                event.to_epoch_values() if isinstance(event, Event)
+                else tuple(event.get(field) for field in CSV_FIELD_NAMES)
+            )
+            if values[0] != last_case_id:
+                if last_case_id is not None:
+                    parts.append("</trace>\n")
+                parts.append(self._trace_open(values))
+                last_case_id = values[0]
+            parts.append(self._event(values))
+        if last_case_id is not None:
+            parts.append("</trace>\n")
+
+        self._file.write("".join(parts).encode("utf-8"))
+
+    def close(self):
+        """Дописывает </log> и закрывает файл"""
+        if self._file is not None:
+            self._file.write(XES_FOOTER.encode("utf-8"))
+            self._file.close()
+            self._file = None
+
+    def _string(self, key: str, value) -> str:
+        """Кэшированный фрагмент <string key=... value=.../>"""
+        cache = self._fragments.setdefault(key, {})
+        fragment = cache.get(value)
+        if fragment is None:
+            fragment = f'<string key="{key}" value="{escape(str(value), _ATTR_ENTITIES)}"/>\n'
+            cache[value] = fragment
+        return fragment
+
+    def _trace_open(self, values: tuple) -> str:
+        parts = ["<trace>\n", f'<string key="concept:name" value="{values[0]}"/>\n']
+        for index, key in _TRACE_STRING_KEYS:
+            parts.append(self._string(key, values[index]))
+        parts.append(f'<float key="cost" value="{values[_COST]}"/>\n')
+        return "".join(parts)
+
+    def _event(self, values: tuple) -> str:
+        start = values[_START]
+        end = values[_END]
+        parts = ["<event>\n"]
+        for index, key in _EVENT_STRING_KEYS:
+            value = values[index]
+            if value is not None:
+                parts.append(self._string(key, value))
+        parts.append(
+            f'<date key="time:timestamp" value="{_xes_time(end)}"/>\n'
+            f'<date key="start_timestamp" value="{_xes_time(start)}"/>\n'
+            '<string key="lifecycle:transition" value="complete"/>\n'
+            f'<int key="duration_minutes" value="{values[_DURATION]}"/>\n'
+            f'<boolean key="anomaly" value="{"true" if values[_ANOMALY] else "false"}"/>\n'
+            f'<boolean key="rework" value="{"true" if values[_REWORK] else "false"}"/>\n'
+            "</event>\n"
+        )
+        return "".join(parts)
@@ -0,0 +1,146 @@
+import json
+from bisect import bisect_left
+from datetime import datetime
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Union
+
+from dataset_cache import unlink_for_rewrite
+from epoch_time import format_timestamp
+
+ZONE_MAP_SUFFIX = ".zones.json"
+# Размер зоны по умолчанию для --zone-maps без значения
+DEFAULT_ZONE_BYTES = 8 * 1024 * 1024
+
+
+def zone_map_path(csv_path: str) -> str:
+    """Sidecar лежит рядом с CSV: process_log_1_0GB.csv.zones.json"""
+    return csv_path + ZONE_MAP_SUFFIX
+
+
+class ZoneMapBuilder:
+    """Статистика по зонам выходного файла (zone maps) во время записи CSV.
+
+    Зона — непрерывный диапазон целых строк размером около chunk_bytes.
+    Для каждой зоны хранятся байтовый диапазон, min/max timestamp_start,
+    диапазон case_id, набор процессов и число anomaly/rework. Все берется
+    из событий батча, которые writer и так держит в памяти, — без
+    повторного прохода по файлу.
+    """
+
+    def __init__(self, path: str, chunk_bytes: int = DEFAULT_ZONE_BYTES):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.offset = 0
+        self.zones: List[Dict] = []
+        self._zone = None
+
+    def start(self, offset: int):
+        """Новый файл: первая строка данных начинается с offset (после заголовка)"""
+        self.offset = offset
+        self.zones = []
+        self._zone = None
+
+    def add_rows(self, events: List, rows: List[bytes]):
+        """Учитывает записанные строки; rows[i] — CSV-байты events[i]"""
+        # ends[k] — смещение после k строк батча
+        ends = list(accumulate(map(len, rows), initial=self.offset))
+        n = len(events)
+        i = 0
+        while i < n:
+            if self._zone is None:
+                self._zone = self._new_zone(ends[i])
+            limit = self._zone["offset"] + self.chunk_bytes
+            # Зона закрывается после строки, на которой набран chunk_bytes
+            j = bisect_left(ends, limit, i + 1, n + 1)
+            closes = j <= n
+            j = min(j, n)
+            self._extend(events[i:j], ends[j])
+            if closes:
+                self._close_zone()
+            i = j
+        self.offset = ends[n]
+
+    @staticmethod
+    def _new_zone(offset: int) -> Dict:
+        return {
+            "offset": offset,
+            "end": offset,
+            "rows": 0,
+            "start_min": None,
+            "start_max": None,
+            "case_id_min": None,
+            "case_id_max": None,
+            "processes": set(),
+            "anomalies": 0,
+            "reworks": 0,
+        }
+
+    def _extend(self, events: List, end: int):
+        zone = self._zone
+        starts = [event.start_ts for event in events]
+        case_ids = [event.case_id for event in events]
+        zone["end"] = end
+        zone["rows"] += len(events)
+        zone["start_min"] = _merge(min, zone["start_min"], min(starts))
+        zone["start_max"] = _merge(max, zone["start_max"], max(starts))
+        zone["case_id_min"] = _merge(min, zone["case_id_min"], min(case_ids))
+        zone["case_id_max"] = _merge(max, zone["case_id_max"], max(case_ids))
+        zone["processes"].update(event.process for event in events)
+        zone["anomalies"] += sum(1 for event in events if event.anomaly)
+        zone["reworks"] += sum(1 for event in events if event.rework)
+
+    def _close_zone(self):
+        zone = self._zone
+        self._zone = None
+        zone["start_min"] = format_timestamp(zone["start_min"])
+        zone["start_max"] = format_timestamp(zone["start_max"])
+        zone["processes"] = sorted(zone["processes"])
+        self.zones.append(zone)
+
+    def close(self):
+        """Закрывает последнюю зону и пишет sidecar"""
+        if self._zone is not None and self._zone["rows"]:
+            self._close_zone()
+        unlink_for_rewrite(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"chunk_bytes": self.chunk_bytes, "zones": self.zones}, f, indent=1)
+
+
+def _merge(pick, current, value):
+    return value if current is None else pick(current, value)
+
+
+def load_zone_map(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _as_text(value: Union[str, datetime]) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def select_zones(
+    zone_map: Dict,
+    start: Optional[Union[str, datetime]] = None,
+    end: Optional[Union[str, datetime]] = None,
+    processes: Optional[Iterable[str]] = None,
+) -> List[Dict]:
+    """Зоны, которые могут содержать события с timestamp_start в [start, end]
+    и процессом из processes; остальные можно не читать.
+
+    Время сравнивается строками "YYYY-MM-DD HH:MM:SS" — как в CSV.
+    """
+    start, end = _as_text(start), _as_text(end)
+    wanted = set(processes) if processes is not None else None
+    selected = []
+    for zone in zone_map["zones"]:
+        if start is not None and zone["start_max"] < start:
+            continue
+        if end is not None and zone["start_min"] > end:
+            continue
+        if wanted is not None and wanted.isdisjoint(zone["processes"]):
+            continue
+        selected.append(zone)
+    return selected